@@ -0,0 +1,126 @@
+# admin_stats.py
+from collections import Counter
+from types import SimpleNamespace
+
+from sqlalchemy import inspect, select, text
+
+from product_listing import decode_cursor, encode_cursor
+
+ADMIN_PAGE_SIZE = 20
+
+# Summary counters kept in the dashboard_counter table. For each counted
+# table, the counter names a row contributes to; the admin page reads the
+# handful of counter rows instead of aggregating whole tables.
+COUNTER_KEYS = {
+    'user': lambda row: ['users', f'users.{row.user_type}'],
+    'product': lambda row: ['products'] + (['products.in_stock'] if row.in_stock else []),
+    'pest_prediction': lambda row: ['pest_predictions', f'pest_predictions.{row.pest_type}'],
+    'farm_inventory': lambda row: ['farm_inventory'],
+    'order': lambda row: ['orders', f"orders.{row.status or 'none'}"],
+}
+
+# The same counters as SQL aggregates, used to (re)build the table
+COUNTER_QUERIES = [
+    "SELECT 'users', count(*) FROM user",
+    "SELECT 'users.' || user_type, count(*) FROM user GROUP BY user_type",
+    "SELECT 'products', count(*) FROM product",
+    "SELECT 'products.in_stock', count(*) FROM product WHERE in_stock",
+    "SELECT 'pest_predictions', count(*) FROM pest_prediction",
+    "SELECT 'pest_predictions.' || pest_type, count(*) FROM pest_prediction GROUP BY pest_type",
+    "SELECT 'farm_inventory', count(*) FROM farm_inventory",
+    "SELECT 'orders', count(*) FROM \"order\"",
+    "SELECT 'orders.' || coalesce(status, 'none'), count(*) FROM \"order\" GROUP BY status",
+]
+
+
+def previous_state(target):
+    """The committed column values of an ORM object being updated."""
+    state = inspect(target)
+    values = {}
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        values[attr.key] = history.deleted[0] if history.deleted else getattr(target, attr.key)
+    return SimpleNamespace(**values)
+
+
+def counter_changes(table_name, before=None, after=None):
+    """Counter deltas for a row going from `before` to `after` (None for insert/delete)."""
+    keys = COUNTER_KEYS.get(table_name)
+    changes = Counter()
+    if keys is None:
+        return changes
+    if before is not None:
+        changes.subtract(keys(before))
+    if after is not None:
+        changes.update(keys(after))
+    return Counter({name: delta for name, delta in changes.items() if delta})
+
+
+def apply_counter_changes(connection, counter_table, changes):
+    # Runs on the flush connection, so counters commit or roll back with the row
+    for name, delta in changes.items():
+        updated = connection.execute(
+            counter_table.update()
+            .where(counter_table.c.name == name)
+            .values(value=counter_table.c.value + delta)
+        )
+        if updated.rowcount == 0:
+            connection.execute(counter_table.insert().values(name=name, value=delta))
+
+
+def rebuild_counters(connection, counter_table):
+    """Recompute every counter from the tables, e.g. after bulk imports that bypass the ORM."""
+    connection.execute(counter_table.delete())
+    rows = [
+        {'name': name, 'value': value}
+        for query in COUNTER_QUERIES
+        for name, value in connection.execute(text(query))
+        if name is not None
+    ]
+    if rows:
+        connection.execute(counter_table.insert(), rows)
+    return len(rows)
+
+
+def read_counters(session, counter_model):
+    return dict(session.execute(select(counter_model.name, counter_model.value)).all())
+
+
+def summary(counters, top=5):
+    """Dashboard figures from the counter rows, with the most reported pests."""
+    def prefixed(prefix):
+        return {
+            name[len(prefix):]: value for name, value in counters.items()
+            if name.startswith(prefix) and value
+        }
+
+    pests = sorted(prefixed('pest_predictions.').items(), key=lambda item: (-item[1], item[0]))
+    return {
+        'users': counters.get('users', 0),
+        'users_by_type': prefixed('users.'),
+        'products': counters.get('products', 0),
+        'products_in_stock': counters.get('products.in_stock', 0),
+        'pest_predictions': counters.get('pest_predictions', 0),
+        'top_pests': pests[:top],
+        'farm_inventory': counters.get('farm_inventory', 0),
+        'orders': counters.get('orders', 0),
+        'orders_by_status': prefixed('orders.'),
+    }
+
+
+def keyset_page(session, statement, column, cursor=None, limit=ADMIN_PAGE_SIZE, descending=False):
+    """
+    One page of `statement` ordered by a unique column, starting after the
+    cursor. Returns (rows, next_cursor) like product_listing.product_page.
+    """
+    if cursor:
+        last, _ = decode_cursor(cursor)
+        statement = statement.where(column < last if descending else column > last)
+    statement = statement.order_by(column.desc() if descending else column).limit(limit + 1)
+    rows = session.scalars(statement).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(getattr(rows[-1], column.key), rows[-1].id)
+    return rows, next_cursor
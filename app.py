@@ -1,25 +1,63 @@
-from flask import Flask,render_template,redirect, flash, jsonify, request, url_for, send_from_directory, session
+from flask import Flask,render_template,redirect, flash, jsonify, request, url_for, send_from_directory, session, stream_with_context, has_app_context, g, abort
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import joinedload, make_transient_to_detached
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import LoginManager, login_required, current_user
 import os
 from pest_prediction import PestDetector
+from model_registry import models
+from pest_batching import BatchingPredictor, PredictorClosed
+from pest_jobs import PestJobManager
+from prediction_cache import PredictionCache, image_hash
+from warehouse_artifacts import WarehouseArtifactManager
+from warehouse_prediction import predict_significant_warehouses
+from geo import DISTRICTS, SORTED_DISTRICTS
+from road_network import load_road_network
+from logistics import AVG_SPEED, check_orders, delivery_costs, quote_deliveries
+from route_planner import plan_routes
+from product_listing import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SORTS, product_json, product_page, sort_key
+from product_search import RELEVANCE, SEARCH_TABLE, product_search, search_terms
+from pest_rollups import PERIODS, apply_rollup_changes, compact_rollups, outbreak_heatmap, outbreak_trends, rollup_changes
+from admin_stats import ADMIN_PAGE_SIZE, apply_counter_changes, counter_changes, keyset_page, previous_state, read_counters, rebuild_counters, summary
+from response_cache import ResponseCache, TTLCache
+from upload_storage import UploadStorage, UploadTooLarge
+from auth_service import DEFAULT_METHOD, AuthBusy, AuthService, LoginRateLimiter
+from image_variants import WIDTHS, ImageVariants
+from markupsafe import Markup
+from PIL import Image
+from remedy_catalog import CsvRemedySource, QueryRemedySource, RemedyCatalog, DEFAULT_CROP, NO_REMEDY, remedy_version, VERSION_TABLE as REMEDY_VERSION_TABLE
 from flask_migrate import Migrate
 from functools import wraps
-from datetime import datetime
-import pickle
+from datetime import datetime, timedelta
 import pandas as pd
-from haversine import haversine, Unit
-import csv
+import json
+import zipfile
+import io
+import math
+import threading
+import time
+import click
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///data.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///data.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.secret_key = 'your_very_secret_and_random_key_here'
 db = SQLAlchemy(app)
 
-migrate = Migrate(app, db)
+def is_app_database(connection):
+    # Write hooks that keep the search index, dashboard counters and pest
+    # rollups current apply only to the app's own database; other engines
+    # (scripts, benchmarks) are skipped
+    return has_app_context() and connection.engine is db.engine
+
+def include_in_migrations(name, type_, parent_names):
+    # The search index tables and the remedy change counter are managed by
+    # product_search and remedy_catalog, not by models
+    return not (type_ == 'table' and (name.startswith(SEARCH_TABLE) or name == REMEDY_VERSION_TABLE))
+
+migrate = Migrate(app, db, include_name=include_in_migrations)
 
 
 class Product(db.Model):
@@ -31,6 +69,12 @@ class Product(db.Model):
     image_url = db.Column(db.String(200), nullable=True)
     in_stock = db.Column(db.Boolean, default=True)
 
+    # Marketplace sorts; id breaks ties so each index gives a total order
+    __table_args__ = (
+        db.Index('ix_product_price_id', 'price', 'id'),
+        db.Index('ix_product_rating_id', 'rating', 'id'),
+    )
+
     def __repr__(self)->str:
         return f"{self.name}-{self.price}{self.in_stock}"
 
@@ -39,13 +83,26 @@ class PestPrediction(db.Model):
     image_path = db.Column(db.String(255), nullable=False)
     pest_type = db.Column(db.String(100), nullable=False)
     confidence_score = db.Column(db.Float, nullable=False)
-    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     location = db.Column(db.String(100), nullable=True)
     farmer_id = db.Column(db.Integer, nullable=True)
+    image_hash = db.Column(db.String(64), nullable=True, index=True)
+    model_version = db.Column(db.String(64), nullable=True)
 
     def __repr__(self):
         return f"Prediction({self.pest_type} - {self.confidence_score}%)"
 
+class PestRemedy(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    crop = db.Column(db.String(50), nullable=False, default=DEFAULT_CROP)
+    pest_name = db.Column(db.String(100), nullable=False)
+    remedy = db.Column(db.Text, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('crop', 'pest_name'),)
+
+    def __repr__(self):
+        return f"PestRemedy({self.crop} - {self.pest_name})"
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -58,8 +115,15 @@ class User(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     profile_pic = db.Column(db.String(255), default='default.jpg')  # Store image filename
 
+    # Serves the login lookup (user_type + username) and the admin's farmer list (user_type)
+    __table_args__ = (db.Index('ix_user_user_type_username', 'user_type', 'username'),)
+
+    # Read-only, for loading a dashboard together with its user (see dashboard_user)
+    inventories = db.relationship('FarmInventory', viewonly=True)
+    orders = db.relationship('Order', viewonly=True)
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'])
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -67,7 +131,7 @@ class User(db.Model):
 
 class FarmInventory(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    farmer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    farmer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     crop_name = db.Column(db.String(100), nullable=False)
     quantity = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(20), nullable=False)
@@ -79,61 +143,203 @@ class Order(db.Model):
     total_amount = db.Column(db.Float, nullable=False)
     order_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='pending')
+    delivery_district = db.Column(db.String(100), nullable=True)
+    weight = db.Column(db.Float, nullable=True)
+
+    __table_args__ = (
+        # Customer dashboard: a customer's orders, newest first
+        db.Index('ix_order_customer_id_order_date', 'customer_id', 'order_date'),
+        # Route planning: pending orders with a delivery district
+        db.Index('ix_order_status_delivery_district', 'status', 'delivery_district'),
+    )
+
+class DashboardCounter(db.Model):
+    # Summary counts for the admin dashboard, kept current on every write (see admin_stats)
+    name = db.Column(db.String(150), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class PestRollup(db.Model):
+    # Pest report counts per day/week bucket, pest and location (see pest_rollups)
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), nullable=False)
+    bucket_start = db.Column(db.Date, nullable=False)
+    pest_type = db.Column(db.String(100), nullable=False)
+    location = db.Column(db.String(100), nullable=False, default='')
+    prediction_count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0.0)
+
+    # Trends and heatmaps read a period's buckets in a date range
+    __table_args__ = (
+        db.UniqueConstraint('period', 'bucket_start', 'pest_type', 'location',
+                            name='uq_pest_rollup_bucket'),
+    )
 
 UPLOAD_FOLDER = 'static/uploads'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg','csv'}
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+app.config['PEST_MODEL_PATH'] = os.environ.get('PEST_MODEL_PATH', 'best_model.pth')
+app.config['PEST_BACKEND'] = os.environ.get('PEST_BACKEND', 'eager')
+app.config['PEST_CACHE_SIZE'] = int(os.environ.get('PEST_CACHE_SIZE', 1024))
+app.config['PEST_BATCH_MAX_SIZE'] = int(os.environ.get('PEST_BATCH_MAX_SIZE', 16))
+app.config['PEST_BATCH_MAX_WAIT_MS'] = float(os.environ.get('PEST_BATCH_MAX_WAIT_MS', 15))
+app.config['PEST_PREPROCESS_WORKERS'] = int(os.environ.get('PEST_PREPROCESS_WORKERS', 4))
+app.config['UPLOAD_MAX_BYTES'] = int(os.environ.get('UPLOAD_MAX_BYTES', 16 * 1024 * 1024))
+app.config['UPLOAD_WORKERS'] = int(os.environ.get('UPLOAD_WORKERS', 2))
+app.config['UPLOAD_CACHE_MAX_AGE'] = int(os.environ.get('UPLOAD_CACHE_MAX_AGE', 365 * 24 * 3600))
+app.config['IMAGE_VARIANT_WIDTHS'] = [
+    int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', ','.join(map(str, WIDTHS))).split(',')
+]
+app.config['IMAGE_VARIANT_QUALITY'] = int(os.environ.get('IMAGE_VARIANT_QUALITY', 80))
+
+# Uploads are stored once per distinct content under sharded, hash-named
+# paths; writes and resized variants happen on the storage's own worker threads
+upload_storage = UploadStorage(
+    UPLOAD_FOLDER,
+    max_bytes=app.config['UPLOAD_MAX_BYTES'],
+    workers=app.config['UPLOAD_WORKERS']
+)
+image_variants = ImageVariants(
+    upload_storage,
+    widths=app.config['IMAGE_VARIANT_WIDTHS'],
+    quality=app.config['IMAGE_VARIANT_QUALITY']
+)
+upload_storage.on_stored(image_variants.build_all)
+
+def upload_name(path):
+    # Accepts a storage name, 'uploads/<name>' or a saved 'static/uploads/<name>' path
+    name = path.replace(os.sep, '/')
+    for prefix in ('static/', 'uploads/'):
+        if name.startswith(prefix):
+            name = name[len(prefix):]
+    return name
+
+@app.template_global()
+def upload_url(path, width=None):
+    """URL of an uploaded image, resized to `width` pixels when a variant exists."""
+    name = upload_name(path)
+    if width and image_variants.applies_to(name):
+        return url_for('serve_upload', filename=name, w=width)
+    return url_for('serve_upload', filename=name)
+
+@app.template_global()
+def upload_srcset(path):
+    name = upload_name(path)
+    if not image_variants.applies_to(name):
+        return ''
+    return ', '.join(f"{upload_url(name, width)} {width}w" for width in image_variants.widths)
+
+# Models are built once per process and shared by every request
+models.register('pest_detector', lambda: PestDetector(
+    app.config['PEST_MODEL_PATH'],
+    backend=app.config['PEST_BACKEND']
+))
+models.register('pest_batcher', lambda: BatchingPredictor(
+    models.get('pest_detector'),
+    max_batch_size=app.config['PEST_BATCH_MAX_SIZE'],
+    max_wait_ms=app.config['PEST_BATCH_MAX_WAIT_MS'],
+    preprocess_workers=app.config['PEST_PREPROCESS_WORKERS']
+))
+if os.environ.get('PRELOAD_MODELS') == '1':
+    models.preload('pest_detector', 'pest_batcher')
+
+# Rendered pages for anonymous visitors and the marketplace product grid are
+# cached in memory; Product writes drop the grid fragments (see below). Both
+# caches are per process, so other gunicorn workers can show a changed
+# product for up to FRAGMENT_CACHE_TTL seconds; the cached pages hold no
+# database content at all
+app.config['RESPONSE_CACHE_SIZE'] = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+app.config['RESPONSE_CACHE_TTL'] = float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+app.config['FRAGMENT_CACHE_SIZE'] = int(os.environ.get('FRAGMENT_CACHE_SIZE', 512))
+app.config['FRAGMENT_CACHE_TTL'] = float(os.environ.get('FRAGMENT_CACHE_TTL', 60))
+response_cache = ResponseCache(app.config['RESPONSE_CACHE_SIZE'], app.config['RESPONSE_CACHE_TTL'])
+fragment_cache = TTLCache(app.config['FRAGMENT_CACHE_SIZE'], app.config['FRAGMENT_CACHE_TTL'])
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def get_pest_remedy(pest_type):
+def fetch_remedy_rows():
+    with app.app_context():
+        return [(r.crop, r.pest_name, r.remedy) for r in PestRemedy.query.all()]
+
+def fetch_remedy_version():
+    with app.app_context():
+        with db.engine.begin() as connection:
+            return remedy_version(connection)
+
+# Remedies are indexed in memory once and reloaded only when the source changes
+app.config['REMEDY_SOURCE'] = os.environ.get('REMEDY_SOURCE', 'csv')
+app.config['REMEDY_CSV'] = os.environ.get('REMEDY_CSV', 'pest_remedy.csv')
+if app.config['REMEDY_SOURCE'] == 'db':
+    remedy_source = QueryRemedySource(fetch_remedy_rows, fetch_remedy_version)
+else:
+    remedy_source = CsvRemedySource(app.config['REMEDY_CSV'])
+remedy_catalog = RemedyCatalog(remedy_source)
+
+@event.listens_for(db.session, 'after_flush')
+def track_remedy_changes(session, flush_context):
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, PestRemedy) for obj in changed):
+        session.info['remedies_changed'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def reload_remedies(session):
+    # Only reload once the rows are committed and visible to other sessions
+    if session.info.pop('remedies_changed', False) and isinstance(remedy_source, QueryRemedySource):
+        remedy_source.touch()
+        remedy_catalog.invalidate()
+
+def get_pest_remedy(pest_type, crop=DEFAULT_CROP):
     """
-    Lookup remedy for a specific pest type from the CSV file
+    Lookup remedy for a specific pest type from the remedy catalog
     """
-    remedy_file_path = 'pest_remedy.csv'
-    
-    try:
-        with open(remedy_file_path, 'r') as csvfile:
-            csv_reader = csv.DictReader(csvfile)
-            for row in csv_reader:
-                if row['pestname'].lower() == pest_type.lower():
-                    return row['remedy']
-    except Exception as e:
-        print(f"Error reading remedy CSV: {e}")
-    
-    return "No specific remedy found for this pest."
+    return remedy_catalog.lookup(pest_type, crop) or NO_REMEDY
+
+@app.cli.command('import-remedies')
+def import_remedies():
+    """Copy pest_remedy.csv into the pest_remedy table."""
+    count = 0
+    for crop, pest_name, remedy in CsvRemedySource(app.config['REMEDY_CSV']).rows():
+        row = PestRemedy.query.filter_by(crop=crop, pest_name=pest_name).first()
+        if row is None:
+            row = PestRemedy(crop=crop, pest_name=pest_name)
+            db.session.add(row)
+        row.remedy = remedy
+        count += 1
+    db.session.commit()
+    print(f"Imported {count} remedies")
+
+CROP_OPTIONS = [
+    {
+        'name': 'Jute',
+        'image': 'static/images/jute-crop.jpg',
+        'description': 'Pest Detection for Jute Crops',
+        'active': True
+    },
+    {
+        'name': 'Rice',
+        'image': 'static/images/rice-crop.jpg',
+        'description': 'Coming Soon',
+        'active': False
+    },
+    {
+        'name': 'Wheat',
+        'image': 'static/images/wheat-crop.jpg',
+        'description': 'Coming Soon',
+        'active': False
+    },
+    {
+        'name': 'Maize',
+        'image': 'static/images/maize-crop.jpg',
+        'description': 'Coming Soon',
+        'active': False
+    }
+]
 
 @app.route('/crop_pest_selection')
+@response_cache.page()
 def crop_pest_selection():
-    crops = [
-        {
-            'name': 'Jute',
-            'image': 'static/images/jute-crop.jpg',
-            'description': 'Pest Detection for Jute Crops',
-            'active': True
-        },
-        {
-            'name': 'Rice',
-            'image': 'static/images/rice-crop.jpg',
-            'description': 'Coming Soon',
-            'active': False
-        },
-        {
-            'name': 'Wheat',
-            'image': 'static/images/wheat-crop.jpg',
-            'description': 'Coming Soon',
-            'active': False
-        },
-        {
-            'name': 'Maize',
-            'image': 'static/images/maize-crop.jpg',
-            'description': 'Coming Soon',
-            'active': False
-        }
-    ]
-    return render_template("crop_pest_selection.html", crops=crops)
+    return render_template("crop_pest_selection.html", crops=CROP_OPTIONS)
 
 def login_required(user_types=None):
     def decorator(f):
@@ -163,21 +369,29 @@ def upload_file():
         return redirect(url_for('pest'))
     
     if file and allowed_file(file.filename):
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-
-        detector = PestDetector()
-        prediction = detector.predict(filepath)
+        try:
+            image_bytes = upload_storage.read(file.stream)
+        except UploadTooLarge as e:
+            flash(str(e))
+            return redirect(url_for('pest'))
 
-        remedy = get_pest_remedy(prediction['pest_type'])
+        # Predict straight from the uploaded bytes; the copy on disk is only
+        # kept so the result page can show the photo
+        prediction = predict_image(image_bytes, file.filename.rsplit('.', 1)[1])
+        remedy = prediction['remedy']
 
-        relative_filepath = os.path.join('uploads', filename)
+        relative_filepath = os.path.relpath(prediction['image_path'], 'static')
         
+        # The reporting farmer's location feeds the outbreak heatmap
+        user = current_user_row()
         new_prediction = PestPrediction(
-            image_path=filepath,
+            image_path=prediction['image_path'],
             pest_type=prediction['pest_type'],
-            confidence_score=prediction['confidence']
+            confidence_score=prediction['confidence'],
+            location=user.location if user else None,
+            farmer_id=user.id if user else None,
+            image_hash=prediction['image_hash'],
+            model_version=prediction['model_version']
         )
         db.session.add(new_prediction)
         db.session.commit()
@@ -186,9 +400,338 @@ def upload_file():
 
     return redirect(url_for('pest'))
 
-@app.route('/static/uploads/<filename>')
+def stored_prediction(image_hash, model_version):
+    # Also called from bulk job threads, which run outside any request
+    with app.app_context():
+        row = PestPrediction.query.filter_by(
+            image_hash=image_hash, model_version=model_version
+        ).order_by(PestPrediction.id.desc()).first()
+        if row is None or not os.path.exists(row.image_path):
+            return None
+        return {
+            'pest_type': row.pest_type,
+            'confidence': row.confidence_score,
+            'remedy': get_pest_remedy(row.pest_type),
+            'image_path': row.image_path,
+            'image_hash': image_hash,
+            'model_version': model_version
+        }
+
+def reload_pest_models():
+    # best_model.pth changed on disk: the next prediction builds a new
+    # detector, while the old batcher drains its queue in the background
+    models.retire('pest_batcher', 'pest_detector')
+
+prediction_cache = PredictionCache(
+    app.config['PEST_MODEL_PATH'],
+    tag=app.config['PEST_BACKEND'],
+    max_entries=app.config['PEST_CACHE_SIZE'],
+    disk_lookup=stored_prediction,
+    on_invalidate=reload_pest_models
+)
+
+def predict_image(image_bytes, extension=None, image_path=None):
+    """
+    Predict the pest in an image, reusing the stored result when the same
+    bytes were already classified by the current model. On a cache hit
+    nothing is written and image_path points at the earlier copy, unless
+    that copy's background write failed, in which case these bytes are
+    stored again.
+
+    A new upload (no image_path yet) is handed to upload_storage, which
+    writes it in the background while the model runs.
+    """
+    key = image_hash(image_bytes)
+    cached = prediction_cache.get(key)
+    if cached is not None:
+        if image_path is None and not os.path.exists(cached['image_path']):
+            # Still being written (save_bytes dedups it), or the write failed
+            cached = dict(cached, image_path=upload_storage.save_bytes(image_bytes, extension, digest=key).path)
+        return dict(cached)
+
+    model_version = prediction_cache.version
+    if image_path is None:
+        image_path = upload_storage.save_bytes(image_bytes, extension, digest=key).path
+    try:
+        prediction = models.get('pest_batcher').predict(image_bytes)
+    except PredictorClosed:
+        # The model was reloaded between get() and predict()
+        prediction = models.get('pest_batcher').predict(image_bytes)
+
+    result = dict(
+        prediction,
+        remedy=get_pest_remedy(prediction['pest_type']),
+        image_path=image_path,
+        image_hash=key,
+        model_version=model_version
+    )
+    prediction_cache.put(key, result)
+    return dict(result)
+
+def predict_with_remedy(image_path):
+    with open(image_path, 'rb') as f:
+        return predict_image(f.read(), image_path=image_path)
+
+def save_bulk_predictions(results, farmer_id=None):
+    with app.app_context():
+        farmer = db.session.get(User, farmer_id) if farmer_id else None
+        db.session.add_all([
+            PestPrediction(
+                image_path=result['image_path'],
+                pest_type=result['pest_type'],
+                confidence_score=result['confidence'],
+                location=farmer.location if farmer else None,
+                farmer_id=farmer_id,
+                image_hash=result['image_hash'],
+                model_version=result['model_version']
+            )
+            for result in results
+        ])
+        db.session.commit()
+
+app.config['PEST_BULK_MAX_IMAGES'] = int(os.environ.get('PEST_BULK_MAX_IMAGES', 1000))
+pest_jobs = PestJobManager(
+    predict_with_remedy,
+    save_bulk_predictions,
+    max_workers=int(os.environ.get('PEST_BULK_WORKERS', 4)),
+    commit_every=int(os.environ.get('PEST_BULK_COMMIT_EVERY', 25))
+)
+
+def save_bulk_images(files):
+    """
+    Save every image from the uploaded files (and any zip archives among
+    them) into upload_storage. Images over the size limit are skipped.
+    Returns a list of (original_name, saved_path).
+    """
+    saved = []
+
+    def save_stream(name, stream):
+        filename = secure_filename(os.path.basename(name))
+        if not filename or not allowed_file(filename) or filename.endswith('.csv'):
+            return
+        try:
+            stored = upload_storage.save_stream(stream, filename.rsplit('.', 1)[1])
+        except UploadTooLarge:
+            return
+        saved.append((name, stored.path))
+
+    limit = app.config['PEST_BULK_MAX_IMAGES']
+    for file in files:
+        if file.filename.lower().endswith('.zip'):
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    if len(saved) >= limit:
+                        break
+                    if not member.is_dir():
+                        with archive.open(member) as stream:
+                            save_stream(member.filename, stream)
+        elif len(saved) < limit:
+            save_stream(file.filename, file.stream)
+    return saved
+
+@app.route('/api/pest/bulk', methods=['POST'])
+def bulk_upload():
+    files = [f for f in request.files.getlist('pestImages') if f.filename]
+    if not files:
+        return jsonify({'error': 'No files uploaded, send images or a zip archive as pestImages'}), 400
+
+    try:
+        images = save_bulk_images(files)
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'Invalid zip archive'}), 400
+    if not images:
+        return jsonify({'error': 'No images found in upload'}), 400
+
+    job = pest_jobs.submit(images, farmer_id=session.get('user_id'))
+    return jsonify({
+        'job_id': job.id,
+        'total': len(images),
+        'status_url': url_for('bulk_status', job_id=job.id),
+        'results_url': url_for('bulk_results', job_id=job.id)
+    }), 202
+
+@app.route('/api/pest/jobs/<job_id>')
+def bulk_status(job_id):
+    job = pest_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict(offset=request.args.get('offset', 0, type=int)))
+
+@app.route('/api/pest/jobs/<job_id>/results')
+def bulk_results(job_id):
+    job = pest_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    def generate():
+        for result in job.iter_results():
+            yield json.dumps(result) + '\n'
+
+    return app.response_class(generate(), mimetype='application/x-ndjson')
+
+# Outbreak rollups are updated as predictions are written; with
+# PEST_ROLLUP_ON_WRITE=0 a periodic `flask compact-pest-rollups` keeps them current
+app.config['PEST_ROLLUP_ON_WRITE'] = os.environ.get('PEST_ROLLUP_ON_WRITE', '1') == '1'
+app.config['PEST_TREND_DAYS'] = int(os.environ.get('PEST_TREND_DAYS', 90))
+
+def rolls_up_pests(connection):
+    return app.config['PEST_ROLLUP_ON_WRITE'] and is_app_database(connection)
+
+@event.listens_for(PestPrediction, 'after_insert')
+def roll_up_prediction(mapper, connection, target):
+    if rolls_up_pests(connection):
+        apply_rollup_changes(connection, PestRollup.__table__, rollup_changes(after=target))
+
+@event.listens_for(PestPrediction, 'after_update')
+def roll_up_prediction_change(mapper, connection, target):
+    if rolls_up_pests(connection):
+        changes = rollup_changes(previous_state(target), target)
+        apply_rollup_changes(connection, PestRollup.__table__, changes)
+
+@event.listens_for(PestPrediction, 'after_delete')
+def roll_back_prediction(mapper, connection, target):
+    if rolls_up_pests(connection):
+        apply_rollup_changes(connection, PestRollup.__table__, rollup_changes(before=target))
+
+@app.cli.command('compact-pest-rollups')
+@click.option('--days', type=int, default=None, help='Only recompute buckets from the last N days.')
+def compact_pest_rollups(days):
+    """Recompute the pest outbreak rollups from the prediction table."""
+    since = datetime.utcnow().date() - timedelta(days=days) if days is not None else None
+    with db.engine.begin() as connection:
+        written = compact_rollups(connection, PestRollup.__table__, PestPrediction.__table__, since)
+    print(f"Wrote {written} pest rollup rows")
+
+def outbreak_window(args):
+    """Rollup period and date window from query parameters; raises ValueError for bad input."""
+    period = args.get('period', 'day')
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+    try:
+        until = datetime.strptime(args['until'], '%Y-%m-%d').date() if args.get('until') else None
+        since = datetime.strptime(args['since'], '%Y-%m-%d').date() if args.get('since') else None
+    except ValueError:
+        raise ValueError('since and until must be dates as YYYY-MM-DD')
+    if since is None:
+        since = (until or datetime.utcnow().date()) - timedelta(days=app.config['PEST_TREND_DAYS'])
+    return period, {
+        'since': since,
+        'until': until,
+        'pest_type': args.get('pest') or None,
+        'location': args.get('location'),
+    }
+
+@app.route('/api/pest/trends')
+def pest_trends():
+    """Reports per pest and day/week bucket, from the rollup table."""
+    try:
+        period, window = outbreak_window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'period': period,
+        'since': window['since'].isoformat(),
+        'trends': outbreak_trends(db.session, PestRollup, period, **window),
+    })
+
+@app.route('/api/pest/heatmap')
+def pest_heatmap():
+    """Reports per location and pest over a window, with district coordinates when known."""
+    try:
+        period, window = outbreak_window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    cells = outbreak_heatmap(db.session, PestRollup, period, **window)
+    for cell in cells:
+        known = cell['location'] in DISTRICTS
+        cell['lat'], cell['lng'] = DISTRICTS.location(cell['location']) if known else (None, None)
+    return jsonify({'period': period, 'since': window['since'].isoformat(), 'cells': cells})
+
+@app.route('/api/cache')
+def cache_status():
+    return jsonify({
+        'responses': response_cache.stats(),
+        'fragments': fragment_cache.stats(),
+        'uploads': upload_storage.stats(),
+        'image_variants': image_variants.stats()
+    })
+
+@app.route('/api/models')
+def model_status():
+    stats = models.stats()
+    if models.is_loaded('pest_batcher'):
+        stats['batching'] = models.get('pest_batcher').stats()
+    if models.is_loaded('pest_detector'):
+        stats['preprocessing'] = models.get('pest_detector').preprocess_stats.to_dict()
+    stats['prediction_cache'] = prediction_cache.stats()
+    stats['warehouse_artifacts'] = warehouse_artifacts.stats()
+    return jsonify(stats)
+
+# Set once this process has run a prediction end to end (see serving.py)
+ready = threading.Event()
+warm_up_state = {'error': None, 'seconds': None}
+
+def warm_up():
+    """Load and exercise the models once, so no visitor pays for the first prediction."""
+    started = time.perf_counter()
+    try:
+        image = io.BytesIO()
+        Image.new('RGB', (256, 256)).save(image, 'JPEG')
+        models.get('pest_batcher').predict(image.getvalue())
+        warehouse_artifacts.current()
+    except Exception as e:
+        warm_up_state['error'] = str(e)
+        return
+    warm_up_state['seconds'] = round(time.perf_counter() - started, 3)
+    ready.set()
+
+def start_warm_up():
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+
+@app.route('/healthz')
+def health():
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+@app.route('/readyz')
+def readiness():
+    return jsonify({
+        'ready': ready.is_set(),
+        'pid': os.getpid(),
+        'warm_up_seconds': warm_up_state['seconds'],
+        'error': warm_up_state['error'],
+        'models': {name: models.is_loaded(name) for name in ('pest_detector', 'pest_batcher')},
+        'warehouse_artifacts': warehouse_artifacts.stats().get('loaded', False)
+    }), 200 if ready.is_set() else 503
+
+@app.route('/static/uploads/<path:filename>')
 def serve_upload(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    if not upload_storage.is_stored_name(filename):
+        # Older flat uploads and default.jpg can be replaced, so revalidate them
+        return send_from_directory(app.config['UPLOAD_FOLDER'], filename, max_age=0)
+
+    # A hash-named file never changes: let browsers keep it for good, and
+    # answer revalidations from ETag/Last-Modified with a 304
+    if not upload_storage.wait(filename, timeout=10):
+        # Never stored, or its background write failed (logged by upload_storage)
+        abort(404)
+    width = request.args.get('w', type=int)
+    negotiated = bool(width) and image_variants.applies_to(filename)
+    if negotiated:
+        # WebP only for browsers that name it; others get the JPEG variant
+        accepts_webp = any(mimetype == 'image/webp' for mimetype, _ in request.accept_mimetypes)
+        try:
+            filename = image_variants.get(filename, width, 'webp' if accepts_webp else 'jpeg')
+        except OSError:
+            negotiated = False
+    response = send_from_directory(
+        app.config['UPLOAD_FOLDER'], filename,
+        max_age=app.config['UPLOAD_CACHE_MAX_AGE'], conditional=True
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    if negotiated:
+        response.vary.add('Accept')
+    return response
 
 @app.route('/update_settings', methods=['GET', 'POST'])
 def update_settings():
@@ -203,45 +746,97 @@ def update_settings():
         # Redirect to the user profile after successful update
         return redirect(url_for('profile'))  # Replace 'profile' with the name of the profile route
     return render_template('update_settings.html')
-has_run_before = False
-
-@app.before_request
-def before_request():
-    global has_run_before
-    if not has_run_before:
-        db.create_all()  
-        has_run_before = True 
+def setup_database():
+    """
+    Create any missing tables. The dashboard counters and pest rollups are
+    only kept current by deltas on later writes, so when their tables are
+    new or empty they are first filled from the rows already present.
+    """
+    db.create_all()
+    with db.engine.begin() as connection:
+        def is_empty(table):
+            return connection.execute(db.select(db.func.count()).select_from(table)).scalar() == 0
+
+        if is_empty(DashboardCounter.__table__):
+            rebuild_counters(connection, DashboardCounter.__table__)
+        if is_empty(PestRollup.__table__):
+            compact_rollups(connection, PestRollup.__table__, PestPrediction.__table__)
+
+@app.cli.command('init-db')
+def init_db():
+    """Create any missing tables for a fresh database; use `flask db upgrade` for existing ones."""
+    setup_database()
+    print("Database tables created")
 
 @app.route('/')
+@response_cache.page()
 def Home():
     return render_template("home.html",title="Home")
 
 @app.route('/features')
+@response_cache.page()
 def features():
     return render_template("features.html",title="features")
 
 @app.route('/research_data')
+@response_cache.page()
 def research_data():
     return render_template("frontpage.html",title="research_data")
 
 @app.route('/student_zone')
+@response_cache.page()
 def student_zone():
     return render_template("student.html",title="student_zone")
 
 @app.route('/contact')
+@response_cache.page()
 def contact():
     return render_template("contact.html",title="contact")
 
+# Password hashes are computed in worker processes; changing the method
+# (e.g. a higher iteration count) upgrades each user's hash at next login.
+# The login limit is counted per process, so with N gunicorn workers a
+# username gets up to N x LOGIN_MAX_ATTEMPTS tries per window
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+auth = AuthService(
+    method=app.config['PASSWORD_HASH_METHOD'],
+    workers=int(os.environ.get('AUTH_WORKERS', 2)),
+    max_pending=int(os.environ.get('AUTH_MAX_PENDING', 32)),
+    limiter=LoginRateLimiter(
+        max_attempts=int(os.environ.get('LOGIN_MAX_ATTEMPTS', 5)),
+        window=float(os.environ.get('LOGIN_WINDOW_SECONDS', 300))
+    )
+)
+
+@app.route('/api/auth')
+def auth_status():
+    return jsonify(auth.stats())
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
         user_type = request.form['user_type']
-        
+
+        if not auth.allow(username):
+            flash('Too many login attempts, please try again in a few minutes')
+            return render_template('login.html', title='Login'), 429
+
+        # Served by ix_user_user_type_username
         user = User.query.filter_by(username=username, user_type=user_type).first()
-        
-        if user and user.check_password(password):
+
+        try:
+            verified, new_hash = auth.verify(user.password_hash, password) if user else (False, None)
+        except AuthBusy:
+            flash('Login is busy right now, please try again')
+            return render_template('login.html', title='Login'), 503
+
+        if verified:
+            auth.succeeded(username)
+            if new_hash is not None:
+                user.password_hash = new_hash
+                db.session.commit()
             session['user_id'] = user.id
             session['user_type'] = user.user_type
             
@@ -269,9 +864,12 @@ def register():
         if 'profile_pic' in request.files:
             file = request.files['profile_pic']
             if file and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(file_path)
+                try:
+                    stored = upload_storage.save_stream(file.stream, file.filename.rsplit('.', 1)[1])
+                except UploadTooLarge as e:
+                    flash(str(e))
+                    return redirect(url_for('register'))
+                filename = stored.name
             else:
                 filename = 'default.jpg'  # Default profile picture
         else:
@@ -287,8 +885,12 @@ def register():
             profile_pic=filename
         )
 
-        # Hash and store the password
-        new_user.set_password(password)  # Securely hash password before storing
+        # Hash and store the password, off the request thread
+        try:
+            new_user.password_hash = auth.hash_password(password)
+        except AuthBusy:
+            flash('Registration is busy right now, please try again')
+            return redirect(url_for('register'))
 
         # Save user to database
         db.session.add(new_user)
@@ -303,10 +905,74 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
 
-# User loader function (modify as per your database)
+# Logged-in users are cached per process for a few seconds, and per request
+# in flask.g; commits that touch a User drop its cached copy. That only
+# reaches the committing process: a change made by another gunicorn worker
+# or `flask shell` (profile edits, a deleted account) shows up here within
+# USER_CACHE_TTL seconds, so keep it short. Role checks in login_required go
+# by session['user_type'], set at login, and never read this cache
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 1024))
+app.config['USER_CACHE_TTL'] = float(os.environ.get('USER_CACHE_TTL', 5))
+user_cache = TTLCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+USER_COLUMNS = [column.key for column in inspect(User).column_attrs]
+
+def cache_user(user):
+    user_cache.set(user.id, {key: getattr(user, key) for key in USER_COLUMNS}, tags=(f'user:{user.id}',))
+
+def cached_user(user_id, *options):
+    """
+    The User with this id, attached to the current session. A cached copy
+    is merged in without a query; on a miss the row is loaded (with any
+    loader options) and cached.
+    """
+    values = user_cache.get(user_id)
+    if values is None:
+        user = db.session.scalars(
+            db.select(User).options(*options).where(User.id == user_id)
+        ).unique().first()
+        if user is not None:
+            cache_user(user)
+        return user
+    user = User(**values)
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+def current_user_row(*options):
+    """The logged-in User, looked up at most once per request."""
+    if 'user_id' not in session:
+        return None
+    if 'current_user_row' not in g:
+        g.current_user_row = cached_user(session['user_id'], *options)
+    return g.current_user_row
+
+def dashboard_user(collection):
+    """
+    The logged-in User and its `collection` (User.inventories or
+    User.orders) in one query: the user joined to the collection on a
+    cache miss, only the collection on a hit.
+    """
+    user = current_user_row(joinedload(collection))
+    return user, getattr(user, collection.key) if user else []
+
+@event.listens_for(db.session, 'after_flush')
+def track_user_changes(session, flush_context):
+    changed = session.new | session.dirty | session.deleted
+    user_ids = {obj.id for obj in changed if isinstance(obj, User)}
+    if user_ids:
+        session.info.setdefault('users_changed', set()).update(user_ids)
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_cached_users(session):
+    for user_id in session.info.pop('users_changed', ()):
+        user_cache.invalidate(f'user:{user_id}')
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_user_changes(session):
+    session.info.pop('users_changed', None)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))  # Fetch user from database
+    return cached_user(int(user_id))
 
 @app.route('/profile')
 @login_required  # Ensures only logged-in users can access profile
@@ -325,67 +991,260 @@ def forgot_password():
 @app.route('/farmer/dashboard')
 @login_required(user_types=['farmer'])
 def farmer_dashboard():
-    user = User.query.get(session['user_id'])
-    inventories = FarmInventory.query.filter_by(farmer_id=user.id).all()
+    user, inventories = dashboard_user(User.inventories)
     return render_template('farmer_dashboard.html', user=user, inventories=inventories)
 
 @app.route('/customer/dashboard')
 @login_required(user_types=['customer'])
 def customer_dashboard():
-    user = User.query.get(session['user_id'])
-    orders = Order.query.filter_by(customer_id=user.id).all()
+    user, orders = dashboard_user(User.orders)
     return render_template('customer_dashboard.html', user=user, orders=orders)
 
 @app.route('/admin/dashboard')
 @login_required(user_types=['admin'])
 def admin_dashboard():
-    users = User.query.all()
-    farmers = User.query.filter_by(user_type='farmer').all()
-    products = Product.query.all()
+    stats = summary(read_counters(db.session, DashboardCounter))
+    try:
+        users, users_cursor = keyset_page(
+            db.session, db.select(User), User.id, request.args.get('users_cursor'), descending=True
+        )
+        farmers, farmers_cursor = keyset_page(
+            db.session, db.select(User).where(User.user_type == 'farmer'), User.username,
+            request.args.get('farmers_cursor')
+        )
+        products, products_cursor = product_page(
+            db.session, Product, 'latest', request.args.get('products_cursor'), ADMIN_PAGE_SIZE
+        )
+    except ValueError:
+        flash('That page link is no longer valid', 'danger')
+        return redirect(url_for('admin_dashboard'))
+
+    # Crop counts for the farmers on this page only
+    crop_counts = dict(db.session.execute(
+        db.select(FarmInventory.farmer_id, db.func.count())
+        .where(FarmInventory.farmer_id.in_([farmer.id for farmer in farmers]))
+        .group_by(FarmInventory.farmer_id)
+    ).all())
     pest_reports = PestPrediction.query.order_by(PestPrediction.timestamp.desc()).limit(10).all()
-    
+
     return render_template(
-        'admin_dashboard.html', 
-        users=users, 
-        farmers=farmers, 
+        'admin_dashboard.html',
+        stats=stats,
+        users=users,
+        users_cursor=users_cursor,
+        farmers=farmers,
+        farmers_cursor=farmers_cursor,
+        crop_counts=crop_counts,
         products=products,
+        products_cursor=products_cursor,
         pest_reports=pest_reports
     )
+
+COUNTED_MODELS = (User, Product, PestPrediction, FarmInventory, Order)
+
+def count_insert(mapper, connection, target):
+    if is_app_database(connection):
+        changes = counter_changes(mapper.local_table.name, after=target)
+        apply_counter_changes(connection, DashboardCounter.__table__, changes)
+
+def count_update(mapper, connection, target):
+    if is_app_database(connection):
+        changes = counter_changes(mapper.local_table.name, previous_state(target), target)
+        apply_counter_changes(connection, DashboardCounter.__table__, changes)
+
+def count_delete(mapper, connection, target):
+    if is_app_database(connection):
+        changes = counter_changes(mapper.local_table.name, before=target)
+        apply_counter_changes(connection, DashboardCounter.__table__, changes)
+
+for model in COUNTED_MODELS:
+    event.listen(model, 'after_insert', count_insert)
+    event.listen(model, 'after_update', count_update)
+    event.listen(model, 'after_delete', count_delete)
+
+@app.cli.command('rebuild-dashboard-counters')
+def rebuild_dashboard_counters():
+    """Recount the admin dashboard summary, e.g. after imports that bypass the ORM."""
+    with db.engine.begin() as connection:
+        count = rebuild_counters(connection, DashboardCounter.__table__)
+    print(f"Rebuilt {count} dashboard counters")
+
+def listing_filters(args):
+    """Marketplace filters from query parameters; raises ValueError for a bad price."""
+    def price(name):
+        value = args.get(name, '').strip()
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            raise ValueError(f'{name} must be a number')
+
+    return {
+        'in_stock': args.get('in_stock', '').lower() in ('1', 'true', 'on', 'yes'),
+        'min_price': price('min_price'),
+        'max_price': price('max_price'),
+    }
+
+app.config['MARKETPLACE_PAGE_SIZE'] = int(os.environ.get('MARKETPLACE_PAGE_SIZE', DEFAULT_PAGE_SIZE))
+
+_product_search = None
+_product_search_lock = threading.Lock()
+
+def get_product_search():
+    """The product search index (FTS5, or in-memory without it), created on first use."""
+    global _product_search
+    if _product_search is None:
+        with _product_search_lock:
+            if _product_search is None:
+                _product_search = product_search(db.engine)
+    return _product_search
+
+@event.listens_for(Product, 'after_insert')
+@event.listens_for(Product, 'after_update')
+def index_product(mapper, connection, target):
+    # Runs inside the flush, so the index commits or rolls back with the product row.
+    # Before the index exists there is nothing to sync; creating it reads every product.
+    state = inspect(target)
+    if not is_app_database(connection) or not (
+        state.attrs.name.history.has_changes() or state.attrs.description.history.has_changes()
+    ):
+        return
+    search = get_product_search()
+    if search.ready(connection):
+        search.index(connection, target.id, target.name, target.description)
+
+@event.listens_for(Product, 'after_delete')
+def unindex_product(mapper, connection, target):
+    if not is_app_database(connection):
+        return
+    search = get_product_search()
+    if search.ready(connection):
+        search.remove(connection, target.id)
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Re-index every product for marketplace search."""
+    search = get_product_search()
+    search.ensure(db.engine)
+    with db.engine.begin() as connection:
+        search.rebuild(connection)
+    print(f"Rebuilt the {search.backend} product search index")
+
+def find_products(sort, cursor=None, limit=DEFAULT_PAGE_SIZE, query='', prefix=False, **filters):
+    """
+    A page of products for a sort key, optionally restricted to a search
+    query. With a query, sort may also be 'relevance' for ranked results.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    terms = search_terms(query)
+    if not terms:
+        return product_page(db.session, Product, sort if sort in SORTS else 'featured', cursor, limit, **filters)
+
+    search = get_product_search()
+    search.ensure(db.engine)
+    if sort == RELEVANCE:
+        return search.ranked_page(db.session, Product, terms, cursor, limit, prefix=prefix, **filters)
+    return product_page(db.session, Product, sort, cursor, limit,
+                        matching=search.matching(Product, terms, prefix), **filters)
+
+def product_grid(sort, cursor=None, query='', **filters):
+    """
+    (products as dicts, rendered grid, next cursor) for one marketplace page,
+    served from the fragment cache until a Product row changes or the TTL ends.
+    """
+    limit = app.config['MARKETPLACE_PAGE_SIZE']
+    key = ('product_grid', sort, cursor, limit, query, tuple(sorted(filters.items())))
+
+    def render():
+        products, next_cursor = find_products(sort, cursor, limit, query, **filters)
+        products = [product_json(product) for product in products]
+        return products, Markup(render_template('_product_grid.html', products=products)), next_cursor
+
+    return fragment_cache.get_or_set(key, render, tags=('products',))
+
+@event.listens_for(db.session, 'after_flush')
+def track_product_changes(session, flush_context):
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(obj, Product) for obj in changed):
+        session.info['products_changed'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def invalidate_product_fragments(session):
+    if session.info.pop('products_changed', False):
+        fragment_cache.invalidate('products')
+
+@event.listens_for(db.session, 'after_rollback')
+def forget_product_changes(session):
+    session.info.pop('products_changed', None)
+
 @app.route('/marketplace', methods=['GET', 'POST'])
 def marketplace():
-    # Get the sort option from the request (default is None or 'featured')
-    sort_option = request.args.get('sort', 'featured')
-
-    # Determine the query to use for sorting
-    if sort_option == 'Price: Low to High':
-        products = Product.query.order_by(Product.price).all()
-    elif sort_option == 'Price: High to Low':
-        products = Product.query.order_by(Product.price.desc()).all()
-    elif sort_option == 'Rating: Highest':
-        products = Product.query.order_by(Product.rating.desc()).all()
-    elif sort_option == 'Latest':
-        products = Product.query.order_by(Product.id.desc()).all()
-    else:
-        # Default sorting: featured (or you can use some other default logic)
-        products = Product.query.all()
-
-    return render_template("marketplace.html", title="Marketplace", products=products)
+    # Get the sort option from the request (default is featured, or best match when searching)
+    query = request.args.get('q', '').strip()
+    sort_option = request.args.get('sort', 'Best match' if query else 'featured')
+    sort = RELEVANCE if sort_option == 'Best match' else sort_key(sort_option)
+    try:
+        filters = listing_filters(request.args)
+        products, grid, next_cursor = product_grid(sort, request.args.get('cursor'), query, **filters)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        filters = {}
+        products, grid, next_cursor = product_grid(sort, query=query)
+
+    next_url = None
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        next_url = url_for('marketplace', **args)
+
+    return render_template("marketplace.html", title="Marketplace", products=products,
+                           product_grid=grid, filters=filters, next_url=next_url, query=query)
+
+@app.route('/api/products')
+def list_products():
+    """
+    Keyset-paginated product listing. Query parameters: q (search text),
+    sort (relevance, the default with q, or featured, price_asc,
+    price_desc, rating, latest), cursor (next_cursor from the previous
+    page), limit, in_stock, min_price and max_price.
+    """
+    query = request.args.get('q', '').strip()
+    sort = request.args.get('sort', RELEVANCE if query else 'featured')
+    if sort not in SORTS and sort != RELEVANCE:
+        return jsonify({'error': f"sort must be one of {', '.join([RELEVANCE, *SORTS])}"}), 400
+    try:
+        filters = listing_filters(request.args)
+        limit = int(request.args.get('limit', app.config['MARKETPLACE_PAGE_SIZE']))
+        products, next_cursor = find_products(sort, request.args.get('cursor'), limit, query, **filters)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'products': [product_json(product) for product in products],
+        'next_cursor': next_cursor
+    })
+
+@app.route('/api/products/suggest')
+def suggest_products():
+    """Typeahead: the best matching products for a partly typed query (?q=tom)."""
+    query = request.args.get('q', '').strip()
+    if not search_terms(query):
+        return jsonify([])
+    products, _ = find_products(RELEVANCE, limit=10, query=query, prefix=True)
+    return jsonify([{'id': product.id, 'name': product.name} for product in products])
 
 
 @app.route('/pest')
 def pest():
     return render_template("pest.html", title="pest")
 
+# Warehouse model, scaler and coordinates stay in memory and hot-reload on change
+warehouse_artifacts = WarehouseArtifactManager('warehouse_model.pkl', 'fixed_warehouse.csv')
+app.config['WAREHOUSE_CSV_CHUNKSIZE'] = int(os.environ.get('WAREHOUSE_CSV_CHUNKSIZE', 100_000))
+
 @app.route('/warehouses', methods=['GET', 'POST'])
 def warehouses():
-    # Load prediction resources
-    with open('warehouse_model.pkl', 'rb') as f:
-        model_data = pickle.load(f)
-        model = model_data['model']
-        scaler = model_data['scaler']
-        warehouses = model_data['warehouses']
-    
-    fixed_warehouse = pd.read_csv('fixed_warehouse.csv')
     show_prediction = False
     result_warehouses = []
 
@@ -400,44 +1259,21 @@ def warehouses():
             return redirect(request.url)
         
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
-            # Process prediction
-            new_data = pd.read_csv(filepath)
-            merged_data = pd.merge(
-                new_data,
-                fixed_warehouse[['District', 'Latitude', 'Longitude']],
-                on='District',
-                how='left'
-            )
-            clean_data = merged_data.dropna(subset=['Latitude', 'Longitude']).copy()
-
-            def calculate_distances(row):
-                return [
-                    haversine((row['Latitude'], row['Longitude']), 
-                              (wh['Latitude'], wh['Longitude']), unit=Unit.KILOMETERS)
-                    for _, wh in warehouses.iterrows()
-                ]
-
-            new_distances = clean_data.apply(calculate_distances, axis=1)
-            distance_df = pd.DataFrame(
-                new_distances.tolist(),
-                columns=warehouses['District']
-            )
-            scaled_data = scaler.transform(distance_df)
-            clean_data['Optimal Warehouse'] = [
-                warehouses.iloc[cluster]['District'] 
-                for cluster in model.predict(scaled_data)
-            ]
-
-            warehouse_counts = clean_data['Optimal Warehouse'].value_counts()
-            threshold = warehouse_counts.quantile(0.75)
-            significant_warehouses = warehouse_counts[warehouse_counts >= threshold].index.tolist()
+            # Load prediction resources
+            artifacts = warehouse_artifacts.current()
+            fixed_warehouse = artifacts.fixed_warehouse
+
+            # Stream the inventory straight from the upload in chunks
+            try:
+                significant = predict_significant_warehouses(
+                    file.stream, artifacts, chunksize=app.config['WAREHOUSE_CSV_CHUNKSIZE']
+                )
+            except (ValueError, pd.errors.ParserError) as e:
+                flash(f'Could not read inventory file: {e}', 'danger')
+                return redirect(request.url)
 
             result_warehouses = []
-            for warehouse_name in significant_warehouses:
+            for warehouse_name in significant:
                 warehouse_info = fixed_warehouse[fixed_warehouse['District'] == warehouse_name].iloc[0]
                 result_warehouses.append({
                     'district': warehouse_name,
@@ -486,64 +1322,67 @@ NEPAL_DISTRICTS = [
 ]
 
 
+app.config['ROAD_NETWORK_FILE'] = os.environ.get('ROAD_NETWORK_FILE', 'road_network.csv')
+
+# Shortest road paths are computed once here; None when the links file is missing
+road_network = load_road_network(app.config['ROAD_NETWORK_FILE'])
+
+# 'haversine' prices deliveries on straight lines; 'road' on road distances and
+# travel times. The shipped road_network.csv is synthetic, so 'road' is opt-in
+# until surveyed link data replaces it.
+app.config['LOGISTICS_DISTANCES'] = os.environ.get('LOGISTICS_DISTANCES', 'haversine')
+
+def logistics_network():
+    if app.config['LOGISTICS_DISTANCES'] == 'road' and road_network is not None:
+        return road_network
+    return DISTRICTS
+
+def logistics_sites():
+    if app.config['LOGISTICS_WAREHOUSES'] != 'fixed':
+        return None
+    artifacts = warehouse_artifacts.current()
+    return logistics_network().sites(artifacts.fixed_warehouse, version=artifacts.version)
+
+def find_nearest_warehouse(target_district):
+    """
+    Nearest warehouse for a delivery district: the closest other district,
+    or the closest fixed_warehouse.csv site when LOGISTICS_WAREHOUSES is 'fixed'.
+    Returns the warehouse, the delivery location, the distance in km and the
+    travel time in hours (None when only straight-line distances are known).
+    """
+    network = logistics_network()
+    target_lat, target_lng = network.location(target_district)
+
+    sites = logistics_sites()
+    hours = None
+    if sites is not None:
+        nearest_district, (nearest_lat, nearest_lng), distance, hours = sites.nearest_site(target_district)
+    elif target_district in network:
+        nearest_district = network.nearest_district(target_district)[0]
+        nearest_lat, nearest_lng = network.location(nearest_district)
+        distance = network.distance(nearest_district, target_district)
+        if network is road_network:
+            hours = network.travel_hours(nearest_district, target_district)
+    else:
+        # Unknown districts fall back to Kathmandu's coordinates
+        nearest_district, distance = network.nearest_to_point(target_lat, target_lng)[0]
+        nearest_lat, nearest_lng = network.location(nearest_district)
+
+    return {
+        'District': nearest_district,
+        'Latitude': nearest_lat,
+        'Longitude': nearest_lng
+    }, {
+        'District': target_district,
+        'Latitude': target_lat,
+        'Longitude': target_lng
+    }, distance, hours
+
+app.config['LOGISTICS_WAREHOUSES'] = os.environ.get('LOGISTICS_WAREHOUSES', 'districts')
+
 @app.route('/logistics', methods=['GET', 'POST'])
 def item_tracking():
-    # Comprehensive district coordinates (more accurate representation)
-    DISTRICT_COORDINATES = {
-        # Province 1
-        "Bhojpur": (26.9302, 87.0372), "Dhankuta": (26.9862, 87.0919), 
-        "Ilam": (26.9092, 88.0841), "Jhapa": (26.7271, 88.0845), 
-        "Khotang": (27.1838, 86.7819), "Morang": (26.5333, 87.2667), 
-        "Okhaldunga": (27.3175, 86.5314), "Panchthar": (27.0769, 87.9183), 
-        "Sankhuwasabha": (27.2667, 87.2333), "Solukhumbu": (27.7900, 86.5400), 
-        "Sunsari": (26.6276, 87.1822), "Taplejung": (27.3552, 87.6689), 
-        "Tehrathum": (27.1831, 87.4269), "Udayapur": (26.8406, 86.8406),
-        
-        # Province 2
-        "Bara": (26.7272, 85.9300), "Dhanusa": (26.8350, 86.0122), 
-        "Mahottari": (26.7333, 86.0667), "Parsa": (27.0667, 84.8833), 
-        "Rautahat": (26.6667, 86.1667), "Sarlahi": (26.7333, 85.8333), 
-        "Saptari": (26.5667, 86.7333), "Siraha": (26.6667, 86.2167),
-        
-        # Province 3 (Bagmati)
-        "Bhaktapur": (27.6712, 85.4298), "Dhading": (28.0833, 84.8833), 
-        "Kathmandu": (27.7103, 85.3222), "Kavrepalanchok": (27.5333, 85.5333), 
-        "Lalitpur": (27.6589, 85.3378), "Nuwakot": (28.1667, 85.2667), 
-        "Rasuwa": (28.1667, 85.4167), "Sindhuli": (27.3333, 86.0333), 
-        "Sindhupalchok": (27.8333, 85.7500),
-        
-        # Province 4 (Gandaki)
-        "Gorkha": (27.9842, 84.6270), "Kaski": (28.2622, 84.0167), 
-        "Lamjung": (28.2333, 84.3667), "Manang": (28.6667, 84.0333), 
-        "Mustang": (28.8333, 83.7667), "Myagdi": (28.3667, 83.7667), 
-        "Nawalpur": (27.7000, 84.4333), "Parbat": (28.2333, 83.9667), 
-        "Syangja": (28.1167, 83.9000), "Tanahun": (28.0333, 84.3333),
-        
-        # Province 5
-        "Arghakhanchi": (27.7500, 83.3833), "Banke": (28.1500, 81.7500), 
-        "Bardiya": (28.2000, 81.4333), "Dang": (28.0833, 82.3000), 
-        "Gulmi": (28.0833, 83.3000), "Kapilvastu": (27.5667, 83.0000), 
-        "Parasi": (27.5333, 83.3789), "Palpa": (28.1500, 83.5167), 
-        "Pyuthan": (28.1000, 82.8667), "Rolpa": (28.3816, 82.6483), 
-        "Rukum": (28.3500, 82.2000), "Rupandehi": (27.5330, 83.3789),
-        
-        # Province 6 (Karnali)
-        "Dailekh": (28.8500, 81.7000), "Dolpa": (29.0333, 82.8333), 
-        "Humla": (29.9667, 81.8167), "Jajarkot": (28.6167, 81.6833), 
-        "Jumla": (29.2889, 82.3018), "Kalikot": (28.8667, 81.6167), 
-        "Mugu": (29.2500, 81.9833), "Rukum East": (28.3816, 82.6483), 
-        "Salyan": (28.3500, 81.9667), "Surkhet": (28.6167, 81.6500),
-        
-        # Province 7
-        "Achham": (29.0396, 81.2519), "Baitadi": (29.3333, 80.5833), 
-        "Bajhang": (29.5167, 81.3000), "Bajura": (29.4833, 81.5167), 
-        "Dadeldhura": (29.2188, 80.4994), "Darchula": (29.8667, 80.5667), 
-        "Doti": (29.0000, 81.4000), "Kailali": (28.7000, 80.9667), 
-        "Kanchanpur": (28.9333, 80.5667)
-    }
-
-    # Convert dictionary to list of district names
-    districts = sorted(list(DISTRICT_COORDINATES.keys()))
+    districts = SORTED_DISTRICTS
 
     if request.method == 'POST':
         try:
@@ -552,62 +1391,16 @@ def item_tracking():
             product_quantity = float(request.form.get('product_quantity', 0))
             product_weight = float(request.form.get('product_weight', 0))
 
-            # Find nearest warehouse using comprehensive district coordinates
-            def find_nearest_warehouse(target_district):
-                target_lat, target_lng = DISTRICT_COORDINATES.get(
-                    target_district, 
-                    (27.7103, 85.3222)  # Default to Kathmandu if not found
-                )
-
-                # Calculate distances to all districts
-                distances = {
-                    district: haversine(
-                        (target_lat, target_lng), 
-                        DISTRICT_COORDINATES.get(district, (27.7103, 85.3222)), 
-                        unit=Unit.KILOMETERS
-                    )
-                    for district in DISTRICT_COORDINATES.keys() 
-                    if district != target_district
-                }
-
-                # Find nearest district
-                nearest_district = min(distances, key=distances.get)
-                nearest_lat, nearest_lng = DISTRICT_COORDINATES[nearest_district]
-
-                return {
-                    'District': nearest_district,
-                    'Latitude': nearest_lat,
-                    'Longitude': nearest_lng
-                }, {
-                    'District': target_district,
-                    'Latitude': target_lat,
-                    'Longitude': target_lng
-                }
-
-            # Get warehouse details
-            nearest_warehouse, delivery_location = find_nearest_warehouse(delivery_district)
+            # Nearest warehouse and distance come straight from the precomputed tables
+            nearest_warehouse, delivery_location, estimated_distance, estimated_time = \
+                find_nearest_warehouse(delivery_district)
 
-            # Comprehensive logistics calculations
-            estimated_distance = haversine(
-                (nearest_warehouse['Latitude'], nearest_warehouse['Longitude']), 
-                (delivery_location['Latitude'], delivery_location['Longitude']), 
-                unit=Unit.KILOMETERS
-            )
-            
             # Detailed cost calculations
-            base_delivery_rate = 50  # NPR per km base rate
-            weight_rate = 10  # Additional NPR per kg
-            quantity_rate = 5  # Additional NPR per unit
-
-            distance_cost = estimated_distance * base_delivery_rate
-            weight_cost = product_weight * weight_rate
-            quantity_cost = product_quantity * quantity_rate
+            costs = delivery_costs(estimated_distance, product_weight, product_quantity)
 
-            total_delivery_cost = distance_cost + weight_cost + quantity_cost
-
-            # Estimated delivery time
-            avg_speed = 40  # km/h considering Nepalese terrain
-            estimated_time = estimated_distance / avg_speed
+            # Estimated delivery time, from road speeds when a road network is loaded
+            if estimated_time is None:
+                estimated_time = estimated_distance / AVG_SPEED
 
             # Prepare route visualization data
             route_details = {
@@ -633,10 +1426,10 @@ def item_tracking():
                     'estimated_time': round(estimated_time, 2),
                     'route_details': route_details,
                     'cost_breakdown': {
-                        'distance_cost': round(distance_cost, 2),
-                        'weight_cost': round(weight_cost, 2),
-                        'quantity_cost': round(quantity_cost, 2),
-                        'total_cost': round(total_delivery_cost, 2)
+                        'distance_cost': round(costs['distance_cost'], 2),
+                        'weight_cost': round(costs['weight_cost'], 2),
+                        'quantity_cost': round(costs['quantity_cost'], 2),
+                        'total_cost': round(costs['total_cost'], 2)
                     }
                 })
 
@@ -645,5 +1438,191 @@ def item_tracking():
             return render_template('logistics.html', districts=districts)
 
     return render_template('logistics.html', districts=districts)
+def read_order_batches(chunksize):
+    """
+    Yield DataFrames of orders from an uploaded CSV or a JSON list body;
+    raises ValueError when the body is neither.
+    """
+    if 'orders_file' in request.files:
+        # Parsed up front: the upload is closed once the response starts streaming
+        orders = pd.read_csv(request.files['orders_file'].stream)
+        for start in range(0, len(orders), chunksize):
+            yield orders.iloc[start:start + chunksize]
+        return
+
+    orders = request.get_json(silent=True)
+    if isinstance(orders, dict):
+        orders = orders.get('orders')
+    if not isinstance(orders, list):
+        raise ValueError('Send orders as a CSV file (orders_file) or a JSON list')
+    for n, order in enumerate(orders):
+        if not isinstance(order, dict):
+            raise ValueError(f'orders[{n}] must be an object')
+    for start in range(0, len(orders), chunksize):
+        yield pd.DataFrame.from_records(orders[start:start + chunksize])
+
+@app.route('/api/logistics/quotes', methods=['POST'])
+def batch_quotes():
+    """
+    Price many deliveries at once. Each order needs delivery_district,
+    product_quantity and product_weight; results stream back as NDJSON
+    or, with ?format=csv, as CSV.
+    """
+    output_format = request.args.get('format', 'ndjson')
+    if output_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'format must be ndjson or csv'}), 400
+
+    network = logistics_network()
+    # Every order is checked before the first byte goes out: once the
+    # response is streaming, a bad row can no longer become a 400
+    try:
+        batches = list(read_order_batches(app.config['LOGISTICS_QUOTE_CHUNKSIZE']))
+        offset = 0
+        for orders in batches:
+            check_orders(orders, network, offset)
+            offset += len(orders)
+    except (ValueError, TypeError, pd.errors.ParserError) as e:
+        return jsonify({'error': str(e)}), 400
+    if not batches:
+        return jsonify({'error': 'No orders to quote'}), 400
+
+    sites = logistics_sites()
+
+    def generate():
+        header = True
+        for orders in batches:
+            quotes = quote_deliveries(orders, sites, network)
+            if output_format == 'csv':
+                yield quotes.to_csv(index=False, header=header)
+                header = False
+            else:
+                yield quotes.to_json(orient='records', lines=True) + '\n'
+
+    mimetype = 'text/csv' if output_format == 'csv' else 'application/x-ndjson'
+    return app.response_class(stream_with_context(generate()), mimetype=mimetype)
+
+app.config['LOGISTICS_QUOTE_CHUNKSIZE'] = int(os.environ.get('LOGISTICS_QUOTE_CHUNKSIZE', 10_000))
+app.config['VEHICLE_CAPACITY_KG'] = float(os.environ.get('VEHICLE_CAPACITY_KG', 1000))
+
+def warehouse_depots():
+    # Warehouse sites snapped to the district table that the planner routes over
+    artifacts = warehouse_artifacts.current()
+    depots = []
+    for site in artifacts.fixed_warehouse.itertuples():
+        district = site.District if site.District in DISTRICTS else \
+            DISTRICTS.nearest_to_point(site.Latitude, site.Longitude)[0][0]
+        if district not in depots:
+            depots.append(district)
+    return depots
+
+def positive_number(value, name):
+    # bool is an int subclass, but "capacity": true is a client mistake
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value) or value <= 0:
+        raise ValueError(f'{name} must be a positive number')
+    return float(value)
+
+def route_options(options, index):
+    """
+    Capacity, vehicles, depots and orders from a route planning request,
+    with orders None when none were sent and each order's load defaulting
+    to 0; raises ValueError for bad input.
+    """
+    if not isinstance(options, dict):
+        raise ValueError('Request body must be a JSON object')
+    capacity = positive_number(options.get('capacity', app.config['VEHICLE_CAPACITY_KG']), 'capacity')
+
+    vehicles = options.get('vehicles')
+    if vehicles is not None and (isinstance(vehicles, bool) or not isinstance(vehicles, int) or vehicles <= 0):
+        raise ValueError('vehicles must be a positive integer')
+
+    depots = options.get('depots') or warehouse_depots()
+    if not isinstance(depots, list) or not all(isinstance(d, str) for d in depots):
+        raise ValueError('depots must be a list of district names')
+    unknown = [d for d in depots if d not in index.positions]
+    if unknown:
+        raise ValueError(f"Unknown depot districts: {', '.join(unknown)}")
+
+    orders = options.get('orders')
+    if orders is not None:
+        if not isinstance(orders, list):
+            raise ValueError('orders must be a list of {id, district, load} objects')
+        normalised = []
+        for n, order in enumerate(orders):
+            if not isinstance(order, dict) or 'id' not in order:
+                raise ValueError(f'orders[{n}] must be an object with an id')
+            if not isinstance(order.get('district'), str):
+                raise ValueError(f'orders[{n}] needs a district')
+            if order['district'] not in index.positions:
+                raise ValueError(f"orders[{n}] has an unknown district: {order['district']}")
+            load = order.get('load', 0)
+            if isinstance(load, bool) or not isinstance(load, (int, float)) or not math.isfinite(load) or load < 0:
+                raise ValueError(f'orders[{n}] load must be a non-negative number')
+            # The planner reads order['load'], so a missing load is filled in here
+            normalised.append(dict(order, load=load))
+        orders = normalised
+    return capacity, vehicles, depots, orders
+
+@app.route('/api/logistics/routes', methods=['POST'])
+@login_required(user_types=['admin'])
+def plan_delivery_routes():
+    """
+    Plan multi-stop routes for pending orders. The JSON body may set
+    capacity (kg), vehicles (per depot), depots (district names) and
+    orders ([{id, district, load}]); without orders, pending Order rows
+    with a delivery_district are planned.
+    """
+    index = logistics_network()
+    try:
+        capacity, vehicles, depots, orders = route_options(request.get_json(silent=True) or {}, index)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if orders is None:
+        pending = Order.query.filter(
+            Order.status == 'pending', Order.delivery_district.isnot(None)
+        ).all()
+        orders = [
+            {'id': order.id, 'district': order.delivery_district, 'load': order.weight or 0}
+            for order in pending
+        ]
+
+    routes, unrouted = plan_routes(orders, depots, capacity, num_vehicles=vehicles, index=index)
+    return jsonify({
+        'capacity': capacity,
+        'depots': depots,
+        'total_distance_km': round(sum(route.distance for route in routes), 2),
+        'routes': [route.to_dict() for route in routes],
+        'unrouted': [order['id'] for order in unrouted]
+    })
+
+@app.route('/api/logistics/path')
+def road_path():
+    """Shortest road path between two districts (?from=...&to=...)."""
+    if road_network is None:
+        return jsonify({'error': 'No road network loaded'}), 404
+    origin = request.args.get('from')
+    destination = request.args.get('to')
+    unknown = [d for d in (origin, destination) if d not in road_network]
+    if unknown:
+        return jsonify({'error': f"Unknown districts: {', '.join(map(str, unknown))}"}), 400
+
+    path = road_network.path(origin, destination)
+    if not path:
+        return jsonify({'error': f'No road connects {origin} and {destination}'}), 404
+    return jsonify({
+        'from': origin,
+        'to': destination,
+        'path': path,
+        'distance_km': round(road_network.distance(origin, destination), 2),
+        'straight_line_km': round(float(road_network.straight_line[
+            road_network.positions[origin], road_network.positions[destination]
+        ]), 2),
+        'estimated_hours': round(road_network.travel_hours(origin, destination), 2)
+    })
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8000, debug=True)
\ No newline at end of file
+    # Schema setup happens once at startup instead of on every request
+    with app.app_context():
+        setup_database()
+    # Development server only; production runs under gunicorn (see serving.py)
+    app.run(host='0.0.0.0', port=8000, debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
@@ -0,0 +1,222 @@
+# auth_service.py
+import inspect
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Whatever the installed Werkzeug hashes with when no method is given
+DEFAULT_METHOD = inspect.signature(generate_password_hash).parameters['method'].default
+
+# Forking a multithreaded server can copy a lock another thread holds into
+# the child, so hashing workers are started from a clean process instead
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class AuthBusy(Exception):
+    """Every hashing slot is taken; the caller should ask the user to retry."""
+
+
+def hash_prefix(password_hash):
+    # 'pbkdf2:sha256:600000$salt$hash' -> 'pbkdf2:sha256:600000'
+    return password_hash.split('$', 1)[0]
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(password_hash, password, method, prefix):
+    """
+    Runs in a worker process. Returns (ok, new_hash); new_hash is set when
+    the password was right but stored with other cost parameters.
+    """
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if hash_prefix(password_hash) == prefix:
+        return True, None
+    return True, generate_password_hash(password, method=method)
+
+
+class LoginRateLimiter:
+    """
+    At most `max_attempts` logins per key (a username) in a sliding window
+    of `window` seconds. A successful login clears the key.
+
+    Counts are kept per process: under gunicorn each worker has its own
+    limiter, so a username can make up to workers x max_attempts attempts
+    per window. Size max_attempts with the worker count in mind.
+    """
+
+    def __init__(self, max_attempts=5, window=300):
+        self.max_attempts = max_attempts
+        self.window = window
+        self._lock = threading.Lock()
+        self._attempts = {}  # key -> deque of attempt times
+        self.limited = 0
+
+    def hit(self, key):
+        """Record an attempt; returns False when the key is over its limit."""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._attempts) > 10_000:
+                self._sweep(now)
+            attempts = self._attempts.setdefault(key, deque())
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                self.limited += 1
+                return False
+            attempts.append(now)
+            return True
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def _sweep(self, now):
+        stale = [key for key, attempts in self._attempts.items()
+                 if not attempts or attempts[-1] <= now - self.window]
+        for key in stale:
+            del self._attempts[key]
+
+
+class AuthTimings:
+    """Latency of hashing and verification, including time queued for a worker."""
+
+    def __init__(self, recent=1024):
+        self._lock = threading.Lock()
+        self._recent = {}  # kind -> deque of the latest latencies
+        self._totals = {}  # kind -> [count, seconds]
+        self.recent = recent
+
+    def record(self, kind, seconds):
+        with self._lock:
+            self._recent.setdefault(kind, deque(maxlen=self.recent)).append(seconds)
+            totals = self._totals.setdefault(kind, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+    def to_dict(self):
+        with self._lock:
+            stats = {}
+            for kind, (count, seconds) in self._totals.items():
+                recent = sorted(self._recent[kind])
+                stats[kind] = {
+                    'count': count,
+                    'mean_ms': round(seconds / count * 1000, 2),
+                    'p50_ms': round(recent[len(recent) // 2] * 1000, 2),
+                    'p95_ms': round(recent[int(len(recent) * 0.95)] * 1000, 2),
+                    'max_ms': round(recent[-1] * 1000, 2),
+                }
+            return stats
+
+
+class AuthService:
+    """
+    Password hashing and verification on a bounded pool of worker
+    processes, so PBKDF2/scrypt work never runs on request threads and a
+    login storm queues at most `max_pending` jobs instead of saturating
+    every worker. The pool is created on first use, again after a fork,
+    and again if a worker process dies.
+    """
+
+    def __init__(self, method=DEFAULT_METHOD, workers=2, max_pending=32, limiter=None):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.limiter = limiter or LoginRateLimiter()
+        self.timings = AuthTimings()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        self._prefix = None
+        self.busy = 0
+        self.rehashed = 0
+        self.rebuilt = 0
+
+    @property
+    def prefix(self):
+        # The method with its cost parameters spelled out, as stored in a hash
+        if self._prefix is None:
+            self._prefix = hash_prefix(generate_password_hash('', method=self.method))
+        return self._prefix
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context(START_METHOD)
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _discard(self, pool):
+        # Another thread may already have replaced the broken pool
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self.rebuilt += 1
+        pool.shutdown(wait=False)
+
+    def _call(self, fn, args):
+        pool = self._executor()
+        try:
+            return pool.submit(fn, *args).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a new pool and retry once
+            self._discard(pool)
+            return self._executor().submit(fn, *args).result()
+
+    def _run(self, kind, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.busy += 1
+            raise AuthBusy('Too many logins in progress')
+        started = time.perf_counter()
+        try:
+            return self._call(fn, args)
+        finally:
+            self._slots.release()
+            self.timings.record(kind, time.perf_counter() - started)
+
+    def hash_password(self, password):
+        return self._run('hash', _hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        """Returns (ok, new_hash); store new_hash when it is not None."""
+        ok, new_hash = self._run('verify', _verify, password_hash, password, self.method, self.prefix)
+        if new_hash is not None:
+            with self._lock:
+                self.rehashed += 1
+        return ok, new_hash
+
+    def allow(self, username):
+        return self.limiter.hit(username.lower())
+
+    def succeeded(self, username):
+        self.limiter.reset(username.lower())
+
+    def stats(self):
+        return {
+            'method': self.prefix,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'busy_rejections': self.busy,
+            'rate_limited': self.limiter.limited,
+            'rehashed': self.rehashed,
+            'pool_rebuilds': self.rebuilt,
+            'latency': self.timings.to_dict(),
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False)
+            self._pool = None
@@ -0,0 +1,84 @@
+# benchmark_marketplace.py
+# Marketplace page latency as the catalog grows: keyset pages versus LIMIT/OFFSET,
+# at the first page and deep into the listing, for every sort.
+#
+#   python benchmark_marketplace.py --products 100 10000 1000000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app import Product
+from product_listing import SORTS, encode_cursor, product_page
+
+
+def seed(engine, count, rng):
+    Product.__table__.create(engine)
+    batch = 50_000
+    with engine.begin() as connection:
+        for start in range(0, count, batch):
+            connection.execute(insert(Product.__table__), [
+                {
+                    'name': f'Product {i}',
+                    'price': round(rng.uniform(1, 500), 2),
+                    'rating': rng.choice([None, 1, 2, 3, 3.5, 4, 4.5, 5]),
+                    'in_stock': rng.random() < 0.8,
+                }
+                for i in range(start, min(start + batch, count))
+            ])
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def offset_page(session, sort, offset, limit):
+    column_name, descending = SORTS[sort]
+    column = getattr(Product, column_name)
+    order = [column.desc(), Product.id.desc()] if descending else [column, Product.id]
+    return session.scalars(select(Product).order_by(*order).offset(offset).limit(limit)).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark marketplace pagination')
+    parser.add_argument('--products', type=int, nargs='+', default=[100, 10_000, 1_000_000])
+    parser.add_argument('--page-size', type=int, default=24)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'sort':>10} {'depth':>6} {'keyset ms':>10} {'offset ms':>10}")
+    for count in args.products:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            seed(engine, count, random.Random(args.seed))
+            with Session(engine) as session:
+                for sort in SORTS:
+                    for depth in (0.0, 0.9):
+                        offset = int(count * depth)
+                        cursor = None
+                        if offset:
+                            # Cursor of the row just before the deep page, as the previous page would return it
+                            previous = offset_page(session, sort, offset - 1, 1)[0]
+                            cursor = encode_cursor(getattr(previous, SORTS[sort][0]), previous.id)
+                        keyset_ms = best_of(
+                            lambda: product_page(session, Product, sort, cursor, args.page_size), args.repeats
+                        )
+                        offset_ms = best_of(
+                            lambda: offset_page(session, sort, offset, args.page_size), args.repeats
+                        )
+                        print(f'{count:>9} {sort:>10} {depth:>6.0%} {keyset_ms:>10.2f} {offset_ms:>10.2f}')
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# benchmark_pest_backends.py
+# Compare PestDetector inference backends against the eager fp32 model.
+#
+#   python benchmark_pest_backends.py --backends eager torchscript static_int8 onnx
+import argparse
+import time
+
+import torch
+
+from pest_backends import BACKENDS, sample_images
+from pest_prediction import PestDetector
+
+
+def time_batches(detector, tensors, batch_size, repeats):
+    batches = [tensors[i:i + batch_size] for i in range(0, len(tensors), batch_size)]
+    detector.predict_batch(batches[0])  # warm-up
+
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for batch in batches:
+            detector.predict_batch(batch)
+    elapsed = time.perf_counter() - started
+
+    images = len(tensors) * repeats
+    return elapsed / images * 1000, images / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare PestDetector inference backends')
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument('--images', default='static/uploads')
+    parser.add_argument('--model', default='best_model.pth')
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    paths = sample_images(args.images)
+    if not paths:
+        raise SystemExit(f"No sample images found in {args.images}")
+
+    reference = PestDetector(args.model, backend='eager')
+    tensors = [reference.preprocess(path) for path in paths]
+    with torch.inference_mode():
+        reference_probs = torch.softmax(reference.runner(torch.stack(tensors)), dim=1)
+    reference_top1 = reference_probs.argmax(dim=1)
+
+    print(f"{len(paths)} images from {args.images}, batch size {args.batch_size}")
+    print(f"{'backend':<14}{'load s':>8}{'top-1 agree':>13}{'max |dp|':>10}"
+          f"{'ms/img b=1':>12}{'img/s b=1':>11}{f'ms/img b={args.batch_size}':>12}{f'img/s b={args.batch_size}':>11}")
+
+    for backend in args.backends:
+        started = time.perf_counter()
+        try:
+            detector = PestDetector(args.model, backend=backend, calibration_dir=args.images)
+        except ImportError as e:
+            print(f"{backend:<14}skipped ({e})")
+            continue
+        load_seconds = time.perf_counter() - started
+
+        with torch.inference_mode():
+            probs = torch.softmax(detector.runner(torch.stack(tensors)), dim=1)
+        agreement = (probs.argmax(dim=1) == reference_top1).float().mean().item() * 100
+        max_diff = (probs - reference_probs).abs().max().item()
+
+        single_ms, single_ips = time_batches(detector, tensors, 1, args.repeats)
+        batch_ms, batch_ips = time_batches(detector, tensors, args.batch_size, args.repeats)
+
+        print(f"{backend:<14}{load_seconds:>8.2f}{agreement:>12.1f}%{max_diff:>10.4f}"
+              f"{single_ms:>12.1f}{single_ips:>11.1f}{batch_ms:>12.1f}{batch_ips:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# benchmark_preprocessing.py
+# Time full-resolution decoding against the draft/reduce pipeline used by PestDetector.
+#
+#   python benchmark_preprocessing.py --images static/uploads
+import argparse
+import io
+import time
+
+import torch
+import torchvision.transforms as transforms
+from PIL import Image
+
+from pest_backends import sample_images
+from pest_preprocessing import load_image
+
+TRANSFORM = transforms.Compose([
+    transforms.Resize(256),
+    transforms.CenterCrop(224),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+])
+
+
+def full_resolution(image_bytes):
+    started = time.perf_counter()
+    image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+    decoded = time.perf_counter()
+    tensor = TRANSFORM(image)
+    return tensor, decoded - started, time.perf_counter() - decoded
+
+
+def reduced(image_bytes):
+    started = time.perf_counter()
+    image, _ = load_image(image_bytes)
+    decoded = time.perf_counter()
+    tensor = TRANSFORM(image)
+    return tensor, decoded - started, time.perf_counter() - decoded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare image preprocessing pipelines')
+    parser.add_argument('--images', default='static/uploads')
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'image':<32}{'size':>12}{'full dec ms':>13}{'full tf ms':>12}"
+          f"{'fast dec ms':>13}{'fast tf ms':>12}{'max |dx|':>10}")
+
+    for path in sample_images(args.images):
+        with open(path, 'rb') as f:
+            image_bytes = f.read()
+        with Image.open(path) as image:
+            size = f"{image.size[0]}x{image.size[1]}"
+
+        totals = {}
+        for name, pipeline in (('full', full_resolution), ('fast', reduced)):
+            decode = transform = 0.0
+            for _ in range(args.repeats):
+                tensor, decode_s, transform_s = pipeline(image_bytes)
+                decode += decode_s
+                transform += transform_s
+            totals[name] = (tensor, decode / args.repeats * 1000, transform / args.repeats * 1000)
+
+        diff = torch.max(torch.abs(totals['full'][0] - totals['fast'][0])).item()
+        print(f"{path.split('/')[-1][:31]:<32}{size:>12}"
+              f"{totals['full'][1]:>13.1f}{totals['full'][2]:>12.1f}"
+              f"{totals['fast'][1]:>13.1f}{totals['fast'][2]:>12.1f}{diff:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# benchmark_routes.py
+# Total route length and solve time of the delivery route planner as the order count grows.
+#
+#   python benchmark_routes.py --orders 100 1000 10000 100000 --capacity 1000
+import argparse
+import random
+import time
+
+from geo import DISTRICTS
+from route_planner import plan_routes
+
+DEPOTS = ['Jhapa', 'Sunsari', 'Kathmandu', 'Gorkha', 'Kaski', 'Dhanusa', 'Rupandehi',
+          'Nawalpur', 'Dadeldhura', 'Rolpa', 'Achham', 'Jumla', 'Khotang']
+
+
+def random_orders(count, rng, max_load):
+    return [
+        {'id': i, 'district': rng.choice(DISTRICTS.names), 'load': rng.uniform(1, max_load)}
+        for i in range(count)
+    ]
+
+
+def direct_trip_km(orders, depots):
+    # Baseline: every order is its own out-and-back trip from the nearest depot
+    depot_rows = [DISTRICTS.positions[d] for d in depots]
+    total = 0.0
+    for order in orders:
+        column = DISTRICTS.positions[order['district']]
+        total += 2 * min(DISTRICTS.distances[row, column] for row in depot_rows)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the delivery route planner')
+    parser.add_argument('--orders', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--capacity', type=float, default=1000)
+    parser.add_argument('--max-load', type=float, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'orders':>8}{'routes':>8}{'planned km':>13}{'direct km':>13}{'saved':>8}{'solve s':>10}")
+    for count in args.orders:
+        rng = random.Random(args.seed)
+        orders = random_orders(count, rng, args.max_load)
+
+        started = time.perf_counter()
+        routes, _ = plan_routes(orders, DEPOTS, args.capacity)
+        elapsed = time.perf_counter() - started
+
+        planned = sum(route.distance for route in routes)
+        direct = direct_trip_km(orders, DEPOTS)
+        print(f"{count:>8}{len(routes):>8}{planned:>13.0f}{direct:>13.0f}"
+              f"{(1 - planned / direct) * 100:>7.1f}%{elapsed:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# benchmark_search.py
+# Product search latency on a synthetic catalog: FTS5 and the in-memory inverted
+# index against a LIKE scan, for ranked, prefix (typeahead) and sorted searches.
+#
+#   python benchmark_search.py --products 100000 --repeats 5
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, or_, select
+from sqlalchemy.orm import Session
+
+from app import Product
+from product_listing import product_page
+from product_search import Fts5ProductSearch, InvertedProductSearch, fts5_available, search_terms
+
+CROPS = ['tomato', 'potato', 'rice', 'wheat', 'maize', 'jute', 'chilli', 'mango', 'apple', 'orange',
+         'cabbage', 'cauliflower', 'onion', 'garlic', 'ginger', 'lentil', 'mustard', 'banana', 'tea', 'coffee']
+WORDS = ['fresh', 'organic', 'sweet', 'red', 'green', 'local', 'hill', 'terai', 'dried', 'premium',
+         'juicy', 'crisp', 'seasonal', 'farm', 'picked', 'grade', 'bulk', 'packed', 'ripe', 'spicy']
+
+# (label, query, prefix, sort)
+QUERIES = [
+    ('one term, ranked', 'tomato', False, 'relevance'),
+    ('two terms, ranked', 'organic rice', False, 'relevance'),
+    ('three terms, ranked', 'coffee spicy dried', False, 'relevance'),
+    ('rare variety, ranked', 'tomato417', False, 'relevance'),
+    ('typeahead "ca"', 'ca', True, 'relevance'),
+    ('typeahead "organic ma"', 'organic ma', True, 'relevance'),
+    ('typeahead "tomato41"', 'tomato41', True, 'relevance'),
+    ('one term, price sort', 'tomato', False, 'price_asc'),
+    ('two terms, rating sort', 'organic rice', False, 'rating'),
+    ('rare variety, price sort', 'mango42', False, 'price_asc'),
+]
+
+
+def seed(engine, count, rng):
+    Product.__table__.create(engine)
+    with engine.begin() as connection:
+        for start in range(0, count, 50_000):
+            connection.execute(insert(Product.__table__), [
+                {
+                    # A numbered variety per crop gives rare terms: ~5 products each at 100k
+                    'name': f"{rng.choice(WORDS).title()} {crop.title()} {crop}{rng.randrange(1000)}",
+                    'description': ' '.join(rng.choices(WORDS + CROPS, k=12)),
+                    'price': round(rng.uniform(1, 500), 2),
+                    'rating': rng.choice([None, 2, 3, 4, 4.5, 5]),
+                    'in_stock': rng.random() < 0.8,
+                }
+                for crop in (rng.choice(CROPS) for _ in range(start, min(start + 50_000, count)))
+            ])
+
+
+def best_of(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def like_search(session, terms, limit):
+    # Baseline: every term must appear in the name or description. It cannot rank,
+    # and it only stops early when matches are common enough to fill a page quickly.
+    statement = select(Product)
+    for term in terms:
+        statement = statement.where(or_(Product.name.ilike(f'%{term}%'), Product.description.ilike(f'%{term}%')))
+    return session.scalars(statement.order_by(Product.id).limit(limit)).all()
+
+
+def run(search, session, terms, prefix, sort, limit):
+    if sort == 'relevance':
+        return search.ranked_page(session, Product, terms, limit=limit, prefix=prefix)
+    return product_page(session, Product, sort, None, limit, matching=search.matching(Product, terms, prefix))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark marketplace product search')
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--page-size', type=int, default=24)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, args.products, random.Random(args.seed))
+
+        indexes = [InvertedProductSearch()]
+        with engine.connect() as connection:
+            if fts5_available(connection):
+                indexes.insert(0, Fts5ProductSearch())
+        for search in indexes:
+            start = time.perf_counter()
+            search.ensure(engine)
+            print(f'{search.backend} index built over {args.products} products in {time.perf_counter() - start:.2f}s')
+
+        print(f"\n{'query':<26}{'hits':>8}" + ''.join(f'{s.backend + " ms":>14}' for s in indexes) + f"{'LIKE ms':>12}")
+        with Session(engine) as session:
+            for label, query, prefix, sort in QUERIES:
+                terms = search_terms(query)
+                hits = len(indexes[-1].scores(terms, prefix))
+                timings = [best_of(lambda: run(s, session, terms, prefix, sort, args.page_size), args.repeats)
+                           for s in indexes]
+                like_ms = best_of(lambda: like_search(session, terms, args.page_size), args.repeats)
+                print(f'{label:<26}{hits:>8}' + ''.join(f'{t:>14.2f}' for t in timings) + f'{like_ms:>12.2f}')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
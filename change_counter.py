@@ -0,0 +1,26 @@
+# change_counter.py
+# A one-row table whose version is bumped by triggers on every write to a
+# watched table, from any process or script. In-memory caches built from that
+# table compare it with the version they were built at. SQLite only: on
+# other databases nothing is installed and the version reads as None.
+
+
+def install_change_counter(connection, table, counter_table):
+    if connection.dialect.name != 'sqlite':
+        return
+    connection.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {counter_table} "
+        f"(id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)"
+    )
+    connection.exec_driver_sql(f"INSERT OR IGNORE INTO {counter_table} (id, version) VALUES (1, 0)")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {counter_table}_{event.lower()} AFTER {event} ON {table} "
+            f"BEGIN UPDATE {counter_table} SET version = version + 1; END"
+        )
+
+
+def read_change_counter(connection, counter_table):
+    if connection.dialect.name != 'sqlite':
+        return None
+    return connection.exec_driver_sql(f"SELECT version FROM {counter_table}").scalar()
@@ -0,0 +1,120 @@
+# check_query_plans.py
+# Runs EXPLAIN QUERY PLAN on the hot queries behind login, the dashboards,
+# the marketplace and route planning, and fails if one stops using its index.
+#
+#   FLASK_APP=app.py flask db upgrade && python check_query_plans.py
+import sys
+from datetime import date
+
+from sqlalchemy import func, select, text
+
+from app import app, db, FarmInventory, Order, PestPrediction, PestRollup, Product, User
+from product_listing import encode_cursor, product_page
+
+
+class StatementRecorder:
+    """Stands in for a session and keeps the statements product_page would run."""
+
+    def __init__(self):
+        self.statements = []
+
+    def scalars(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def all(self):
+        return []
+
+
+def marketplace_checks():
+    # First and later pages of each sort, with and without filters; an unrated
+    # product sorts last, so rating pages also read the NULL tail of the index
+    pages = [
+        ('price low to high', 'price_asc', None, {}, 'ix_product_price_id'),
+        ('price low to high, page 2, in stock 5-50', 'price_asc', encode_cursor(12.5, 40),
+         {'in_stock': True, 'min_price': 5, 'max_price': 50}, 'ix_product_price_id'),
+        ('price high to low, page 2', 'price_desc', encode_cursor(12.5, 40), {}, 'ix_product_price_id'),
+        ('rating', 'rating', None, {}, 'ix_product_rating_id'),
+        ('rating, page 2', 'rating', encode_cursor(4.5, 40), {}, 'ix_product_rating_id'),
+        ('rating, unrated page', 'rating', encode_cursor(None, 40), {}, 'ix_product_rating_id'),
+        ('latest, page 2', 'latest', encode_cursor(40, 40), {}, None),
+        ('featured, page 2', 'featured', encode_cursor(40, 40), {}, None),
+    ]
+    checks = []
+    for name, sort, cursor, filters, index in pages:
+        recorder = StatementRecorder()
+        product_page(recorder, Product, sort, cursor, **filters)
+        for n, statement in enumerate(recorder.statements):
+            suffix = ' (unrated tail)' if n else ''
+            checks.append((f'marketplace: {name}{suffix}', statement, index, False))
+    return checks
+
+
+# (description, query, index(es) the plan may use or None for the rowid, may the plan sort in a temp b-tree)
+CHECKS = [
+    # username is unique, so SQLite may equally pick its unique index for the login lookup
+    ('login', select(User).filter_by(username='farmer', user_type='farmer'),
+     ('ix_user_user_type_username', 'sqlite_autoindex_user_1'), False),
+    ('admin dashboard: farmers, page 2',
+     select(User).where(User.user_type == 'farmer', User.username > 'farmer20').order_by(User.username).limit(21),
+     'ix_user_user_type_username', False),
+    ('admin dashboard: crop counts',
+     select(FarmInventory.farmer_id, func.count()).where(FarmInventory.farmer_id.in_([1, 2, 3]))
+     .group_by(FarmInventory.farmer_id),
+     'ix_farm_inventory_farmer_id', False),
+    ('admin dashboard: latest pest reports',
+     select(PestPrediction).order_by(PestPrediction.timestamp.desc()).limit(10),
+     'ix_pest_prediction_timestamp', False),
+    ('pest trends: buckets since a date',
+     select(PestRollup.pest_type, PestRollup.bucket_start, func.sum(PestRollup.prediction_count))
+     .where(PestRollup.period == 'day', PestRollup.bucket_start >= date(2026, 1, 1))
+     .group_by(PestRollup.pest_type, PestRollup.bucket_start),
+     'sqlite_autoindex_pest_rollup_1', True),
+    ('farmer dashboard: inventory', select(FarmInventory).filter_by(farmer_id=1),
+     'ix_farm_inventory_farmer_id', False),
+    ('customer dashboard: orders', select(Order).filter_by(customer_id=1),
+     'ix_order_customer_id_order_date', False),
+    ('route planning: pending orders',
+     select(Order).filter(Order.status == 'pending', Order.delivery_district.isnot(None)),
+     'ix_order_status_delivery_district', False),
+    *marketplace_checks(),
+]
+
+
+def query_plan(statement):
+    sql = str(statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+    rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql)).fetchall()
+    return [row[-1] for row in rows]
+
+
+def check(name, statement, index, allow_sort):
+    plan = query_plan(statement)
+    problems = []
+    indexes = (index,) if isinstance(index, str) else index
+    if indexes and not any(f'INDEX {candidate} ' in step + ' ' for candidate in indexes for step in plan):
+        problems.append(f"does not use {' or '.join(indexes)}")
+    if not allow_sort and any('TEMP B-TREE' in step for step in plan):
+        problems.append('sorts in a temp b-tree')
+    return plan, problems
+
+
+def main():
+    failed = 0
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            print(f'Query plan checks are written for SQLite, not {db.engine.dialect.name}')
+            return 0
+        for name, statement, index, allow_sort in CHECKS:
+            plan, problems = check(name, statement, index, allow_sort)
+            status = 'FAIL' if problems else 'ok'
+            print(f"{status:4}  {name}: {' | '.join(plan)}")
+            for problem in problems:
+                print(f'      {problem}')
+            failed += bool(problems)
+
+    print(f'{len(CHECKS) - failed}/{len(CHECKS)} queries use their indexes')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
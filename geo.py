@@ -0,0 +1,207 @@
+# geo.py
+import threading
+
+import numpy as np
+
+# Mean earth radius used by the haversine package, so results match haversine(..., unit=Unit.KILOMETERS)
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_matrix(origins, destinations):
+    """
+    Great-circle distances in km between every origin and every destination.
+
+    origins is an (n, 2) and destinations an (m, 2) array-like of
+    (latitude, longitude) in degrees; the result is an (n, m) array computed
+    with one broadcasted NumPy expression instead of n * m Python calls.
+    """
+    origins = np.radians(np.asarray(origins, dtype=np.float64).reshape(-1, 2))
+    destinations = np.radians(np.asarray(destinations, dtype=np.float64).reshape(-1, 2))
+
+    lat1 = origins[:, 0][:, np.newaxis]
+    lng1 = origins[:, 1][:, np.newaxis]
+    lat2 = destinations[:, 0][np.newaxis, :]
+    lng2 = destinations[:, 1][np.newaxis, :]
+
+    d = (np.sin((lat2 - lat1) * 0.5) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) * 0.5) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(d))
+
+
+def warehouse_distance_matrix(locations, warehouses):
+    """Distances from each row of `locations` to each row of `warehouses` (both with Latitude/Longitude columns)."""
+    return haversine_matrix(
+        locations[['Latitude', 'Longitude']].to_numpy(),
+        warehouses[['Latitude', 'Longitude']].to_numpy()
+    )
+
+
+# Comprehensive district coordinates (more accurate representation)
+DISTRICT_COORDINATES = {
+    # Province 1
+    "Bhojpur": (26.9302, 87.0372), "Dhankuta": (26.9862, 87.0919), 
+    "Ilam": (26.9092, 88.0841), "Jhapa": (26.7271, 88.0845), 
+    "Khotang": (27.1838, 86.7819), "Morang": (26.5333, 87.2667), 
+    "Okhaldunga": (27.3175, 86.5314), "Panchthar": (27.0769, 87.9183), 
+    "Sankhuwasabha": (27.2667, 87.2333), "Solukhumbu": (27.7900, 86.5400), 
+    "Sunsari": (26.6276, 87.1822), "Taplejung": (27.3552, 87.6689), 
+    "Tehrathum": (27.1831, 87.4269), "Udayapur": (26.8406, 86.8406),
+
+    # Province 2
+    "Bara": (26.7272, 85.9300), "Dhanusa": (26.8350, 86.0122), 
+    "Mahottari": (26.7333, 86.0667), "Parsa": (27.0667, 84.8833), 
+    "Rautahat": (26.6667, 86.1667), "Sarlahi": (26.7333, 85.8333), 
+    "Saptari": (26.5667, 86.7333), "Siraha": (26.6667, 86.2167),
+
+    # Province 3 (Bagmati)
+    "Bhaktapur": (27.6712, 85.4298), "Dhading": (28.0833, 84.8833), 
+    "Kathmandu": (27.7103, 85.3222), "Kavrepalanchok": (27.5333, 85.5333), 
+    "Lalitpur": (27.6589, 85.3378), "Nuwakot": (28.1667, 85.2667), 
+    "Rasuwa": (28.1667, 85.4167), "Sindhuli": (27.3333, 86.0333), 
+    "Sindhupalchok": (27.8333, 85.7500),
+
+    # Province 4 (Gandaki)
+    "Gorkha": (27.9842, 84.6270), "Kaski": (28.2622, 84.0167), 
+    "Lamjung": (28.2333, 84.3667), "Manang": (28.6667, 84.0333), 
+    "Mustang": (28.8333, 83.7667), "Myagdi": (28.3667, 83.7667), 
+    "Nawalpur": (27.7000, 84.4333), "Parbat": (28.2333, 83.9667), 
+    "Syangja": (28.1167, 83.9000), "Tanahun": (28.0333, 84.3333),
+
+    # Province 5
+    "Arghakhanchi": (27.7500, 83.3833), "Banke": (28.1500, 81.7500), 
+    "Bardiya": (28.2000, 81.4333), "Dang": (28.0833, 82.3000), 
+    "Gulmi": (28.0833, 83.3000), "Kapilvastu": (27.5667, 83.0000), 
+    "Parasi": (27.5333, 83.3789), "Palpa": (28.1500, 83.5167), 
+    "Pyuthan": (28.1000, 82.8667), "Rolpa": (28.3816, 82.6483), 
+    "Rukum": (28.3500, 82.2000), "Rupandehi": (27.5330, 83.3789),
+
+    # Province 6 (Karnali)
+    "Dailekh": (28.8500, 81.7000), "Dolpa": (29.0333, 82.8333), 
+    "Humla": (29.9667, 81.8167), "Jajarkot": (28.6167, 81.6833), 
+    "Jumla": (29.2889, 82.3018), "Kalikot": (28.8667, 81.6167), 
+    "Mugu": (29.2500, 81.9833), "Rukum East": (28.3816, 82.6483), 
+    "Salyan": (28.3500, 81.9667), "Surkhet": (28.6167, 81.6500),
+
+    # Province 7
+    "Achham": (29.0396, 81.2519), "Baitadi": (29.3333, 80.5833), 
+    "Bajhang": (29.5167, 81.3000), "Bajura": (29.4833, 81.5167), 
+    "Dadeldhura": (29.2188, 80.4994), "Darchula": (29.8667, 80.5667), 
+    "Doti": (29.0000, 81.4000), "Kailali": (28.7000, 80.9667), 
+    "Kanchanpur": (28.9333, 80.5667)
+}
+
+DEFAULT_DISTRICT = 'Kathmandu'
+
+
+class DistrictIndex:
+    """
+    Precomputed geometry for a fixed set of districts: the all-pairs
+    distance matrix, each district's neighbours ordered by distance and a
+    BallTree for nearest-district queries at arbitrary coordinates.
+    """
+
+    def __init__(self, coordinates):
+        self.names = list(coordinates)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.coordinates = np.array([coordinates[name] for name in self.names], dtype=np.float64)
+
+        self.distances = haversine_matrix(self.coordinates, self.coordinates)
+        self.neighbours = self._neighbours(self.distances)
+
+        self._tree = None
+        self._tree_lock = threading.Lock()
+        self._site_indexes = {}
+
+    @staticmethod
+    def _neighbours(distances):
+        # Neighbours of each district by distance, itself excluded. A stable
+        # sort keeps ties in table order, like min() over the original dict.
+        masked = distances.copy()
+        np.fill_diagonal(masked, np.inf)
+        return np.argsort(masked, axis=1, kind='stable')[:, :-1]
+
+    @property
+    def tree(self):
+        # Built on first use; sklearn is only needed for arbitrary-point queries
+        if self._tree is None:
+            with self._tree_lock:
+                if self._tree is None:
+                    from sklearn.neighbors import BallTree
+                    self._tree = BallTree(np.radians(self.coordinates), metric='haversine')
+        return self._tree
+
+    def __contains__(self, district):
+        return district in self.positions
+
+    def position(self, district):
+        return self.positions.get(district)
+
+    def location(self, district):
+        """(lat, lng) of a district, falling back to the default district."""
+        i = self.positions.get(district)
+        if i is None:
+            i = self.positions[DEFAULT_DISTRICT]
+        return tuple(self.coordinates[i].tolist())
+
+    def distance(self, origin, destination):
+        return float(self.distances[self.positions[origin], self.positions[destination]])
+
+    def nearest_district(self, district, k=1):
+        """The k closest other districts to a known district."""
+        return [self.names[j] for j in self.neighbours[self.positions[district], :k]]
+
+    def nearest_to_point(self, lat, lng, k=1):
+        """(district, km) pairs for the k districts closest to an arbitrary point."""
+        distances, indexes = self.tree.query(np.radians([[lat, lng]]), k=k)
+        return [
+            (self.names[j], float(d * EARTH_RADIUS_KM))
+            for d, j in zip(distances[0], indexes[0])
+        ]
+
+    def sites(self, sites_df, version=None):
+        """
+        SiteIndex restricting "nearest" to the given warehouse sites, cached
+        per version so callers can pass the same artifacts on every request.
+        """
+        key = version if version is not None else id(sites_df)
+        index = self._site_indexes.get(key)
+        if index is None:
+            index = SiteIndex(self, sites_df)
+            self._site_indexes = {key: index}
+        return index
+
+    def site_distances(self, site_coordinates):
+        """(districts x sites) distance matrix used by SiteIndex."""
+        return haversine_matrix(self.coordinates, site_coordinates)
+
+    def site_hours(self, site_coordinates):
+        # Straight-line indexes have no travel times; callers derive them from distance
+        return None
+
+
+class SiteIndex:
+    """Nearest warehouse site for every district, precomputed as one array."""
+
+    def __init__(self, districts, sites_df):
+        sites = sites_df.drop_duplicates(subset=['District']).reset_index(drop=True)
+        self.names = sites['District'].tolist()
+        self.coordinates = sites[['Latitude', 'Longitude']].to_numpy(dtype=np.float64)
+
+        self.districts = districts
+        self.distances = districts.site_distances(self.coordinates)
+        self.hours = districts.site_hours(self.coordinates)
+        self.nearest = np.argmin(self.distances, axis=1)
+
+    def nearest_site(self, district):
+        """(site name, (lat, lng), km, hours or None) of the site closest to a district."""
+        i = self.districts.positions.get(district)
+        if i is None:
+            # Unknown districts are priced from the default district
+            i = self.districts.positions[DEFAULT_DISTRICT]
+        j = self.nearest[i]
+        hours = float(self.hours[i, j]) if self.hours is not None else None
+        return self.names[j], tuple(self.coordinates[j].tolist()), float(self.distances[i, j]), hours
+
+
+DISTRICTS = DistrictIndex(DISTRICT_COORDINATES)
+SORTED_DISTRICTS = sorted(DISTRICTS.names)
@@ -0,0 +1,19 @@
+# gunicorn.conf.py
+import os
+
+from serving import init_worker, worker_count
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = worker_count()
+# Threads let concurrent pest uploads in one worker share a model batch
+worker_class = 'gthread'
+threads = int(os.environ.get('WORKER_THREADS', 4))
+# Load the app and models in the master, then fork the workers from it
+preload_app = True
+# Bulk uploads and warehouse CSVs can take a while
+timeout = int(os.environ.get('WORKER_TIMEOUT', 120))
+graceful_timeout = 30
+
+
+def post_fork(server, worker):
+    init_worker(server.cfg.workers)
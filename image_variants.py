@@ -0,0 +1,118 @@
+# image_variants.py
+import os
+import tempfile
+import threading
+
+from PIL import Image, features
+
+WIDTHS = (160, 320, 640, 1280)
+SOURCE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+# format -> (Pillow encoder, file extension)
+FORMATS = {'webp': ('WEBP', 'webp'), 'jpeg': ('JPEG', 'jpg')}
+
+
+class ImageVariants:
+    """
+    Resized WebP and JPEG copies of stored images at a few fixed widths,
+    kept on disk beside the original as ab/cd/<sha256>-w320.webp. All of
+    them are built on the upload storage's worker threads once a file is
+    stored (register build_all with on_stored); a request that arrives
+    first renders just the variant it asked for. Images are never scaled
+    up, so a variant can be narrower than its nominal width.
+    """
+
+    def __init__(self, storage, widths=WIDTHS, quality=80):
+        self.storage = storage
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        self.formats = [fmt for fmt in FORMATS if fmt != 'webp' or features.check('webp')]
+        self._lock = threading.Lock()
+        self.built = 0
+        self.built_on_request = 0
+        self.failed = 0
+
+    def applies_to(self, name):
+        return (self.storage.is_stored_name(name) and '-' not in name.rsplit('/', 1)[-1]
+                and name.rsplit('.', 1)[-1].lower() in SOURCE_EXTENSIONS)
+
+    def width_for(self, requested):
+        """The smallest fixed width that covers `requested` pixels."""
+        for width in self.widths:
+            if width >= requested:
+                return width
+        return self.widths[-1]
+
+    def variant_name(self, name, width, fmt):
+        return f"{name.rsplit('.', 1)[0]}-w{width}.{FORMATS[fmt][1]}"
+
+    def build_all(self, storage, name):
+        if not self.applies_to(name):
+            return
+        try:
+            with Image.open(storage.path(name)) as image:
+                image = self._decode(image, self.widths[-1])
+                # Largest first, each width resized from the one before it
+                for width in reversed(self.widths):
+                    image = self._shrink(image, width)
+                    for fmt in self.formats:
+                        self._save(image, self.variant_name(name, width, fmt), fmt)
+        except OSError:
+            # Not a decodable image; the original is still served as is
+            with self._lock:
+                self.failed += 1
+            return
+        with self._lock:
+            self.built += 1
+
+    def get(self, name, width, fmt):
+        """
+        Name of the variant of `name` for a display `width`, rendering it
+        first if the background build has not got to it yet.
+        """
+        if fmt not in self.formats:
+            fmt = 'jpeg'
+        width = self.width_for(width)
+        variant = self.variant_name(name, width, fmt)
+        if not os.path.exists(self.storage.path(variant)):
+            with Image.open(self.storage.path(name)) as image:
+                self._save(self._shrink(self._decode(image, width), width), variant, fmt)
+            with self._lock:
+                self.built_on_request += 1
+        return variant
+
+    @staticmethod
+    def _decode(image, width):
+        if image.format == 'JPEG' and image.width > width:
+            # Let libjpeg scale down by 1/2, 1/4 or 1/8 while decoding
+            height = image.height * width // image.width
+            image.draft('RGB', (width, height))
+        return image.convert('RGB')
+
+    @staticmethod
+    def _shrink(image, width):
+        if image.width <= width:
+            return image
+        height = max(1, round(image.height * width / image.width))
+        return image.resize((width, height), Image.LANCZOS)
+
+    def _save(self, image, variant, fmt):
+        target = self.storage.path(variant)
+        # Write beside the target and rename, so a reader never sees half a file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                image.save(out, FORMATS[fmt][0], quality=self.quality)
+            os.replace(temp_path, target)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def stats(self):
+        with self._lock:
+            return {
+                'widths': list(self.widths),
+                'formats': self.formats,
+                'built': self.built,
+                'built_on_request': self.built_on_request,
+                'failed': self.failed,
+            }
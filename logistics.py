@@ -0,0 +1,119 @@
+# logistics.py
+import numpy as np
+import pandas as pd
+
+from geo import DEFAULT_DISTRICT, DISTRICTS
+
+BASE_DELIVERY_RATE = 50  # NPR per km base rate
+WEIGHT_RATE = 10  # Additional NPR per kg
+QUANTITY_RATE = 5  # Additional NPR per unit
+AVG_SPEED = 40  # km/h considering Nepalese terrain
+
+QUOTE_COLUMNS = [
+    'nearest_warehouse', 'estimated_distance', 'estimated_time',
+    'distance_cost', 'weight_cost', 'quantity_cost', 'total_cost'
+]
+
+
+def delivery_costs(distance, weight, quantity):
+    """Cost breakdown for scalars or NumPy arrays of the same shape."""
+    distance_cost = distance * BASE_DELIVERY_RATE
+    weight_cost = weight * WEIGHT_RATE
+    quantity_cost = quantity * QUANTITY_RATE
+    return {
+        'distance_cost': distance_cost,
+        'weight_cost': weight_cost,
+        'quantity_cost': quantity_cost,
+        'total_cost': distance_cost + weight_cost + quantity_cost,
+    }
+
+
+def _non_negative(value):
+    # bool is an int subclass, but a weight of true is a client mistake
+    if isinstance(value, bool):
+        return False
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return False
+    return np.isfinite(number) and number >= 0
+
+
+def check_orders(orders, network=DISTRICTS, offset=0):
+    """
+    Raise ValueError for the first order in a DataFrame that cannot be
+    priced: delivery_district must name a district of the network, and
+    product_quantity and product_weight must be non-negative numbers.
+    Orders are numbered from `offset` in the message.
+    """
+    for column in ('delivery_district', 'product_quantity', 'product_weight'):
+        if column not in orders.columns:
+            raise ValueError(f'Orders need a {column} column')
+
+    known = orders['delivery_district'].map(lambda d: isinstance(d, str) and d in network.positions)
+    if not known.all():
+        n = int(np.argmin(known.to_numpy()))
+        raise ValueError(f"orders[{offset + n}] has an unknown delivery_district: {orders['delivery_district'].iloc[n]!r}")
+    for column in ('product_quantity', 'product_weight'):
+        valid = orders[column].map(_non_negative)
+        if not valid.all():
+            n = int(np.argmin(valid.to_numpy()))
+            raise ValueError(f'orders[{offset + n}] {column} must be a non-negative number')
+
+
+def nearest_origins(delivery_districts, sites=None, network=DISTRICTS):
+    """
+    Vectorized nearest-warehouse lookup. Returns arrays of warehouse names,
+    distances in km and travel hours (None when the network has no travel
+    times) for a sequence of delivery districts, matching the single-order
+    /logistics rules (unknown districts count as Kathmandu).
+    """
+    positions = pd.Series(delivery_districts).map(network.positions)
+    known = positions.notna().to_numpy()
+    rows = positions.fillna(network.positions[DEFAULT_DISTRICT]).to_numpy(dtype=np.intp)
+
+    if sites is not None:
+        columns = sites.nearest[rows]
+        names = np.asarray(sites.names, dtype=object)[columns]
+        distances = sites.distances[rows, columns]
+        hours = sites.hours[rows, columns] if sites.hours is not None else None
+        return names, distances, hours
+
+    columns = network.neighbours[rows, 0]
+    names = np.asarray(network.names, dtype=object)[columns]
+    distances = network.distances[rows, columns].astype(np.float64)
+    hours = getattr(network, 'hours', None)
+    hours = hours[rows, columns].astype(np.float64) if hours is not None else None
+    # An unknown district is priced from Kathmandu itself, at zero distance
+    names[~known] = DEFAULT_DISTRICT
+    distances = np.where(known, distances, 0.0)
+    if hours is not None:
+        hours = np.where(known, hours, 0.0)
+    return names, distances, hours
+
+
+def quote_deliveries(orders, sites=None, network=DISTRICTS):
+    """
+    Price many deliveries in one vectorized pass.
+
+    orders is a DataFrame with delivery_district, product_quantity and
+    product_weight columns (any other columns, e.g. an order id, are passed
+    through). network is DISTRICTS for straight-line distances or a
+    RoadNetwork. Returns a copy with the QUOTE_COLUMNS appended. Orders
+    are not validated here; run check_orders first on untrusted input.
+    """
+    quotes = orders.copy()
+    quantity = pd.to_numeric(quotes.get('product_quantity', 0), errors='coerce')
+    weight = pd.to_numeric(quotes.get('product_weight', 0), errors='coerce')
+    quantity = np.nan_to_num(np.broadcast_to(quantity, len(quotes)).astype(float))
+    weight = np.nan_to_num(np.broadcast_to(weight, len(quotes)).astype(float))
+
+    names, distances, hours = nearest_origins(quotes['delivery_district'], sites, network)
+    if hours is None:
+        hours = distances / AVG_SPEED
+    quotes['nearest_warehouse'] = names
+    quotes['estimated_distance'] = np.round(distances, 2)
+    quotes['estimated_time'] = np.round(hours, 2)
+    for column, values in delivery_costs(distances, weight, quantity).items():
+        quotes[column] = np.round(values, 2)
+    return quotes
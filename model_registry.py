@@ -0,0 +1,103 @@
+# model_registry.py
+import os
+import threading
+import time
+
+
+def _rss_bytes():
+    # Resident set size of this process, used to estimate what a model costs to keep warm
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ModelRegistry:
+    """
+    Builds each registered model once per process and hands the same
+    instance to every caller. Models are loaded lazily on first use,
+    or eagerly through preload() at startup.
+    """
+
+    def __init__(self):
+        # Re-entrant so a factory can pull in another registered model
+        self._lock = threading.RLock()
+        self._factories = {}
+        self._models = {}
+        self._stats = {}
+
+    def register(self, name, factory):
+        self._factories[name] = factory
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            model = self._models.get(name)
+            if model is None:
+                model = self._load(name)
+        return model
+
+    def _load(self, name):
+        factory = self._factories[name]
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        model = factory()
+        load_seconds = time.perf_counter() - started
+
+        self._models[name] = model
+        self._stats[name] = {
+            'loaded_at': time.time(),
+            'load_seconds': round(load_seconds, 3),
+            'rss_delta_bytes': max(_rss_bytes() - rss_before, 0),
+        }
+        return model
+
+    def preload(self, *names):
+        for name in names or list(self._factories):
+            self.get(name)
+
+    def unload(self, name):
+        with self._lock:
+            model = self._models.pop(name, None)
+            self._stats.pop(name, None)
+        if hasattr(model, 'close'):
+            model.close()
+
+    def retire(self, *names):
+        """
+        Drop models so the next get() builds fresh ones, and close the old
+        instances on a background thread; callers still holding them can
+        finish what they started.
+        """
+        with self._lock:
+            retired = [self._models.pop(name, None) for name in names]
+            for name in names:
+                self._stats.pop(name, None)
+
+        def close():
+            for model in retired:
+                if hasattr(model, 'close'):
+                    model.close()
+
+        threading.Thread(target=close, name='model-retire', daemon=True).start()
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def stats(self):
+        return {
+            'process_rss_bytes': _rss_bytes(),
+            'models': {
+                name: dict(self._stats.get(name, {}), loaded=name in self._models)
+                for name in self._factories
+            },
+        }
+
+
+models = ModelRegistry()
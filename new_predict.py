@@ -1,6 +1,6 @@
 import pandas as pd
 import pickle
-from haversine import haversine, Unit
+from warehouse_prediction import assign_optimal_warehouses, significant_warehouses
 
 # Load new data and fixed warehouse data
 new_data = pd.read_csv('new_data_with_categories.csv')
@@ -28,27 +28,8 @@ print(merged_data[merged_data['Latitude'].isna() | merged_data['Longitude'].isna
 # Remove rows with missing coordinates
 clean_data = merged_data.dropna(subset=['Latitude', 'Longitude']).copy()
 
-# Calculate distances (only for valid coordinates)
-def calculate_distances(row):
-    return [
-        haversine((row['Latitude'], row['Longitude']), 
-                 (wh['Latitude'], wh['Longitude']), unit=Unit.KILOMETERS)
-        for _, wh in warehouses.iterrows()
-    ]
-
-# Create distance matrix
-new_distances = clean_data.apply(calculate_distances, axis=1)
-distance_df = pd.DataFrame(
-    new_distances.tolist(),
-    columns=warehouses['District']
-)
-
-# Scale features and predict
-scaled_data = scaler.transform(distance_df)
-clean_data['Optimal Warehouse'] = [warehouses.iloc[cluster]['District'] 
-                                  for cluster in model.predict(scaled_data)]
+# Distance matrix, scaling and clustering (only for valid coordinates)
+clean_data['Optimal Warehouse'] = assign_optimal_warehouses(clean_data, model, scaler, warehouses)
 
 # Get significant warehouses (top 25%)
-warehouse_counts = clean_data['Optimal Warehouse'].value_counts()
-threshold = warehouse_counts.quantile(0.75)
-significant_warehouses = warehouse_counts[warehouse_counts >= threshold].index.tolist()
\ No newline at end of file
+significant_warehouses = significant_warehouses(clean_data['Optimal Warehouse'].value_counts())
\ No newline at end of file
@@ -0,0 +1,118 @@
+# pest_backends.py
+import copy
+import glob
+import importlib.util
+import os
+import re
+
+import torch
+import torch.nn as nn
+
+BACKENDS = ('eager', 'torchscript', 'dynamic_int8', 'static_int8', 'onnx')
+IMAGE_PATTERNS = ('*.jpg', '*.jpeg', '*.png')
+VARIANT_NAME = re.compile(r'-w\d+\.\w+$')
+
+
+def sample_images(folder='static/uploads', limit=None):
+    # Uploads are sharded (ab/cd/<sha256>.jpg), so search the whole tree;
+    # resized variants (<sha256>-w320.jpg) would only repeat their originals
+    paths = sorted(
+        path
+        for pattern in IMAGE_PATTERNS
+        for path in glob.glob(os.path.join(folder, '**', pattern), recursive=True)
+        if not VARIANT_NAME.search(os.path.basename(path))
+    )
+    return paths[:limit] if limit else paths
+
+
+def build_eager(model, example_input, calibration=None):
+    return model
+
+
+def build_torchscript(model, example_input, calibration=None):
+    # Trace + freeze folds batchnorm into the convolutions and drops the
+    # Python dispatch overhead of the eager model
+    with torch.inference_mode():
+        traced = torch.jit.trace(model, example_input)
+    return torch.jit.optimize_for_inference(torch.jit.freeze(traced.eval()))
+
+
+def build_dynamic_int8(model, example_input, calibration=None):
+    # Dynamic quantization only covers Linear layers, so for ResNet-50 this
+    # mostly shrinks the classifier head; static_int8 covers the convolutions
+    return torch.ao.quantization.quantize_dynamic(
+        copy.deepcopy(model), {nn.Linear}, dtype=torch.qint8
+    )
+
+
+def build_static_int8(model, example_input, calibration=None):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+
+    if not calibration:
+        raise ValueError("static_int8 needs calibration images")
+
+    prepared = prepare_fx(
+        copy.deepcopy(model).eval(),
+        get_default_qconfig_mapping('x86'),
+        (example_input,)
+    )
+    with torch.inference_mode():
+        for batch in calibration:
+            prepared(batch)
+    return convert_fx(prepared)
+
+
+class OnnxRunner:
+    def __init__(self, onnx_path):
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(
+            onnx_path, options, providers=['CPUExecutionProvider']
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, batch):
+        outputs = self.session.run(None, {self.input_name: batch.cpu().numpy()})
+        return torch.from_numpy(outputs[0])
+
+
+def build_onnx(model, example_input, calibration=None, onnx_path='best_model.onnx',
+               source_path=None):
+    # torch.onnx.export fails with a RuntimeError without the onnx package;
+    # report both as ImportError, like the other optional backends
+    missing = [name for name in ('onnx', 'onnxruntime') if importlib.util.find_spec(name) is None]
+    if missing:
+        raise ImportError(f"The onnx backend needs {' and '.join(missing)} installed")
+
+    # Re-export whenever the PyTorch weights are newer than the cached graph
+    stale = (
+        not os.path.exists(onnx_path)
+        or (source_path and os.path.getmtime(source_path) > os.path.getmtime(onnx_path))
+    )
+    if stale:
+        torch.onnx.export(
+            model, example_input, onnx_path,
+            input_names=['image'], output_names=['logits'],
+            dynamic_axes={'image': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=17, dynamo=False
+        )
+    return OnnxRunner(onnx_path)
+
+
+BUILDERS = {
+    'eager': build_eager,
+    'torchscript': build_torchscript,
+    'dynamic_int8': build_dynamic_int8,
+    'static_int8': build_static_int8,
+    'onnx': build_onnx,
+}
+
+
+def build_backend(name, model, example_input, calibration=None, **options):
+    """Return a callable mapping an image batch tensor to class logits."""
+    if name not in BUILDERS:
+        raise ValueError(f"Unknown pest backend '{name}', expected one of {', '.join(BACKENDS)}")
+    return BUILDERS[name](model, example_input, calibration, **options)
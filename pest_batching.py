@@ -0,0 +1,147 @@
+# pest_batching.py
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+_STOP = object()
+
+
+class PredictorClosed(RuntimeError):
+    """The predictor was closed (e.g. the model was reloaded); get a fresh one and retry."""
+
+
+class BatchingPredictor:
+    """
+    Collects pest images that arrive within a short window and runs them
+    through the detector as one batch. Callers block until their own
+    result is ready, so it can be used anywhere PestDetector.predict is.
+    """
+
+    def __init__(self, detector, max_batch_size=16, max_wait_ms=15, preprocess_workers=2):
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = queue.Queue()
+        # Image decoding releases the GIL, so a small pool keeps the next
+        # batch's preprocessing running while the current batch is in the model
+        self._preprocess_pool = ThreadPoolExecutor(preprocess_workers, thread_name_prefix='pest-preprocess')
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._images = 0
+        self._largest_batch = 0
+        # Guards _closed so nothing is accepted once close() has begun
+        self._closing_lock = threading.Lock()
+        self._closed = False
+
+        self._worker = threading.Thread(target=self._run, name='pest-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, image_tensor):
+        future = Future()
+        with self._closing_lock:
+            if self._closed:
+                future.set_exception(PredictorClosed('Batching predictor is closed'))
+            else:
+                self._queue.put((image_tensor, future))
+        return future
+
+    def submit_image(self, source):
+        future = Future()
+
+        def preprocess():
+            try:
+                image_tensor = self.detector.preprocess(source)
+            except Exception as e:
+                future.set_exception(e)
+                return
+            self._queue.put((image_tensor, future))
+
+        with self._closing_lock:
+            if self._closed:
+                future.set_exception(PredictorClosed('Batching predictor is closed'))
+            else:
+                self._preprocess_pool.submit(preprocess)
+        return future
+
+    def predict(self, source, timeout=None):
+        return self.submit_image(source).result(timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size and batch[-1] is not _STOP:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+            if batch:
+                self._run_batch(batch)
+            if stopping:
+                return
+
+    def _run_batch(self, batch):
+        tensors = [tensor for tensor, _ in batch]
+
+        try:
+            results = self.detector.predict_batch(tensors)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+        with self._stats_lock:
+            self._batches += 1
+            self._images += len(batch)
+            self._largest_batch = max(self._largest_batch, len(batch))
+
+    def close(self):
+        """
+        Stop accepting images, finish the ones already accepted, then stop
+        the worker thread. Blocks until done, so call it off the request path.
+        """
+        with self._closing_lock:
+            if self._closed:
+                return
+            self._closed = True
+        # Running preprocess jobs still enqueue their tensors ahead of _STOP
+        self._preprocess_pool.shutdown(wait=True)
+        self._queue.put(_STOP)
+        self._worker.join()
+
+        # Nothing should be left, but never leave a caller waiting forever
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP and not item[1].done():
+                item[1].set_exception(PredictorClosed('Batching predictor is closed'))
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self._batches,
+                'images': self._images,
+                'mean_batch_size': round(self._images / self._batches, 2) if self._batches else 0,
+                'largest_batch': self._largest_batch,
+                'queued': self._queue.qsize(),
+            }
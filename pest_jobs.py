@@ -0,0 +1,131 @@
+# pest_jobs.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+class PestJob:
+    def __init__(self, images):
+        self.id = uuid.uuid4().hex
+        self.images = images
+        self.status = 'queued'
+        self.results = []
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.changed = threading.Condition()
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    def add_result(self, result):
+        with self.changed:
+            self.results.append(result)
+            self.changed.notify_all()
+
+    def finish(self, status, error=None):
+        with self.changed:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            self.changed.notify_all()
+
+    def to_dict(self, offset=0):
+        with self.changed:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'total': len(self.images),
+                'completed': len(self.results),
+                'error': self.error,
+                'offset': offset,
+                'results': self.results[offset:],
+            }
+
+    def iter_results(self, timeout=30):
+        # Yields results as they are produced until the job is finished
+        sent = 0
+        while True:
+            with self.changed:
+                while sent == len(self.results) and not self.done:
+                    if not self.changed.wait(timeout):
+                        break
+                pending = self.results[sent:]
+                finished = self.done
+            for result in pending:
+                yield result
+            sent += len(pending)
+            if finished and sent == len(self.results):
+                return
+
+
+class PestJobManager:
+    """
+    Runs bulk pest detection in the background. Images of a job are spread
+    over a worker pool, and finished predictions are handed to `persist`
+    in groups of `commit_every` so the database sees batched commits.
+    """
+
+    def __init__(self, predict, persist, max_workers=4, max_jobs=2,
+                 commit_every=25, keep_jobs=100):
+        self.predict = predict
+        self.persist = persist
+        self.commit_every = commit_every
+        self.keep_jobs = keep_jobs
+
+        self._images_pool = ThreadPoolExecutor(max_workers, thread_name_prefix='pest-image')
+        self._jobs_pool = ThreadPoolExecutor(max_jobs, thread_name_prefix='pest-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, images, **context):
+        """`images` is a list of (original_name, saved_path) tuples."""
+        job = PestJob(images)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.keep_jobs:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if not oldest.done:
+                    break
+                del self._jobs[oldest_id]
+
+        self._jobs_pool.submit(self._run, job, context)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _predict_one(self, name, path):
+        try:
+            prediction = self.predict(path)
+        except Exception as e:
+            return {'image': name, 'image_path': path, 'error': str(e)}
+        return dict(prediction, image=name, image_path=path)
+
+    def _run(self, job, context):
+        job.status = 'running'
+        pending = []
+        try:
+            futures = [
+                self._images_pool.submit(self._predict_one, name, path)
+                for name, path in job.images
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                job.add_result(result)
+                if 'error' not in result:
+                    pending.append(result)
+                if len(pending) >= self.commit_every:
+                    self.persist(pending, **context)
+                    pending = []
+
+            if pending:
+                self.persist(pending, **context)
+        except Exception as e:
+            job.finish('failed', str(e))
+            return
+        job.finish('done')
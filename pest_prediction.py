@@ -1,14 +1,18 @@
 # pest_detection.py
 import torch
 import torchvision.transforms as transforms
-from PIL import Image
 import os
 from torchvision import models
 import torch.nn as nn
+from pest_backends import build_backend, sample_images
+from pest_preprocessing import PreprocessStats, timed_preprocess
 
 class PestDetector:
-    def __init__(self, model_path='best_model.pth'):
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    def __init__(self, model_path='best_model.pth', backend=None, calibration_dir='static/uploads'):
+        self.backend = backend or os.environ.get('PEST_BACKEND', 'eager')
+        # The exported and quantized backends are CPU-only
+        use_cuda = torch.cuda.is_available() and self.backend == 'eager'
+        self.device = torch.device("cuda" if use_cuda else "cpu")
         
         self.class_names = [
             "Beet Armyworm", "Black Hairy", "Cutworm", "Field Cricket",
@@ -18,7 +22,8 @@ class PestDetector:
             "Termite odontotermes (Rambur)", "Yellow Mite"
         ]
         
-        self.model = models.resnet50(weights='IMAGENET1K_V2')
+        # Every weight is overwritten by best_model.pth, so skip the ImageNet download
+        self.model = models.resnet50(weights=None)
         num_classes = len(self.class_names)
         self.model.fc = nn.Sequential(
             nn.Dropout(0.5),
@@ -37,18 +42,46 @@ class PestDetector:
             transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
         ])
 
-    def predict(self, image_path):
-        image = Image.open(image_path).convert('RGB')
-        image_tensor = self.transform(image).unsqueeze(0).to(self.device)
-        
-        with torch.no_grad():
-            outputs = self.model(image_tensor)
+        self.preprocess_stats = PreprocessStats()
+
+        example_input = torch.zeros(1, 3, 224, 224, device=self.device)
+        calibration = None
+        if self.backend == 'static_int8':
+            calibration = [
+                self.preprocess(path).unsqueeze(0)
+                for path in sample_images(calibration_dir, limit=32)
+            ]
+        options = {}
+        if self.backend == 'onnx':
+            options = {
+                'onnx_path': os.path.splitext(model_path)[0] + '.onnx',
+                'source_path': model_path
+            }
+        self.runner = build_backend(self.backend, self.model, example_input, calibration, **options)
+
+    def preprocess(self, source):
+        # source can be a path, raw bytes or an uploaded file stream
+        return timed_preprocess(source, self.transform, self.preprocess_stats)
+
+    def predict_batch(self, image_tensors):
+        # The model is only read after __init__, so one instance can be
+        # shared by concurrent requests (inference_mode is thread-local)
+        batch = torch.stack(image_tensors).to(self.device)
+
+        with torch.inference_mode():
+            outputs = self.runner(batch)
             probabilities = torch.nn.functional.softmax(outputs, dim=1)
-            confidence, predicted = torch.max(probabilities, 1)
-            
-        return {
-            'pest_type': self.class_names[predicted.item()],
-            'confidence': confidence.item() * 100
-        }
+            confidences, predicted = torch.max(probabilities, 1)
+
+        return [
+            {
+                'pest_type': self.class_names[index],
+                'confidence': confidence * 100
+            }
+            for confidence, index in zip(confidences.tolist(), predicted.tolist())
+        ]
+
+    def predict(self, source):
+        return self.predict_batch([self.preprocess(source)])[0]
 
 # The rest of the code (PestPrediction model and routes) remains the same
\ No newline at end of file
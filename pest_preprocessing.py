@@ -0,0 +1,81 @@
+# pest_preprocessing.py
+import io
+import threading
+import time
+
+from PIL import Image
+
+
+def open_image(source):
+    """Open a path, raw bytes or a file-like upload stream without touching disk."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return Image.open(source)
+
+
+def load_image(source, min_side=256):
+    """
+    Decode an image just large enough for a Resize(min_side) transform.
+
+    JPEGs are decoded with draft mode, which lets libjpeg scale by 1/2, 1/4
+    or 1/8 while decoding, so a 12 MP phone photo never materialises at full
+    resolution. Other formats are shrunk with a cheap integer reduce() before
+    the antialiased resize. Returns the RGB image and the original size.
+    """
+    image = open_image(source)
+    original_size = image.size
+
+    if image.format == 'JPEG':
+        image.draft('RGB', (min_side, min_side))
+
+    image = image.convert('RGB')
+
+    factor = min(image.size) // min_side
+    if factor >= 2:
+        image = image.reduce(factor)
+    return image, original_size
+
+
+class PreprocessStats:
+    """Running totals of per-stage preprocessing time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.images = 0
+        self.decode_seconds = 0.0
+        self.transform_seconds = 0.0
+        self.source_pixels = 0
+        self.decoded_pixels = 0
+
+    def record(self, decode_seconds, transform_seconds, original_size, decoded_size):
+        with self._lock:
+            self.images += 1
+            self.decode_seconds += decode_seconds
+            self.transform_seconds += transform_seconds
+            self.source_pixels += original_size[0] * original_size[1]
+            self.decoded_pixels += decoded_size[0] * decoded_size[1]
+
+    def to_dict(self):
+        with self._lock:
+            images = self.images or 1
+            return {
+                'images': self.images,
+                'mean_decode_ms': round(self.decode_seconds / images * 1000, 2),
+                'mean_transform_ms': round(self.transform_seconds / images * 1000, 2),
+                # Share of source pixels that were never decoded thanks to draft/reduce
+                'pixels_skipped_ratio': round(
+                    1 - self.decoded_pixels / self.source_pixels, 3
+                ) if self.source_pixels else 0,
+            }
+
+
+def timed_preprocess(source, transform, stats=None, min_side=256):
+    started = time.perf_counter()
+    image, original_size = load_image(source, min_side)
+    decoded = time.perf_counter()
+    tensor = transform(image)
+    finished = time.perf_counter()
+
+    if stats is not None:
+        stats.record(decoded - started, finished - decoded, original_size, image.size)
+    return tensor
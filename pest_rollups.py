@@ -0,0 +1,149 @@
+# pest_rollups.py
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, func, select
+
+PERIODS = ('day', 'week')
+UNKNOWN_LOCATION = ''  # predictions without a location are rolled up under ''
+
+
+def bucket_start(timestamp, period):
+    """First day of the day/week bucket a timestamp falls in; weeks start on Monday."""
+    day = timestamp.date() if isinstance(timestamp, datetime) else timestamp
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def rollup_keys(prediction):
+    if prediction.timestamp is None:
+        return []
+    location = (prediction.location or UNKNOWN_LOCATION).strip()
+    return [
+        (period, bucket_start(prediction.timestamp, period), prediction.pest_type, location)
+        for period in PERIODS
+    ]
+
+
+def rollup_changes(before=None, after=None):
+    """
+    {(period, bucket, pest, location): (count delta, confidence delta)} for a
+    prediction going from `before` to `after` (None for insert/delete).
+    """
+    counts = Counter()
+    confidence = defaultdict(float)
+    for row, sign in ((before, -1), (after, 1)):
+        if row is None:
+            continue
+        for key in rollup_keys(row):
+            counts[key] += sign
+            confidence[key] += sign * (row.confidence_score or 0.0)
+    return {
+        key: (counts[key], confidence[key])
+        for key in counts.keys() | confidence.keys()
+        if counts[key] or confidence[key]
+    }
+
+
+def apply_rollup_changes(connection, rollup_table, changes):
+    # Runs on the flush connection, so the rollups commit or roll back with the prediction
+    c = rollup_table.c
+    for (period, bucket, pest_type, location), (count, confidence) in changes.items():
+        updated = connection.execute(
+            rollup_table.update()
+            .where(c.period == period, c.bucket_start == bucket,
+                   c.pest_type == pest_type, c.location == location)
+            .values(prediction_count=c.prediction_count + count, confidence_sum=c.confidence_sum + confidence)
+        )
+        if updated.rowcount == 0:
+            connection.execute(rollup_table.insert().values(
+                period=period, bucket_start=bucket, pest_type=pest_type, location=location,
+                prediction_count=count, confidence_sum=confidence
+            ))
+
+
+def compact_rollups(connection, rollup_table, prediction_table, since=None):
+    """
+    Recompute the rollups from the raw predictions, for buckets starting on
+    or after `since` (a date) or for all of them. Catches up rows written
+    outside the ORM and drops buckets whose predictions are gone.
+    Returns the number of rollup rows written.
+    """
+    p = prediction_table.c
+    day = func.date(p.timestamp)
+    # SQLite date modifiers: forward to the week's Sunday, then back to its Monday
+    week = func.date(p.timestamp, 'weekday 0', '-6 days')
+    location = func.trim(func.coalesce(p.location, UNKNOWN_LOCATION))
+
+    written = 0
+    for period, bucket in (('day', day), ('week', week)):
+        delete = rollup_table.delete().where(rollup_table.c.period == period)
+        query = select(
+            bucket.label('bucket_start'), p.pest_type, location.label('location'),
+            func.count().label('prediction_count'), func.sum(p.confidence_score).label('confidence_sum')
+        ).where(p.timestamp.isnot(None))
+        if since is not None:
+            since_bucket = bucket_start(since, period)
+            delete = delete.where(rollup_table.c.bucket_start >= since_bucket)
+            query = query.where(p.timestamp >= datetime.combine(since_bucket, datetime.min.time()))
+        connection.execute(delete)
+
+        rows = [
+            {'period': period, 'bucket_start': date.fromisoformat(row.bucket_start),
+             'pest_type': row.pest_type, 'location': row.location,
+             'prediction_count': row.prediction_count, 'confidence_sum': row.confidence_sum or 0.0}
+            for row in connection.execute(query.group_by(bucket, p.pest_type, location))
+        ]
+        if rows:
+            connection.execute(rollup_table.insert(), rows)
+        written += len(rows)
+    return written
+
+
+def _window(model, period, since=None, until=None, pest_type=None, location=None):
+    conditions = [model.period == period, model.prediction_count > 0]
+    if since is not None:
+        conditions.append(model.bucket_start >= bucket_start(since, period))
+    if until is not None:
+        conditions.append(model.bucket_start <= until)
+    if pest_type:
+        conditions.append(model.pest_type == pest_type)
+    if location is not None:
+        conditions.append(model.location == location)
+    return and_(*conditions)
+
+
+def outbreak_trends(session, model, period='day', **window):
+    """{pest: [{bucket, count, avg_confidence}, ...]} in bucket order, summed over locations."""
+    rows = session.execute(
+        select(model.pest_type, model.bucket_start,
+               func.sum(model.prediction_count), func.sum(model.confidence_sum))
+        .where(_window(model, period, **window))
+        .group_by(model.pest_type, model.bucket_start)
+        .order_by(model.pest_type, model.bucket_start)
+    )
+    trends = defaultdict(list)
+    for pest_type, bucket, count, confidence in rows:
+        trends[pest_type].append({
+            'bucket': bucket.isoformat(),
+            'count': count,
+            'avg_confidence': round(confidence / count, 2),
+        })
+    return dict(trends)
+
+
+def outbreak_heatmap(session, model, period='week', **window):
+    """[{location, pest_type, count, avg_confidence}, ...], busiest first."""
+    count = func.sum(model.prediction_count)
+    rows = session.execute(
+        select(model.location, model.pest_type, count, func.sum(model.confidence_sum))
+        .where(_window(model, period, **window))
+        .group_by(model.location, model.pest_type)
+        .order_by(count.desc(), model.location, model.pest_type)
+    )
+    return [
+        {'location': location or None, 'pest_type': pest_type, 'count': total,
+         'avg_confidence': round(confidence / total, 2)}
+        for location, pest_type, total, confidence in rows
+    ]
@@ -0,0 +1,106 @@
+# prediction_cache.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def image_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def file_version(path, tag=''):
+    # Size + mtime is enough to notice a retrained best_model.pth without
+    # hashing hundreds of MB on every check
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return f"{tag}:missing"
+    return f"{tag}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class PredictionCache:
+    """
+    Content-addressed cache of pest predictions keyed by image hash and
+    model version. Recent entries live in an in-memory LRU; `disk_lookup`
+    can serve older ones (e.g. from the PestPrediction table). When the
+    model file changes every entry is dropped and `on_invalidate` runs.
+    """
+
+    def __init__(self, model_path, tag='', max_entries=1024, disk_lookup=None,
+                 on_invalidate=None, check_interval=2.0):
+        self.model_path = model_path
+        self.tag = tag
+        self.max_entries = max_entries
+        self.disk_lookup = disk_lookup
+        self.on_invalidate = on_invalidate
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = file_version(model_path, tag)
+        self._checked_at = time.monotonic()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def version(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._version
+
+        current = file_version(self.model_path, self.tag)
+        invalidated = False
+        with self._lock:
+            self._checked_at = now
+            if current != self._version:
+                self._version = current
+                self._entries.clear()
+                self.invalidations += 1
+                invalidated = True
+        if invalidated and self.on_invalidate:
+            self.on_invalidate()
+        return current
+
+    def get(self, key):
+        version = self.version
+        with self._lock:
+            entry = self._entries.get((key, version))
+            if entry is not None:
+                self._entries.move_to_end((key, version))
+                self.hits += 1
+                return entry
+
+        entry = self.disk_lookup(key, version) if self.disk_lookup else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+        self.put(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        version = self.version
+        with self._lock:
+            self._entries[(key, version)] = entry
+            self._entries.move_to_end((key, version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'model_version': self._version,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_ratio': round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,135 @@
+# product_listing.py
+import base64
+import json
+
+from sqlalchemy import select, tuple_
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# sort key -> (column, descending). Every sort breaks ties on id in the same
+# direction, so (column, id) is a total order that the (column, id) indexes
+# can walk from any cursor without sorting.
+SORTS = {
+    'featured': ('id', False),
+    'price_asc': ('price', False),
+    'price_desc': ('price', True),
+    'rating': ('rating', True),
+    'latest': ('id', True),
+}
+
+# Labels used by the marketplace sort dropdown
+SORT_LABELS = {
+    'Sort by: Featured': 'featured',
+    'Price: Low to High': 'price_asc',
+    'Price: High to Low': 'price_desc',
+    'Rating: Highest': 'rating',
+    'Latest': 'latest',
+}
+
+
+def sort_key(option):
+    """Sort key for an API key or a dropdown label; unknown values mean featured."""
+    if option in SORTS:
+        return option
+    return SORT_LABELS.get(option, 'featured')
+
+
+def encode_cursor(value, row_id):
+    raw = json.dumps([value, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(sort value, id) from an opaque cursor; raises ValueError when it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid page cursor') from e
+    if not isinstance(row_id, int) or not (value is None or isinstance(value, (int, float, str))):
+        raise ValueError('Invalid page cursor')
+    return value, row_id
+
+
+def apply_filters(statement, model, in_stock=False, min_price=None, max_price=None, matching=None):
+    # matching is an extra SQL clause, e.g. restricting the page to search hits
+    if matching is not None:
+        statement = statement.where(matching)
+    if in_stock:
+        statement = statement.where(model.in_stock.is_(True))
+    if min_price is not None:
+        statement = statement.where(model.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(model.price <= max_price)
+    return statement
+
+
+def _ordered(statement, column, row_id, descending):
+    if column is row_id:
+        return statement.order_by(row_id.desc() if descending else row_id)
+    if descending:
+        return statement.order_by(column.desc(), row_id.desc())
+    return statement.order_by(column, row_id)
+
+
+def _after(column, value, row_id, last_id, descending):
+    # Row-value comparison, which SQLite turns into a range scan on (column, id)
+    if descending:
+        return tuple_(column, row_id) < tuple_(value, last_id)
+    return tuple_(column, row_id) > tuple_(value, last_id)
+
+
+def product_page(session, model, sort='featured', cursor=None, limit=DEFAULT_PAGE_SIZE, **filters):
+    """
+    One page of products in keyset order. Returns (products, next_cursor);
+    next_cursor is None on the last page. Filters are in_stock, min_price,
+    max_price and matching. Each page costs one index range scan of limit + 1 rows
+    however deep it is, unlike OFFSET which reads every skipped row.
+
+    Products without a value for the sort column (an unrated product) come
+    after all others; the cursor walks through them by id.
+    """
+    column_name, descending = SORTS[sort]
+    column = getattr(model, column_name)
+    row_id = model.id
+    nullable = model.__table__.c[column_name].nullable
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    base = apply_filters(select(model), model, **filters)
+    value, last_id = decode_cursor(cursor) if cursor else (None, None)
+
+    rows = []
+    if last_id is None or value is not None:
+        statement = base
+        if last_id is not None:
+            statement = statement.where(_after(column, value, row_id, last_id, descending))
+        elif nullable:
+            statement = statement.where(column.isnot(None))
+        rows = session.scalars(_ordered(statement, column, row_id, descending).limit(limit + 1)).all()
+
+    if nullable and len(rows) <= limit:
+        # The NULL tail, ordered by id alone
+        tail = base.where(column.is_(None))
+        if value is None and last_id is not None:
+            tail = tail.where(row_id < last_id if descending else row_id > last_id)
+        rows += session.scalars(_ordered(tail, row_id, row_id, descending).limit(limit + 1 - len(rows))).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, column_name), last.id)
+    return rows, next_cursor
+
+
+def product_json(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'price': product.price,
+        'rating': product.rating,
+        'description': product.description,
+        'image_url': product.image_url,
+        'in_stock': product.in_stock,
+    }
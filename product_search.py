@@ -0,0 +1,393 @@
+# product_search.py
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from sqlalchemy import Float, Integer, column, select, table, text, tuple_
+
+from change_counter import install_change_counter, read_change_counter
+from product_listing import apply_filters, decode_cursor, encode_cursor
+
+RELEVANCE = 'relevance'
+SEARCH_TABLE = 'product_fts'
+# Bumped by triggers on every product write, from any process or script
+VERSION_TABLE = f'{SEARCH_TABLE}_version'
+NAME_WEIGHT = 10.0  # a hit in the name counts ten times a hit in the description
+MAX_MATCHES = 30_000  # matches handed to SQL as an id list by the in-memory index
+
+_fts = table(SEARCH_TABLE, column('rowid', Integer), column('rank', Float), column(SEARCH_TABLE))
+
+
+def search_terms(query):
+    """Lower-cased word tokens, with accents stripped like FTS5's unicode61 tokenizer."""
+    text_ = unicodedata.normalize('NFKD', query or '')
+    text_ = ''.join(ch for ch in text_ if not unicodedata.combining(ch))
+    return re.findall(r'\w+', text_.lower())
+
+
+def match_expression(terms, prefix=False):
+    # Every term must match; quoting keeps FTS5 operators in user input literal
+    quoted = [f'"{term}"' for term in terms]
+    if prefix and quoted:
+        quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def fts5_available(connection):
+    try:
+        connection.exec_driver_sql('CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)')
+        connection.exec_driver_sql('DROP TABLE temp._fts5_probe')
+        return True
+    except Exception:
+        return False
+
+
+class Fts5ProductSearch:
+    """
+    Product name/description search on an SQLite FTS5 table. Ranking is
+    FTS5's bm25 with name hits weighted above description hits, and the
+    2/3-character prefix indexes keep typeahead queries off a full scan.
+    """
+    backend = 'fts5'
+
+    def __init__(self):
+        self._ready = False
+
+    def ready(self, connection):
+        """Whether the FTS5 table exists, so writes must keep it in sync."""
+        if not self._ready:
+            self._ready = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': SEARCH_TABLE}
+            ).first() is not None
+        return self._ready
+
+    def ensure(self, engine):
+        """Create and fill the FTS5 table, in its own transaction, if the database has none yet."""
+        if self._ready:
+            return
+        with engine.begin() as connection:
+            if self.ready(connection):
+                return
+            connection.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                f"name, description, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+            )
+            connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) "
+                                       f"VALUES ('rank', 'bm25({NAME_WEIGHT}, 1.0)')")
+            self.rebuild(connection)
+        self._ready = True
+
+    def rebuild(self, connection):
+        connection.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+        connection.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+            f"SELECT id, name, coalesce(description, '') FROM product"
+        )
+
+    def index(self, connection, product_id, name, description):
+        self.remove(connection, product_id)
+        connection.execute(
+            text(f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) VALUES (:id, :name, :description)"),
+            {'id': product_id, 'name': name, 'description': description or ''}
+        )
+
+    def remove(self, connection, product_id):
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), {'id': product_id})
+
+    def _match(self, terms, prefix):
+        return _fts.c[SEARCH_TABLE].op('MATCH')(match_expression(terms, prefix))
+
+    def matching(self, model, terms, prefix=False):
+        """Clause restricting a product query to search hits."""
+        return model.id.in_(select(_fts.c.rowid).where(self._match(terms, prefix)))
+
+    def ranked_page(self, session, model, terms, cursor=None, limit=24, prefix=False, **filters):
+        statement = (
+            apply_filters(select(model, _fts.c.rank), model, **filters)
+            .join(_fts, _fts.c.rowid == model.id)
+            .where(self._match(terms, prefix))
+        )
+        if cursor:
+            rank, last_id = decode_cursor(cursor)
+            statement = statement.where(tuple_(_fts.c.rank, _fts.c.rowid) > tuple_(rank, last_id))
+        rows = session.execute(statement.order_by(_fts.c.rank, _fts.c.rowid).limit(limit + 1)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].rank, rows[-1][0].id)
+        return [row[0] for row in rows], next_cursor
+
+
+class InvertedProductSearch:
+    """
+    In-process inverted index for SQLite builds without FTS5. Postings keep
+    weighted term frequencies for BM25 ranking and a sorted vocabulary
+    answers prefix queries with a bisect. Built from the product table on
+    first use; this process's writes are applied as they are flushed.
+
+    Writes made elsewhere (other workers, addData.py, plain SQL) are caught
+    by a version row that SQLite triggers bump on every product change:
+    ensure() compares it on each search and rebuilds when it has moved.
+    """
+    backend = 'inverted'
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # term -> {product id: weighted tf}
+        self.lengths = {}
+        self.documents = {}  # product id -> its terms, for removal
+        self.vocabulary = []
+        self.version = None  # the version row's value when the index was built
+        self.rebuilds = 0
+        self._ready = False
+        self._lock = threading.RLock()
+
+    def ready(self, connection):
+        return self._ready
+
+    def ensure(self, engine):
+        """Build the index on first use, and again whenever products changed elsewhere."""
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    with engine.begin() as connection:
+                        install_change_counter(connection, 'product', VERSION_TABLE)
+                        self.rebuild(connection)
+            return
+        with engine.connect() as connection:
+            if read_change_counter(connection, VERSION_TABLE) != self.version:
+                with self._lock:
+                    self.rebuild(connection)
+
+    def rebuild(self, connection):
+        connection.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+        connection.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+            f"SELECT id, name, coalesce(description, '') FROM product"
+        )
+
+    def index(self, connection, product_id, name, description):
+        self.remove(connection, product_id)
+        connection.execute(
+            text(f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) VALUES (:id, :name, :description)"),
+            {'id': product_id, 'name': name, 'description': description or ''}
+        )
+
+    def remove(self, connection, product_id):
+        connection.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :id"), {'id': product_id})
+
+    def _match(self, terms, prefix):
+        return _fts.c[SEARCH_TABLE].op('MATCH')(match_expression(terms, prefix))
+
+    def matching(self, model, terms, prefix=False):
+        """Clause restricting a product query to search hits."""
+        return model.id.in_(select(_fts.c.rowid).where(self._match(terms, prefix)))
+
+    def ranked_page(self, session, model, terms, cursor=None, limit=24, prefix=False, **filters):
+        statement = (
+            apply_filters(select(model, _fts.c.rank), model, **filters)
+            .join(_fts, _fts.c.rowid == model.id)
+            .where(self._match(terms, prefix))
+        )
+        if cursor:
+            rank, last_id = decode_cursor(cursor)
+            statement = statement.where(tuple_(_fts.c.rank, _fts.c.rowid) > tuple_(rank, last_id))
+        rows = session.execute(statement.order_by(_fts.c.rank, _fts.c.rowid).limit(limit + 1)).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].rank, rows[-1][0].id)
+        return [row[0] for row in rows], next_cursor
+
+
+class InvertedProductSearch:
+    """
+    In-process inverted index for SQLite builds without FTS5. Postings keep
+    weighted term frequencies for BM25 ranking and a sorted vocabulary
+    answers prefix queries with a bisect. Built from the product table on
+    first use; this process's writes are applied as they are flushed.
+
+    Writes made elsewhere (other workers, addData.py, plain SQL) are caught
+    by a version row that SQLite triggers bump on every product change:
+    ensure() compares it on each search and rebuilds when it has moved.
+    """
+    backend = 'inverted'
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # term -> {product id: weighted tf}
+        self.lengths = {}
+        self.documents = {}  # product id -> its terms, for removal
+        self.vocabulary = []
+        self.version = None  # the version row's value when the index was built
+        self.rebuilds = 0
+        self._ready = False
+        self._lock = threading.RLock()
+
+    def ready(self, connection):
+        return self._ready
+
+    def ensure(self, engine):
+        """Build the index on first use, and again whenever products changed elsewhere."""
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    with engine.begin() as connection:
+                        install_change_counter(connection, 'product', VERSION_TABLE)
+                        self.rebuild(connection)
+            return
+        with engine.connect() as connection:
+            if read_change_counter(connection, VERSION_TABLE) != self.version:
+                with self._lock:
+                    self.rebuild(connection)
+
+    @staticmethod
+    def _install_version(connection):
+        if connection.dialect.name != 'sqlite':
+            return
+        connection.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} "
+            f"(id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)"
+        )
+        connection.exec_driver_sql(f"INSERT OR IGNORE INTO {VERSION_TABLE} (id, version) VALUES (1, 0)")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            connection.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {VERSION_TABLE}_{event.lower()} AFTER {event} ON product "
+                f"BEGIN UPDATE {VERSION_TABLE} SET version = version + 1; END"
+            )
+
+    @staticmethod
+    def _read_version(connection):
+        if connection.dialect.name != 'sqlite':
+            return None
+        return connection.execute(text(f"SELECT version FROM {VERSION_TABLE}")).scalar()
+
+    def rebuild(self, connection):
+        with self._lock:
+            self.postings.clear()
+            self.lengths.clear()
+            self.documents.clear()
+            self.vocabulary = []
+            # Read in one transaction, so the version matches the rows indexed
+            transaction = connection.begin() if not connection.in_transaction() else None
+            try:
+                self.version = read_change_counter(connection, VERSION_TABLE)
+                for product_id, name, description in connection.execute(
+                    text("SELECT id, name, description FROM product")
+                ):
+                    self._add(product_id, name, description)
+            finally:
+                if transaction is not None:
+                    transaction.commit()
+            self.vocabulary = sorted(self.postings)
+            self.rebuilds += 1
+            self._ready = True
+
+    def _add(self, product_id, name, description, keep_vocabulary=False):
+        weights = Counter()
+        for term in search_terms(name):
+            weights[term] += NAME_WEIGHT
+        for term in search_terms(description):
+            weights[term] += 1.0
+        for term, weight in weights.items():
+            if keep_vocabulary and term not in self.postings:
+                bisect.insort(self.vocabulary, term)
+            self.postings[term][product_id] = weight
+        self.lengths[product_id] = sum(weights.values())
+        self.documents[product_id] = list(weights)
+
+    def _remove(self, product_id):
+        for term in self.documents.pop(product_id, ()):
+            postings = self.postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+        self.lengths.pop(product_id, None)
+
+    def index(self, connection, product_id, name, description):
+        # Applied as the row is flushed; a rolled-back write stays indexed
+        # until the next rebuild, but searches only return rows that exist
+        with self._lock:
+            self._remove(product_id)
+            self._add(product_id, name, description, keep_vocabulary=True)
+
+    def remove(self, connection, product_id):
+        with self._lock:
+            self._remove(product_id)
+
+    def _expand(self, term):
+        start = bisect.bisect_left(self.vocabulary, term)
+        end = bisect.bisect_left(self.vocabulary, term + '\U0010ffff')
+        return self.vocabulary[start:end]
+
+    def scores(self, terms, prefix=False):
+        """{product id: BM25 score} for products containing every term."""
+        with self._lock:
+            count = len(self.lengths) or 1
+            average = sum(self.lengths.values()) / count or 1.0
+            scores = None
+            for n, term in enumerate(terms):
+                expanded = self._expand(term) if prefix and n == len(terms) - 1 else [term]
+                term_scores = defaultdict(float)
+                for word in expanded:
+                    postings = self.postings.get(word, {})
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for product_id, tf in postings.items():
+                        norm = tf + self.k1 * (1 - self.b + self.b * self.lengths[product_id] / average)
+                        term_scores[product_id] += idf * tf * (self.k1 + 1) / norm
+                if scores is None:
+                    scores = dict(term_scores)
+                else:
+                    scores = {i: s + term_scores[i] for i, s in scores.items() if i in term_scores}
+                if not scores:
+                    break
+            return scores or {}
+
+    def _ranked_ids(self, terms, prefix):
+        # (rank, id) ascending like FTS5, where rank is the negated score
+        return sorted((-score, product_id) for product_id, score in self.scores(terms, prefix).items())
+
+    def matching(self, model, terms, prefix=False):
+        ids = [product_id for _, product_id in self._ranked_ids(terms, prefix)[:MAX_MATCHES]]
+        return model.id.in_(ids)
+
+    def ranked_page(self, session, model, terms, cursor=None, limit=24, prefix=False, **filters):
+        ranked = self._ranked_ids(terms, prefix)
+        start = bisect.bisect_right(ranked, tuple(decode_cursor(cursor))) if cursor else 0
+
+        # Walk the ranking in slices, letting SQL apply the filters to each one
+        page = []
+        step = max(limit * 4, 100)
+        while start < len(ranked) and len(page) <= limit:
+            chunk = ranked[start:start + step]
+            start += step
+            products = {
+                product.id: product for product in session.scalars(
+                    apply_filters(select(model), model, **filters)
+                    .where(model.id.in_([product_id for _, product_id in chunk]))
+                )
+            }
+            page.extend((rank, products[i]) for rank, i in chunk if i in products)
+
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = encode_cursor(page[-1][0], page[-1][1].id)
+        return [product for _, product in page], next_cursor
+
+
+def product_search(engine):
+    """FTS5 search when this SQLite build has it, the in-memory index otherwise."""
+    with engine.connect() as connection:
+        if engine.dialect.name == 'sqlite' and fts5_available(connection):
+            return Fts5ProductSearch()
+    return InvertedProductSearch()
@@ -0,0 +1,136 @@
+# remedy_catalog.py
+import csv
+import os
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from change_counter import install_change_counter, read_change_counter
+
+DEFAULT_CROP = 'Jute'
+NO_REMEDY = "No specific remedy found for this pest."
+VERSION_TABLE = 'pest_remedy_version'
+
+
+def remedy_version(connection):
+    """
+    The pest_remedy change counter, installing it on first use. Writes
+    from any process (another worker, `flask import-remedies`) bump it.
+    None on databases other than SQLite, which get no triggers.
+    """
+    try:
+        return read_change_counter(connection, VERSION_TABLE)
+    except OperationalError:
+        install_change_counter(connection, 'pest_remedy', VERSION_TABLE)
+        return 0
+
+
+class CsvRemedySource:
+    """Reads remedies from a CSV with pestname, remedy and an optional crop column."""
+
+    def __init__(self, path, default_crop=DEFAULT_CROP):
+        self.path = path
+        self.default_crop = default_crop
+
+    def version(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def rows(self):
+        with open(self.path, 'r', newline='') as csvfile:
+            for row in csv.DictReader(csvfile):
+                yield row.get('crop') or self.default_crop, row['pestname'], row['remedy']
+
+
+class QueryRemedySource:
+    """
+    Reads remedies from the database through `fetch_rows`, which returns
+    (crop, pest_name, remedy) tuples. `fetch_version` returns the table's
+    change counter (see remedy_version), so writes made by other processes
+    are picked up; touch() marks writes made by this one.
+    """
+
+    def __init__(self, fetch_rows, fetch_version=None):
+        self.fetch_rows = fetch_rows
+        self.fetch_version = fetch_version
+        self._version = 0
+
+    def touch(self):
+        self._version += 1
+
+    def version(self):
+        if self.fetch_version is None:
+            return self._version
+        return self.fetch_version(), self._version
+
+    def rows(self):
+        return self.fetch_rows()
+
+
+class RemedyCatalog:
+    """
+    Case-insensitive in-memory index of pest remedies per crop. The source
+    is read once and re-read only when its version changes (file mtime for
+    CSVs, a trigger-kept counter for the database), checked at most every
+    `check_interval` seconds.
+    """
+
+    def __init__(self, source, check_interval=2.0):
+        self.source = source
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._by_crop = {}
+        self._by_pest = {}
+        self._version = object()
+        self._checked_at = float('-inf')
+        self.loads = 0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return
+            self._checked_at = now
+            try:
+                version = self.source.version()
+                if version == self._version:
+                    return
+                rows = list(self.source.rows())
+            except Exception as e:
+                # Keep serving the previous index if the source is unreadable
+                print(f"Error loading pest remedies: {e}")
+                return
+
+            by_crop, by_pest = {}, {}
+            for crop, pest_name, remedy in rows:
+                by_crop[(crop.strip().lower(), pest_name.strip().lower())] = remedy
+                by_pest.setdefault(pest_name.strip().lower(), remedy)
+            # Swap in the finished index in one step so readers never see a partial load
+            self._by_crop, self._by_pest = by_crop, by_pest
+            self._version = version
+            self.loads += 1
+
+    def lookup(self, pest_type, crop=DEFAULT_CROP):
+        """Remedy for pest_type on crop, falling back to any crop with that pest."""
+        self._refresh()
+        pest_key = pest_type.strip().lower()
+        remedy = self._by_crop.get(((crop or '').strip().lower(), pest_key))
+        if remedy is None:
+            remedy = self._by_pest.get(pest_key)
+        return remedy
+
+    def crops(self):
+        self._refresh()
+        return sorted({crop for crop, _ in self._by_crop})
+
+    def invalidate(self):
+        self._checked_at = float('-inf')
+
+    def stats(self):
+        return {'entries': len(self._by_crop), 'loads': self.loads}
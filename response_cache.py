@@ -0,0 +1,163 @@
+# response_cache.py
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, current_app, request, session
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+    Entries can carry tags so a group of them (e.g. everything rendered
+    from Product rows) is dropped with one invalidate(tag) call.
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, tags=(), ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, compute, tags=(), ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value, tags, ttl)
+        return value
+
+    def invalidate(self, tag=None):
+        """Drop every entry carrying `tag`, or everything when no tag is given."""
+        with self._lock:
+            if tag is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [key for key, (_, tags, _) in self._entries.items() if tag in tags]
+                for key in stale:
+                    del self._entries[key]
+                dropped = len(stale)
+            self.invalidations += 1
+        return dropped
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+class CachedPage:
+    def __init__(self, body, mimetype, status):
+        self.body = body
+        self.mimetype = mimetype
+        self.status = status
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.last_modified = time.time()
+
+
+class ResponseCache(TTLCache):
+    """
+    Whole-response cache for pages that look the same to every anonymous
+    visitor. Responses carry an ETag and Last-Modified, so a revalidating
+    browser gets a 304 without the page being rendered again.
+
+    Entries live in the process that rendered them and invalidate() only
+    reaches that process: under gunicorn another worker keeps serving its
+    copy until the TTL runs out. Only cache pages that may be that stale.
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        super().__init__(max_entries, ttl)
+        self.not_modified = 0
+
+    def cacheable(self):
+        # Logged-in pages show the user's menu and pending flashes are per visitor
+        return request.method == 'GET' and 'user_id' not in session and '_flashes' not in session
+
+    def key(self, query_args=()):
+        # Only the query arguments the view reads, in a fixed order, so junk
+        # or reordered query strings share one entry instead of evicting others
+        return (
+            request.endpoint,
+            tuple(sorted((request.view_args or {}).items())),
+            tuple((name, tuple(request.args.getlist(name))) for name in sorted(query_args)),
+        )
+
+    def page(self, tags=(), ttl=None, query_args=()):
+        """Cache a view's response; `query_args` names the query arguments it reads."""
+        def decorator(view):
+            @wraps(view)
+            def cached_view(*args, **kwargs):
+                if not self.cacheable():
+                    return view(*args, **kwargs)
+
+                key = self.key(query_args)
+                page = self.get(key)
+                if page is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.direct_passthrough:
+                        return response
+                    page = CachedPage(response.get_data(), response.mimetype, response.status_code)
+                    self.set(key, page, tags, ttl)
+                return self.respond(page)
+            return cached_view
+        return decorator
+
+    def respond(self, page):
+        response = Response(page.body, status=page.status, mimetype=page.mimetype)
+        response.set_etag(page.etag)
+        response.last_modified = page.last_modified
+        # Revalidate on every visit: the same URL renders differently once logged in
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            with self._lock:
+                self.not_modified += 1
+        return response
+
+    def stats(self):
+        stats = super().stats()
+        stats['not_modified'] = self.not_modified
+        return stats
@@ -0,0 +1,107 @@
+# road_network.py
+import os
+
+import numpy as np
+import pandas as pd
+
+from geo import DISTRICT_COORDINATES, DistrictIndex, haversine_matrix
+
+NO_PATH = -1
+ACCESS_SPEED = 30  # km/h on the last leg from a district hub to an off-graph site
+
+
+def floyd_warshall(distances, hours):
+    """
+    All-pairs shortest paths by road distance, vectorized one pivot at a
+    time. Returns distance and travel-time matrices plus a next-hop table
+    for rebuilding paths; unreachable pairs stay at inf / NO_PATH.
+    """
+    n = len(distances)
+    dist = distances.copy()
+    time = hours.copy()
+    next_hop = np.where(np.isfinite(dist), np.arange(n)[np.newaxis, :], NO_PATH)
+    np.fill_diagonal(dist, 0.0)
+    np.fill_diagonal(time, 0.0)
+    np.fill_diagonal(next_hop, np.arange(n))
+
+    for k in range(n):
+        through_k = dist[:, k, np.newaxis] + dist[np.newaxis, k, :]
+        shorter = through_k < dist
+        dist = np.where(shorter, through_k, dist)
+        time = np.where(shorter, time[:, k, np.newaxis] + time[np.newaxis, k, :], time)
+        next_hop = np.where(shorter, next_hop[:, k, np.newaxis], next_hop)
+
+    return dist, time, next_hop
+
+
+class RoadNetwork(DistrictIndex):
+    """
+    District graph with weighted road links. Shortest paths are computed
+    once at load time and kept as compact float32/int16 matrices, so
+    distance, time and next-hop lookups are single array reads. It exposes
+    the same interface as DistrictIndex (distances, neighbours, sites()),
+    so logistics and route planning can use either.
+    """
+
+    def __init__(self, coordinates, edges):
+        super().__init__(coordinates)
+        self.straight_line = self.distances
+        n = len(self.names)
+
+        link_km = np.full((n, n), np.inf)
+        link_hours = np.full((n, n), np.inf)
+        for edge in edges.itertuples(index=False):
+            i = self.positions.get(edge.from_district)
+            j = self.positions.get(edge.to_district)
+            if i is None or j is None:
+                raise ValueError(f"Unknown district in road link: {edge.from_district} - {edge.to_district}")
+            hours = edge.distance_km / edge.speed_kmph
+            # Keep the shorter of any duplicate links; roads are two-way
+            if edge.distance_km < link_km[i, j]:
+                link_km[i, j] = link_km[j, i] = edge.distance_km
+                link_hours[i, j] = link_hours[j, i] = hours
+
+        dist, hours, next_hop = floyd_warshall(link_km, link_hours)
+        self.distances = dist.astype(np.float32)
+        self.hours = hours.astype(np.float32)
+        self.next_hop = next_hop.astype(np.int16)
+        self.neighbours = self._neighbours(self.distances)
+        self.links = int(np.isfinite(link_km).sum() // 2)
+
+    def travel_hours(self, origin, destination):
+        return float(self.hours[self.positions[origin], self.positions[destination]])
+
+    def path(self, origin, destination):
+        """Districts along the shortest road path, or [] when unreachable."""
+        i, j = self.positions[origin], self.positions[destination]
+        if self.next_hop[i, j] == NO_PATH:
+            return []
+        path = [i]
+        while i != j:
+            i = int(self.next_hop[i, j])
+            path.append(i)
+        return [self.names[k] for k in path]
+
+    def _site_hubs(self, site_coordinates):
+        # Sites are reached through their nearest district on the road graph,
+        # plus the straight-line access leg from that district to the site
+        _, nearest = self.tree.query(np.radians(site_coordinates), k=1)
+        nearest = nearest[:, 0]
+        access = haversine_matrix(self.coordinates[nearest], site_coordinates).diagonal()
+        return nearest, access
+
+    def site_distances(self, site_coordinates):
+        nearest, access = self._site_hubs(site_coordinates)
+        return self.distances[:, nearest] + access[np.newaxis, :]
+
+    def site_hours(self, site_coordinates):
+        nearest, access = self._site_hubs(site_coordinates)
+        return self.hours[:, nearest] + (access / ACCESS_SPEED)[np.newaxis, :]
+
+
+def load_road_network(path='road_network.csv', coordinates=DISTRICT_COORDINATES):
+    """Build a RoadNetwork from a CSV of from_district, to_district, distance_km, speed_kmph links."""
+    if not os.path.exists(path):
+        return None
+    edges = pd.read_csv(path, comment='#')
+    return RoadNetwork(coordinates, edges)
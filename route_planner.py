@@ -0,0 +1,193 @@
+# route_planner.py
+from collections import defaultdict
+
+import numpy as np
+
+from geo import DISTRICTS
+from logistics import AVG_SPEED
+
+
+class Route:
+    def __init__(self, depot, stops, load, distance, vehicle=None, hours=None):
+        self.depot = depot
+        self.stops = stops  # [{'district': ..., 'orders': [...], 'load': ...}, ...] in visiting order
+        self.load = load
+        self.distance = distance
+        self.vehicle = vehicle
+        self.hours = distance / AVG_SPEED if hours is None else hours
+
+    def to_dict(self):
+        return {
+            'depot': self.depot,
+            'vehicle': self.vehicle,
+            'stops': self.stops,
+            'load': round(self.load, 2),
+            'distance_km': round(self.distance, 2),
+            'estimated_hours': round(self.hours, 2),
+        }
+
+
+def route_length(path, distances):
+    """Length of a closed path of matrix indexes (first and last are the depot)."""
+    path = np.asarray(path)
+    return float(distances[path[:-1], path[1:]].sum())
+
+
+def two_opt(path, distances, max_passes=50):
+    """
+    Improve a closed route in place by reversing segments while that makes
+    it shorter. path[0] and path[-1] are the depot and never move.
+    """
+    improved = True
+    passes = 0
+    while improved and passes < max_passes:
+        improved = False
+        passes += 1
+        for i in range(1, len(path) - 2):
+            a, b = path[i - 1], path[i]
+            for j in range(i + 1, len(path) - 1):
+                c, d = path[j], path[j + 1]
+                delta = distances[a, c] + distances[b, d] - distances[a, b] - distances[c, d]
+                if delta < -1e-9:
+                    path[i:j + 1] = path[i:j + 1][::-1]
+                    b = path[i]
+                    improved = True
+    return path
+
+
+def pack_stops(orders, capacity):
+    """
+    Group a depot's orders into stops: orders for the same district share a
+    stop as long as the stop fits in one vehicle (first-fit decreasing).
+    Distances are district-to-district, so this loses nothing.
+    """
+    by_district = defaultdict(list)
+    for order in orders:
+        by_district[order['district']].append(order)
+
+    stops = []
+    for district, district_orders in by_district.items():
+        bins = []
+        for order in sorted(district_orders, key=lambda o: o['load'], reverse=True):
+            for stop in bins:
+                if stop['load'] + order['load'] <= capacity:
+                    stop['orders'].append(order['id'])
+                    stop['load'] += order['load']
+                    break
+            else:
+                bins.append({'district': district, 'orders': [order['id']], 'load': order['load']})
+        stops.extend(bins)
+    return stops
+
+
+def clarke_wright(depot, stop_nodes, loads, capacity, distances):
+    """
+    Parallel savings heuristic. Starts with one out-and-back trip per stop
+    and repeatedly joins the two route ends with the largest saving
+    d(depot, i) + d(depot, j) - d(i, j) while the load fits.
+    Returns routes as lists of stop positions.
+    """
+    n = len(stop_nodes)
+    if n == 0:
+        return []
+
+    nodes = np.asarray(stop_nodes)
+    from_depot = distances[depot, nodes]
+    savings = from_depot[:, None] + from_depot[None, :] - distances[np.ix_(nodes, nodes)]
+    i_idx, j_idx = np.triu_indices(n, k=1)
+    pair_savings = savings[i_idx, j_idx]
+    order = np.argsort(-pair_savings, kind='stable')
+
+    routes = {i: [i] for i in range(n)}
+    route_of = list(range(n))
+    route_load = {i: loads[i] for i in range(n)}
+
+    for k in order:
+        if pair_savings[k] <= 0:
+            break
+        i, j = int(i_idx[k]), int(j_idx[k])
+        ri, rj = route_of[i], route_of[j]
+        if ri == rj or route_load[ri] + route_load[rj] > capacity:
+            continue
+
+        a, b = routes[ri], routes[rj]
+        # i and j must both be route ends; orient so that a ends in i and b starts with j
+        if a[-1] != i:
+            if a[0] != i:
+                continue
+            a.reverse()
+        if b[0] != j:
+            if b[-1] != j:
+                continue
+            b.reverse()
+
+        a.extend(b)
+        route_load[ri] += route_load.pop(rj)
+        del routes[rj]
+        for stop in b:
+            route_of[stop] = ri
+
+    return list(routes.values())
+
+
+def plan_routes(orders, depots, capacity, num_vehicles=None, index=DISTRICTS, distances=None):
+    """
+    Build capacity-feasible multi-stop delivery routes.
+
+    orders:   iterable of {'id', 'district', 'load'} with districts known to `index`
+    depots:   warehouse districts; each order is served from its nearest depot
+    capacity: vehicle capacity in the same unit as order loads
+    num_vehicles: optional fleet size per depot, routes are shared out
+              between vehicles longest first (a vehicle may run several trips)
+    index:    DISTRICTS for great-circle km, or a RoadNetwork to plan on road
+              distances and report its travel times
+    distances: optional matrix over index.names overriding index.distances
+
+    Returns (routes, unrouted) where unrouted lists orders that cannot be
+    served (unknown district or heavier than a whole vehicle).
+    """
+    hours = getattr(index, 'hours', None) if distances is None else None
+    distances = index.distances if distances is None else distances
+    depot_nodes = [index.positions[d] for d in depots]
+
+    assigned = defaultdict(list)
+    unrouted = []
+    for order in orders:
+        node = index.positions.get(order['district'])
+        if node is None or order['load'] > capacity:
+            unrouted.append(order)
+            continue
+        nearest = min(range(len(depot_nodes)), key=lambda k: distances[depot_nodes[k], node])
+        assigned[nearest].append(order)
+
+    routes = []
+    for k, depot_orders in assigned.items():
+        depot = depot_nodes[k]
+        stops = pack_stops(depot_orders, capacity)
+        stop_nodes = [index.positions[stop['district']] for stop in stops]
+        loads = [stop['load'] for stop in stops]
+
+        depot_routes = []
+        for members in clarke_wright(depot, stop_nodes, loads, capacity, distances):
+            # 2-opt on a small local matrix: position 0 is the depot, 1..k the stops
+            local_nodes = [depot] + [stop_nodes[m] for m in members]
+            local = distances[np.ix_(local_nodes, local_nodes)]
+            path = two_opt([0] + list(range(1, len(local_nodes))) + [0], local)
+            ordered = [members[p - 1] for p in path[1:-1]]
+            route_hours = None
+            if hours is not None:
+                route_hours = route_length(path, hours[np.ix_(local_nodes, local_nodes)])
+            depot_routes.append(Route(
+                depots[k],
+                [dict(stops[m], load=round(stops[m]['load'], 2)) for m in ordered],
+                sum(loads[m] for m in members),
+                float(route_length(path, local)),
+                hours=route_hours
+            ))
+
+        depot_routes.sort(key=lambda r: r.distance, reverse=True)
+        for n, route in enumerate(depot_routes):
+            route.vehicle = n % num_vehicles if num_vehicles else n
+        routes.extend(depot_routes)
+
+    return routes, unrouted
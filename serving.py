@@ -0,0 +1,61 @@
+# serving.py
+# Production serving. Gunicorn's master imports the app and loads the pest
+# and warehouse models once; workers are forked from it and share those
+# pages copy-on-write instead of each loading its own copy.
+#
+#   gunicorn -c gunicorn.conf.py wsgi:app
+#   python serving.py                       # the same, gunicorn embedded
+import multiprocessing
+import os
+import sys
+
+
+def worker_count():
+    return int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+
+def torch_threads(workers):
+    # Split the cores between workers so their intra-op pools don't oversubscribe them
+    default = max(1, multiprocessing.cpu_count() // max(workers, 1))
+    return int(os.environ.get('TORCH_THREADS_PER_WORKER', default))
+
+
+def create_app():
+    """Import the app, set up the schema and load the models, before any worker is forked."""
+    import torch
+
+    # No intra-op thread pool in the master, so forked workers never inherit one
+    torch.set_num_threads(1)
+
+    from app import app, db, models, setup_database, warehouse_artifacts
+
+    with app.app_context():
+        setup_database()
+        # Every worker opens its own database connections
+        db.engine.dispose()
+
+    # The batcher starts threads, which would not survive the fork; each
+    # worker builds its own around the shared detector
+    if models.is_loaded('pest_batcher'):
+        models.unload('pest_batcher')
+    models.preload('pest_detector')
+    warehouse_artifacts.current()
+    return app
+
+
+def init_worker(workers):
+    """Runs in each worker right after the fork; /readyz answers 200 once warm-up is done."""
+    import torch
+
+    torch.set_num_threads(torch_threads(workers))
+
+    from app import start_warm_up
+
+    start_warm_up()
+
+
+if __name__ == '__main__':
+    from gunicorn.app.wsgiapp import WSGIApplication
+
+    sys.argv = [sys.argv[0], '--config', 'gunicorn.conf.py'] + sys.argv[1:] + ['wsgi:app']
+    WSGIApplication('%(prog)s [OPTIONS]').run()
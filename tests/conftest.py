@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py binds its database at import time, so point it at a scratch file first
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'test.db'))
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    # Relative paths in app.py (remedy CSV, model file, uploads) are resolved from the repo root
+    os.chdir(ROOT)
+    import app
+    app.app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def database(app_module):
+    with app_module.app.app_context():
+        app_module.db.drop_all()
+        # The search and change-counter tables live outside the models' metadata
+        with app_module.db.engine.begin() as connection:
+            for (name,) in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND (name LIKE 'product_fts%' OR name = 'pest_remedy_version')"
+            ).all():
+                connection.exec_driver_sql(f'DROP TABLE IF EXISTS "{name}"')
+        app_module.db.create_all()
+    yield app_module.db
+    with app_module.app.app_context():
+        app_module.db.session.remove()
+
+
+@pytest.fixture
+def fake_pest_model(app_module):
+    """Replaces the ResNet batcher with one that always answers Termite at 90%."""
+    class FakeBatcher:
+        calls = 0
+
+        def predict(self, source, timeout=None):
+            FakeBatcher.calls += 1
+            return {'pest_type': 'Termite', 'confidence': 90.0}
+
+    models = app_module.models
+    original = models._factories['pest_batcher']
+    models.unload('pest_batcher')
+    models.register('pest_batcher', FakeBatcher)
+    app_module.prediction_cache._entries.clear()
+    yield FakeBatcher
+    models.unload('pest_batcher')
+    models.register('pest_batcher', original)
@@ -0,0 +1,37 @@
+from sqlalchemy import text
+
+from admin_stats import counter_changes, summary
+
+
+def test_counter_changes_for_an_update():
+    class Row:
+        def __init__(self, status):
+            self.status = status
+
+    changes = counter_changes('order', before=Row('pending'), after=Row('shipped'))
+    assert changes == {'orders.pending': -1, 'orders.shipped': 1}
+
+
+def test_setup_database_seeds_counters_from_existing_rows(app_module, database):
+    with app_module.app.app_context():
+        # Rows written before the counter table existed, e.g. the shipped data.db
+        with database.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO user (username, email, password_hash, user_type) VALUES "
+                "('asha', 'asha@example.com', 'x', 'farmer'), ('bikash', 'bikash@example.com', 'x', 'customer')"
+            ))
+            connection.execute(text("DELETE FROM dashboard_counter"))
+
+        app_module.setup_database()
+        stats = summary(dict(database.session.execute(text("SELECT name, value FROM dashboard_counter")).all()))
+        assert stats['users'] == 2
+        assert stats['users_by_type'] == {'farmer': 1, 'customer': 1}
+
+        # From here on, ORM writes keep the counters current
+        database.session.add(app_module.User(
+            username='chandra', email='chandra@example.com', password_hash='x', user_type='farmer'
+        ))
+        database.session.commit()
+        counters = dict(database.session.execute(text("SELECT name, value FROM dashboard_counter")).all())
+        assert counters['users'] == 3
+        assert counters['users.farmer'] == 2
@@ -0,0 +1,54 @@
+import os
+
+import pytest
+
+from auth_service import AuthBusy, AuthService, LoginRateLimiter
+
+FAST = 'pbkdf2:sha256:1000'
+
+
+@pytest.fixture
+def auth():
+    service = AuthService(method=FAST, workers=1, max_pending=4)
+    yield service
+    service.shutdown()
+
+
+def test_hash_and_verify(auth):
+    password_hash = auth.hash_password('s3cret')
+    assert password_hash.startswith(FAST + '$')
+    assert auth.verify(password_hash, 's3cret') == (True, None)
+    assert auth.verify(password_hash, 'wrong') == (False, None)
+
+
+def test_rehash_when_cost_changes(auth):
+    old_hash = AuthService(method='pbkdf2:sha256:500', workers=1).hash_password('s3cret')
+    ok, new_hash = auth.verify(old_hash, 's3cret')
+    assert ok
+    assert new_hash.startswith(FAST + '$')
+    assert auth.stats()['rehashed'] == 1
+
+
+def test_recovers_from_a_dead_worker(auth):
+    password_hash = auth.hash_password('s3cret')
+    with pytest.raises(Exception):
+        auth._executor().submit(os._exit, 1).result()
+    assert auth.verify(password_hash, 's3cret') == (True, None)
+    assert auth.stats()['pool_rebuilds'] == 1
+
+
+def test_rejects_when_every_slot_is_taken():
+    service = AuthService(method=FAST, workers=1, max_pending=1)
+    service._slots.acquire()
+    with pytest.raises(AuthBusy):
+        service.hash_password('s3cret')
+    assert service.stats()['busy_rejections'] == 1
+
+
+def test_rate_limit_per_username():
+    limiter = LoginRateLimiter(max_attempts=2, window=60)
+    assert limiter.hit('asha') and limiter.hit('asha')
+    assert not limiter.hit('asha')
+    assert limiter.hit('bikash')
+    limiter.reset('asha')
+    assert limiter.hit('asha')
@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from geo import DEFAULT_DISTRICT, DISTRICTS, EARTH_RADIUS_KM, DistrictIndex, haversine_matrix, warehouse_distance_matrix
+
+WAREHOUSES = pd.read_csv('fixed_warehouse.csv')
+LOCATIONS = pd.DataFrame({
+    'District': ['Kathmandu', 'Jhapa', 'Dadeldhura', 'Mustang'],
+    'Latitude': [27.7103, 26.7271, 29.2188, 28.9985],
+    'Longitude': [85.3222, 88.0845, 80.4994, 83.8473],
+})
+
+# Four districts for a small DistrictIndex
+COORDINATES = {
+    'Kathmandu': (27.7103, 85.3222),
+    'Lalitpur': (27.6588, 85.3247),
+    'Bhaktapur': (27.6710, 85.4298),
+    'Kaski': (28.2622, 84.0167),
+}
+SITES = pd.DataFrame({
+    'District': ['Jhapa', 'Kathmandu', 'Kathmandu'],
+    'Latitude': [26.5455, 27.7103, 27.7103],
+    'Longitude': [87.8942, 85.3222, 85.3222],
+})
+
+
+def haversine_km(origin, destination):
+    # The per-pair formula of the haversine package, which the matrix replaced
+    lat1, lng1, lat2, lng2 = map(math.radians, (*origin, *destination))
+    d = math.sin((lat2 - lat1) * 0.5) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) * 0.5) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(d))
+
+
+def per_pair(locations, warehouses, distance):
+    # The row-by-row calculate_distances the /warehouses view used to run
+    return np.array([
+        [distance((row['Latitude'], row['Longitude']), (wh['Latitude'], wh['Longitude']))
+         for _, wh in warehouses.iterrows()]
+        for _, row in locations.iterrows()
+    ])
+
+
+def test_matrix_matches_per_pair_haversine():
+    expected = per_pair(LOCATIONS, WAREHOUSES, haversine_km)
+    np.testing.assert_allclose(warehouse_distance_matrix(LOCATIONS, WAREHOUSES), expected, rtol=1e-12, atol=1e-9)
+
+
+def test_matrix_matches_the_haversine_package():
+    haversine = pytest.importorskip('haversine')
+
+    def package_km(origin, destination):
+        return haversine.haversine(origin, destination, unit=haversine.Unit.KILOMETERS)
+
+    expected = per_pair(LOCATIONS, WAREHOUSES, package_km)
+    np.testing.assert_allclose(warehouse_distance_matrix(LOCATIONS, WAREHOUSES), expected, rtol=1e-12, atol=1e-9)
+
+
+def test_matrix_shape_and_zero_diagonal():
+    points = LOCATIONS[['Latitude', 'Longitude']].to_numpy()
+    distances = haversine_matrix(points, points)
+    assert distances.shape == (4, 4)
+    np.testing.assert_allclose(np.diag(distances), 0, atol=1e-9)
+    np.testing.assert_allclose(distances, distances.T)
+    assert haversine_matrix((27.7103, 85.3222), [(27.7103, 85.3222)]).shape == (1, 1)
+
+
+def test_district_index_nearest_and_unknown_fallback():
+    index = DistrictIndex(COORDINATES)
+    assert index.nearest_district('Kathmandu', k=2) == ['Lalitpur', 'Bhaktapur']
+    assert index.location('Atlantis') == COORDINATES[DEFAULT_DISTRICT]
+    assert 'Atlantis' not in index and 'Kaski' in index
+
+
+def test_site_index_nearest_site_and_unknown_fallback():
+    sites = DISTRICTS.sites(SITES, version='test')
+    assert sites.names == ['Jhapa', 'Kathmandu']
+    assert DISTRICTS.sites(SITES, version='test') is sites
+
+    name, location, km, hours = sites.nearest_site('Morang')
+    assert name == 'Jhapa' and location == (26.5455, 87.8942)
+    assert km == pytest.approx(DISTRICTS.site_distances(np.array([location]))[DISTRICTS.positions['Morang'], 0])
+    assert hours is None
+    # Unknown districts are priced from Kathmandu, where a site stands
+    assert sites.nearest_site('Atlantis')[0] == 'Kathmandu'
+    assert sites.nearest_site('Atlantis')[2] == pytest.approx(0)
+
+
+def test_nearest_to_point():
+    pytest.importorskip('sklearn')
+    (name, km), = DISTRICTS.nearest_to_point(27.70, 85.32)
+    assert name == 'Kathmandu' and km < 2
@@ -0,0 +1,44 @@
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+from image_variants import ImageVariants
+from upload_storage import UploadStorage
+
+
+def store_image(storage, width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), 'green').save(buffer, 'JPEG')
+    data = buffer.getvalue()
+    name = storage.name_for(hashlib.sha256(data).hexdigest(), 'jpg')
+    os.makedirs(os.path.dirname(storage.path(name)), exist_ok=True)
+    with open(storage.path(name), 'wb') as out:
+        out.write(data)
+    return name
+
+
+def test_build_all_writes_every_width_without_upscaling(tmp_path):
+    storage = UploadStorage(str(tmp_path))
+    variants = ImageVariants(storage, widths=(160, 320, 640))
+    name = store_image(storage, 400, 200)
+
+    variants.build_all(storage, name)
+    for fmt in variants.formats:
+        for width, expected in ((160, 160), (320, 320), (640, 400)):
+            with Image.open(storage.path(variants.variant_name(name, width, fmt))) as image:
+                assert image.width == expected
+    assert variants.stats()['built'] == 1
+
+
+def test_get_renders_the_smallest_covering_width_on_request(tmp_path):
+    storage = UploadStorage(str(tmp_path))
+    variants = ImageVariants(storage, widths=(160, 320, 640))
+    name = store_image(storage, 800, 600)
+
+    variant = variants.get(name, 200, 'jpeg')
+    assert variant == variants.variant_name(name, 320, 'jpeg')
+    assert os.path.exists(storage.path(variant))
+    assert variants.stats()['built_on_request'] == 1
+    assert not variants.applies_to(variant)
@@ -0,0 +1,90 @@
+import io
+
+import pandas as pd
+import pytest
+
+from geo import DISTRICTS
+from logistics import AVG_SPEED, check_orders, delivery_costs, quote_deliveries
+
+
+def test_quotes_match_the_single_order_rules():
+    orders = pd.DataFrame({
+        'order_id': [7, 8],
+        'delivery_district': ['Jhapa', 'Lalitpur'],
+        'product_quantity': [2, 0],
+        'product_weight': [10.5, 3],
+    })
+    quotes = quote_deliveries(orders)
+
+    assert list(quotes['order_id']) == [7, 8]
+    for quote in quotes.itertuples():
+        warehouse = DISTRICTS.nearest_district(quote.delivery_district)[0]
+        distance = DISTRICTS.distance(warehouse, quote.delivery_district)
+        assert quote.nearest_warehouse == warehouse
+        assert quote.estimated_distance == pytest.approx(distance, abs=0.01)
+        assert quote.estimated_time == pytest.approx(distance / AVG_SPEED, abs=0.01)
+        costs = delivery_costs(distance, quote.product_weight, quote.product_quantity)
+        assert quote.total_cost == pytest.approx(costs['total_cost'], abs=0.01)
+
+
+@pytest.mark.parametrize('order, message', [
+    ({'delivery_district': 'Nowhere', 'product_quantity': 1, 'product_weight': 1}, 'delivery_district'),
+    ({'delivery_district': ['Jhapa'], 'product_quantity': 1, 'product_weight': 1}, 'delivery_district'),
+    ({'delivery_district': 'Jhapa', 'product_quantity': 'x', 'product_weight': 1}, 'product_quantity'),
+    ({'delivery_district': 'Jhapa', 'product_quantity': 1, 'product_weight': -5}, 'product_weight'),
+    ({'delivery_district': 'Jhapa', 'product_quantity': True, 'product_weight': 1}, 'product_quantity'),
+    ({'delivery_district': 'Jhapa', 'product_quantity': 1}, 'product_weight must be'),
+])
+def test_check_orders_rejects_orders_that_cannot_be_priced(order, message):
+    good = {'delivery_district': 'Jhapa', 'product_quantity': 1, 'product_weight': 1}
+    with pytest.raises(ValueError, match=message):
+        check_orders(pd.DataFrame.from_records([good, order]), offset=10)
+    with pytest.raises(ValueError, match=r'orders\[11\]'):
+        check_orders(pd.DataFrame.from_records([good, order]), offset=10)
+
+
+def test_check_orders_needs_every_column():
+    with pytest.raises(ValueError, match='product_weight column'):
+        check_orders(pd.DataFrame({'delivery_district': ['Jhapa'], 'product_quantity': [1]}))
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'LOGISTICS_QUOTE_CHUNKSIZE', 2)
+    return app_module.app.test_client()
+
+
+def test_quote_api_streams_every_chunk(client):
+    orders = [
+        {'id': n, 'delivery_district': district, 'product_quantity': n, 'product_weight': 1.5}
+        for n, district in enumerate(['Jhapa', 'Kaski', 'Lalitpur', 'Morang', 'Ilam'])
+    ]
+    response = client.post('/api/logistics/quotes', json=orders)
+    assert response.status_code == 200
+    quotes = pd.read_json(io.StringIO(response.get_data(as_text=True)), lines=True)
+    assert list(quotes['id']) == [0, 1, 2, 3, 4]
+    assert (quotes['total_cost'] > 0).all()
+
+
+def test_quote_api_returns_csv(client):
+    csv = 'delivery_district,product_quantity,product_weight\nJhapa,1,2\nKaski,3,4\nIlam,0,1\n'
+    response = client.post('/api/logistics/quotes?format=csv',
+                           data={'orders_file': (io.BytesIO(csv.encode()), 'orders.csv')})
+    assert response.status_code == 200
+    quotes = pd.read_csv(io.StringIO(response.get_data(as_text=True)))
+    assert list(quotes['delivery_district']) == ['Jhapa', 'Kaski', 'Ilam']
+
+
+@pytest.mark.parametrize('body, message', [
+    ([1, 2], 'orders[0] must be an object'),
+    ({'orders': 'all'}, 'JSON list'),
+    ([], 'No orders'),
+    ([{'delivery_district': 'Nowhere', 'product_quantity': 'x', 'product_weight': -5}], 'unknown delivery_district'),
+    # The bad order is in the third chunk, after two good ones
+    ([{'delivery_district': 'Jhapa', 'product_quantity': 1, 'product_weight': 1}] * 4
+     + [{'delivery_district': ['Jhapa'], 'product_quantity': 1, 'product_weight': 1}], 'orders[4]'),
+])
+def test_quote_api_rejects_bad_orders_before_streaming(client, body, message):
+    response = client.post('/api/logistics/quotes', json=body)
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
@@ -0,0 +1,43 @@
+import threading
+import time
+
+from model_registry import ModelRegistry
+
+
+def test_concurrent_callers_share_one_load():
+    registry = ModelRegistry()
+    built = []
+
+    def factory():
+        time.sleep(0.05)
+        built.append(object())
+        return built[-1]
+
+    registry.register('detector', factory)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(registry.get('detector'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(built) == 1
+    assert all(model is built[0] for model in seen)
+    assert registry.stats()['models']['detector']['loaded']
+
+
+def test_unload_closes_and_the_next_get_rebuilds():
+    class Model:
+        closed = False
+
+        def close(self):
+            self.closed = True
+
+    registry = ModelRegistry()
+    registry.register('batcher', Model)
+    first = registry.get('batcher')
+    registry.unload('batcher')
+
+    assert first.closed
+    assert not registry.is_loaded('batcher')
+    assert registry.get('batcher') is not first
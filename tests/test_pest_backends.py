@@ -0,0 +1,24 @@
+import importlib.util
+
+import pytest
+
+from pest_backends import build_backend, sample_images
+
+
+def test_sample_images_finds_sharded_uploads_but_not_variants(tmp_path):
+    digest = 'ab' * 32
+    shard = tmp_path / 'ab' / 'ab'
+    shard.mkdir(parents=True)
+    for name in (f'{digest}.jpg', f'{digest}-w320.jpg', f'{digest}-w320.webp', 'notes.txt'):
+        (shard / name).write_bytes(b'')
+    (tmp_path / 'flat.png').write_bytes(b'')
+
+    assert sample_images(str(tmp_path)) == sorted([str(shard / f'{digest}.jpg'), str(tmp_path / 'flat.png')])
+    assert len(sample_images(str(tmp_path), limit=1)) == 1
+
+
+def test_onnx_backend_without_its_packages_is_an_import_error(monkeypatch, tmp_path):
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda name: None)
+    with pytest.raises(ImportError, match='onnx and onnxruntime'):
+        build_backend('onnx', None, None, onnx_path=str(tmp_path / 'model.onnx'))
+    assert not (tmp_path / 'model.onnx').exists()
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from model_registry import ModelRegistry
+from pest_batching import BatchingPredictor, PredictorClosed
+
+
+class SlowDetector:
+    """Treats each source as a number and answers after a short delay."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.batches = []
+
+    def preprocess(self, source):
+        return source
+
+    def predict_batch(self, tensors):
+        time.sleep(self.delay)
+        self.batches.append(list(tensors))
+        return [{'pest_type': f'pest-{t}', 'confidence': 50.0} for t in tensors]
+
+
+def test_concurrent_images_share_a_batch():
+    predictor = BatchingPredictor(SlowDetector(), max_batch_size=8, max_wait_ms=50)
+    futures = [predictor.submit_image(i) for i in range(4)]
+    assert [f.result(5)['pest_type'] for f in futures] == [f'pest-{i}' for i in range(4)]
+    assert predictor.stats()['largest_batch'] > 1
+    predictor.close()
+
+
+def test_close_finishes_accepted_images():
+    predictor = BatchingPredictor(SlowDetector(), max_batch_size=2, max_wait_ms=1)
+    futures = [predictor.submit_image(i) for i in range(6)]
+    predictor.close()
+    assert all(f.done() for f in futures)
+    assert [f.result()['pest_type'] for f in futures] == [f'pest-{i}' for i in range(6)]
+
+
+def test_submit_after_close_fails_fast():
+    predictor = BatchingPredictor(SlowDetector())
+    predictor.close()
+    with pytest.raises(PredictorClosed):
+        predictor.predict(1, timeout=1)
+    with pytest.raises(PredictorClosed):
+        predictor.submit(1).result(1)
+
+
+def test_retire_swaps_models_without_blocking():
+    registry = ModelRegistry()
+    registry.register('batcher', lambda: BatchingPredictor(SlowDetector(delay=0.2)))
+
+    old = registry.get('batcher')
+    pending = old.submit_image(1)
+    started = time.perf_counter()
+    registry.retire('batcher')
+    assert time.perf_counter() - started < 0.1
+
+    new = registry.get('batcher')
+    assert new is not old
+    assert pending.result(5)['pest_type'] == 'pest-1'
+    # The retired batcher stops on its own thread and then refuses new work
+    for _ in range(100):
+        if not any(t.name == 'model-retire' for t in threading.enumerate()):
+            break
+        time.sleep(0.05)
+    with pytest.raises(PredictorClosed):
+        old.predict(2, timeout=1)
+    new.close()
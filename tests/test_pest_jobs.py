@@ -0,0 +1,72 @@
+import io
+import json
+import zipfile
+
+from PIL import Image
+
+
+def write_image(path, color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), color).save(buffer, 'PNG')
+    path.write_bytes(buffer.getvalue())
+    return str(path)
+
+
+def test_bulk_job_predicts_and_persists(app_module, database, fake_pest_model, tmp_path):
+    images = [
+        ('red.png', write_image(tmp_path / 'red.png', 'red')),
+        ('blue.png', write_image(tmp_path / 'blue.png', 'blue')),
+    ]
+
+    job = app_module.pest_jobs.submit(images)
+    results = list(job.iter_results(timeout=10))
+
+    assert job.status == 'done', job.error
+    assert [r.get('error') for r in results] == [None, None]
+    assert {r['pest_type'] for r in results} == {'Termite'}
+    with app_module.app.app_context():
+        rows = app_module.PestPrediction.query.all()
+        assert sorted(row.image_path for row in rows) == sorted(path for _, path in images)
+
+
+def test_bulk_job_reuses_stored_prediction(app_module, database, fake_pest_model, tmp_path):
+    path = write_image(tmp_path / 'green.png', 'green')
+    list(app_module.pest_jobs.submit([('green.png', path)]).iter_results(timeout=10))
+
+    # A fresh process has only the table to go on
+    app_module.prediction_cache._entries.clear()
+    job = app_module.pest_jobs.submit([('again.png', path)])
+    results = list(job.iter_results(timeout=10))
+
+    assert job.status == 'done'
+    assert results[0]['pest_type'] == 'Termite'
+    assert fake_pest_model.calls == 1
+
+
+def test_bulk_api_accepts_a_zip_and_streams_results(app_module, database, fake_pest_model, tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module.upload_storage, 'root', str(tmp_path / 'uploads'))
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for color in ('red', 'blue'):
+            buffer = io.BytesIO()
+            Image.new('RGB', (32, 32), color).save(buffer, 'PNG')
+            zf.writestr(f'field/{color}.png', buffer.getvalue())
+        zf.writestr('field/notes.txt', 'skipped')
+    archive.seek(0)
+
+    client = app_module.app.test_client()
+    response = client.post('/api/pest/bulk', data={'pestImages': (archive, 'field.zip')})
+    assert response.status_code == 202
+    body = response.get_json()
+    assert body['total'] == 2
+
+    lines = client.get(body['results_url']).get_data(as_text=True).splitlines()
+    assert sorted(json.loads(line)['pest_type'] for line in lines) == ['Termite', 'Termite']
+    assert client.get(body['status_url']).get_json()['status'] == 'done'
+
+
+def test_bulk_api_rejects_a_broken_zip(app_module):
+    response = app_module.app.test_client().post(
+        '/api/pest/bulk', data={'pestImages': (io.BytesIO(b'not a zip'), 'field.zip')}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,37 @@
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from pest_rollups import bucket_start
+
+
+def test_weeks_start_on_monday():
+    assert bucket_start(datetime(2025, 1, 26, 15), 'week') == date(2025, 1, 20)  # a Sunday
+    assert bucket_start(datetime(2025, 1, 27, 9), 'week') == date(2025, 1, 27)
+    assert bucket_start(datetime(2025, 1, 27, 9), 'day') == date(2025, 1, 27)
+
+
+def test_setup_database_rolls_up_existing_predictions(app_module, database):
+    with app_module.app.app_context():
+        with database.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO pest_prediction (image_path, pest_type, confidence_score, timestamp, location) VALUES "
+                "('a.jpg', 'Termite', 80, '2025-01-26 10:00:00', 'Jhapa'), "
+                "('b.jpg', 'Termite', 60, '2025-01-27 10:00:00', 'Jhapa')"
+            ))
+            connection.execute(text("DELETE FROM pest_rollup"))
+
+        app_module.setup_database()
+        weekly = app_module.outbreak_trends(database.session, app_module.PestRollup, 'week')
+        assert weekly == {'Termite': [
+            {'bucket': '2025-01-20', 'count': 1, 'avg_confidence': 80.0},
+            {'bucket': '2025-01-27', 'count': 1, 'avg_confidence': 60.0},
+        ]}
+
+        database.session.add(app_module.PestPrediction(
+            image_path='c.jpg', pest_type='Termite', confidence_score=70,
+            timestamp=datetime(2025, 1, 28, 8), location='Jhapa'
+        ))
+        database.session.commit()
+        heatmap = app_module.outbreak_heatmap(database.session, app_module.PestRollup, 'week')
+        assert heatmap == [{'location': 'Jhapa', 'pest_type': 'Termite', 'count': 3, 'avg_confidence': 70.0}]
@@ -0,0 +1,33 @@
+import os
+
+from prediction_cache import PredictionCache, image_hash
+
+
+def test_memory_then_disk_then_miss(tmp_path):
+    model = tmp_path / 'best_model.pth'
+    model.write_bytes(b'weights')
+    stored = {}
+    cache = PredictionCache(str(model), disk_lookup=lambda key, version: stored.get(key), check_interval=0)
+
+    key = image_hash(b'leaf')
+    assert cache.get(key) is None
+    stored[key] = {'pest_type': 'Termite'}
+    assert cache.get(key) == {'pest_type': 'Termite'}
+    assert cache.get(key) == {'pest_type': 'Termite'}
+
+    stats = cache.stats()
+    assert (stats['misses'], stats['disk_hits'], stats['hits']) == (1, 1, 1)
+
+
+def test_a_new_model_file_drops_every_entry(tmp_path):
+    model = tmp_path / 'best_model.pth'
+    model.write_bytes(b'weights')
+    reloads = []
+    cache = PredictionCache(str(model), on_invalidate=lambda: reloads.append(True), check_interval=0)
+    cache.put('key', {'pest_type': 'Termite'})
+
+    model.write_bytes(b'retrained weights')
+    os.utime(model, ns=(0, os.stat(model).st_mtime_ns + 1))
+    assert cache.get('key') is None
+    assert reloads == [True]
+    assert cache.stats()['invalidations'] == 1
@@ -0,0 +1,52 @@
+import pytest
+
+from product_listing import decode_cursor, encode_cursor, product_page
+
+
+@pytest.fixture
+def products(app_module, database):
+    with app_module.app.app_context():
+        # Repeated prices and missing ratings, so the id tie-break and the NULL tail matter
+        for i in range(11):
+            database.session.add(app_module.Product(
+                name=f'Product {i}', price=float(i % 3), rating=None if i % 4 == 0 else float(i % 5),
+                in_stock=i % 2 == 0
+            ))
+        database.session.commit()
+        yield app_module.Product
+        database.session.remove()
+
+
+def walk(session, model, sort, **filters):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = product_page(session, model, sort, cursor, limit=3, **filters)
+        seen += rows
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize('sort', ['featured', 'price_asc', 'price_desc', 'rating', 'latest'])
+def test_cursor_walk_returns_every_product_once_in_order(app_module, products, sort):
+    session = app_module.db.session
+    seen = walk(session, products, sort)
+    assert len(seen) == 11
+    assert len({product.id for product in seen}) == 11
+
+    if sort == 'rating':
+        rated = [p for p in seen if p.rating is not None]
+        assert seen[:len(rated)] == rated
+        assert [p.rating for p in rated] == sorted((p.rating for p in rated), reverse=True)
+    if sort == 'price_asc':
+        assert [(p.price, p.id) for p in seen] == sorted((p.price, p.id) for p in seen)
+
+
+def test_filters_apply_on_every_page(app_module, products):
+    seen = walk(app_module.db.session, products, 'price_desc', in_stock=True, max_price=1.0)
+    assert seen and all(p.in_stock and p.price <= 1.0 for p in seen)
+
+
+def test_cursor_round_trip_and_junk():
+    assert decode_cursor(encode_cursor(2.5, 7)) == (2.5, 7)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
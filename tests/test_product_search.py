@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import text
+
+from product_search import InvertedProductSearch, match_expression, search_terms
+
+
+def test_search_terms_fold_case_and_accents():
+    assert search_terms('Crème BRÛLÉE, 2kg') == ['creme', 'brulee', '2kg']
+    assert match_expression(['fresh', 'bai'], prefix=True) == '"fresh" "bai"*'
+
+
+@pytest.fixture(params=['fts5', 'inverted'])
+def search(request, app_module, database, monkeypatch):
+    if request.param == 'inverted':
+        monkeypatch.setattr(app_module, '_product_search', InvertedProductSearch())
+    else:
+        monkeypatch.setattr(app_module, '_product_search', None)
+    with app_module.app.app_context():
+        yield app_module
+
+
+def add_products(app_module, *names):
+    for name in names:
+        app_module.db.session.add(app_module.Product(name=name, price=10, description='Grown in Jhapa'))
+    app_module.db.session.commit()
+
+
+def names(products):
+    return sorted(product.name for product in products)
+
+
+def test_finds_products_by_name_and_prefix(search):
+    add_products(search, 'Fresh Baigan', 'Fresh Tomato', 'Jute Seeds')
+    products, _ = search.find_products('relevance', query='fresh')
+    assert names(products) == ['Fresh Baigan', 'Fresh Tomato']
+    products, _ = search.find_products('relevance', query='bai', prefix=True)
+    assert names(products) == ['Fresh Baigan']
+
+
+def test_inverted_index_sees_products_written_outside_this_process(app_module, database, monkeypatch):
+    index = InvertedProductSearch()
+    monkeypatch.setattr(app_module, '_product_search', index)
+    with app_module.app.app_context():
+        add_products(app_module, 'Fresh Baigan')
+        app_module.find_products('relevance', query='fresh')
+
+        # As addData.py or another gunicorn worker would, bypassing this process's session
+        with database.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO product (name, price, description, in_stock) VALUES ('Fresh Okra', 5, '', 1)"
+            ))
+            connection.execute(text("UPDATE product SET name = 'Old Baigan' WHERE name = 'Fresh Baigan'"))
+
+        products, _ = app_module.find_products('relevance', query='fresh')
+        assert names(products) == ['Fresh Okra']
+        rebuilds = index.rebuilds
+
+        # Nothing changed since, so the next search uses the index as is
+        app_module.find_products('relevance', query='fresh')
+        assert index.rebuilds == rebuilds
@@ -0,0 +1,62 @@
+from sqlalchemy import text
+
+from remedy_catalog import CsvRemedySource, QueryRemedySource, RemedyCatalog, remedy_version
+
+
+def test_csv_catalog_is_case_insensitive_and_falls_back_to_any_crop(tmp_path):
+    path = tmp_path / 'remedies.csv'
+    path.write_text('crop,pestname,remedy\nRice,Stem Borer,Light traps\n')
+    catalog = RemedyCatalog(CsvRemedySource(str(path)))
+    assert catalog.lookup(' stem borer ', 'rice') == 'Light traps'
+    assert catalog.lookup('Stem Borer', 'Jute') == 'Light traps'
+    assert catalog.lookup('Aphid') is None
+
+
+def test_db_catalog_sees_writes_from_other_processes(app_module, database):
+    def fetch_rows():
+        with database.engine.connect() as connection:
+            return connection.execute(text("SELECT crop, pest_name, remedy FROM pest_remedy")).all()
+
+    def fetch_version():
+        with database.engine.begin() as connection:
+            return remedy_version(connection)
+
+    with app_module.app.app_context():
+        catalog = RemedyCatalog(QueryRemedySource(fetch_rows, fetch_version), check_interval=0)
+        assert catalog.lookup('Termite') is None
+
+        # e.g. `flask import-remedies`: no after_commit in this process, so no touch()
+        with database.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO pest_remedy (crop, pest_name, remedy) VALUES ('Jute', 'Termite', 'Neem oil')"
+            ))
+        assert catalog.lookup('Termite') == 'Neem oil'
+
+        loads = catalog.loads
+        catalog.lookup('Termite')
+        assert catalog.loads == loads
+
+
+def test_catalog_keeps_its_index_when_the_version_check_fails():
+    class FlakySource:
+        fail = False
+
+        def version(self):
+            if self.fail:
+                raise RuntimeError('database is locked')
+            return 1
+
+        def rows(self):
+            return [('Jute', 'Termite', 'Neem oil')]
+
+    source = FlakySource()
+    catalog = RemedyCatalog(source, check_interval=0)
+    assert catalog.lookup('Termite') == 'Neem oil'
+    source.fail = True
+    assert catalog.lookup('Termite') == 'Neem oil'
+
+
+def test_change_counter_tables_stay_out_of_migrations(app_module):
+    assert not app_module.include_in_migrations('pest_remedy_version', 'table', {})
+    assert not app_module.include_in_migrations('product_fts_version', 'table', {})
+    assert app_module.include_in_migrations('pest_remedy', 'table', {})
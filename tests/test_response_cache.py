@@ -0,0 +1,73 @@
+import time
+
+from flask import Flask
+
+from response_cache import ResponseCache, TTLCache
+
+
+def test_ttl_cache_expires_and_invalidates_by_tag():
+    cache = TTLCache(max_entries=2, ttl=0.05)
+    cache.set('a', 1, tags=('products',))
+    cache.set('b', 2)
+    assert cache.invalidate('products') == 1
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    time.sleep(0.06)
+    assert cache.get('b') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+
+
+def make_app(cache, query_args=()):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    rendered = []
+
+    @app.route('/page')
+    @cache.page(query_args=query_args)
+    def page():
+        from flask import request
+        rendered.append(request.full_path)
+        return f"lang={request.args.get('lang', '')}"
+
+    return app, rendered
+
+
+def test_page_key_ignores_query_args_the_view_does_not_read():
+    cache = ResponseCache()
+    app, rendered = make_app(cache)
+    client = app.test_client()
+    for query in ('', '?utm_source=x', '?a=1&b=2', '?b=2&a=1'):
+        assert client.get('/page' + query).status_code == 200
+    assert len(rendered) == 1
+    assert cache.stats()['entries'] == 1
+
+
+def test_page_key_includes_whitelisted_args_in_a_fixed_order():
+    cache = ResponseCache()
+    app, rendered = make_app(cache, query_args=('lang',))
+    client = app.test_client()
+    assert client.get('/page?lang=ne&x=1').data == b'lang=ne'
+    assert client.get('/page?x=2&lang=ne').data == b'lang=ne'
+    assert client.get('/page?lang=en').data == b'lang=en'
+    assert len(rendered) == 2
+
+
+def test_revalidation_gets_a_304():
+    cache = ResponseCache()
+    app, _ = make_app(cache)
+    client = app.test_client()
+    etag = client.get('/page').headers['ETag']
+    response = client.get('/page', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert cache.stats()['not_modified'] == 1
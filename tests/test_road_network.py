@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from road_network import NO_PATH, RoadNetwork, floyd_warshall
+
+# Kathmandu - Lalitpur - Bhaktapur by road, plus a longer direct link; Kaski has no roads
+COORDINATES = {
+    'Kathmandu': (27.7103, 85.3222),
+    'Lalitpur': (27.6588, 85.3247),
+    'Bhaktapur': (27.6710, 85.4298),
+    'Kaski': (28.2622, 84.0167),
+}
+EDGES = pd.DataFrame({
+    'from_district': ['Kathmandu', 'Lalitpur', 'Kathmandu'],
+    'to_district': ['Lalitpur', 'Bhaktapur', 'Bhaktapur'],
+    'distance_km': [10.0, 20.0, 50.0],
+    'speed_kmph': [20.0, 40.0, 50.0],
+})
+
+
+def test_floyd_warshall_distances_times_and_next_hops():
+    inf = np.inf
+    km = np.array([[inf, 10, 50, inf], [10, inf, 20, inf], [50, 20, inf, inf], [inf, inf, inf, inf]])
+    hours = np.array([[inf, 0.5, 1, inf], [0.5, inf, 0.5, inf], [1, 0.5, inf, inf], [inf, inf, inf, inf]])
+    dist, time, next_hop = floyd_warshall(km, hours)
+
+    assert dist[0, 2] == 30 and time[0, 2] == 1.0
+    assert next_hop[0, 2] == 1 and next_hop[2, 0] == 1
+    assert np.all(np.diag(dist) == 0)
+    assert np.isinf(dist[0, 3]) and next_hop[0, 3] == NO_PATH
+
+
+def test_road_network_paths_and_travel_hours():
+    roads = RoadNetwork(COORDINATES, EDGES)
+    assert roads.links == 3
+    # The 50 km direct link loses to the 30 km route through Lalitpur
+    assert roads.distance('Kathmandu', 'Bhaktapur') == 30
+    assert roads.path('Kathmandu', 'Bhaktapur') == ['Kathmandu', 'Lalitpur', 'Bhaktapur']
+    assert roads.travel_hours('Kathmandu', 'Bhaktapur') == pytest.approx(10 / 20 + 20 / 40)
+    assert roads.path('Kathmandu', 'Kaski') == []
+    assert roads.nearest_district('Bhaktapur') == ['Lalitpur']
+    # Straight-line distances are kept beside the road ones
+    assert roads.straight_line[0, 2] < 30
+
+
+def test_road_links_must_name_known_districts():
+    edges = pd.DataFrame({'from_district': ['Kathmandu'], 'to_district': ['Atlantis'],
+                          'distance_km': [1.0], 'speed_kmph': [10.0]})
+    with pytest.raises(ValueError, match='Atlantis'):
+        RoadNetwork(COORDINATES, edges)
+
+
+
+def test_road_site_hours_add_the_access_leg():
+    pytest.importorskip('sklearn')
+    roads = RoadNetwork(COORDINATES, EDGES)
+    # One site on the Kathmandu hub, one a short hop off Bhaktapur
+    site_coordinates = np.array([COORDINATES['Kathmandu'], (27.6800, 85.4298)])
+    km = roads.site_distances(site_coordinates)
+    hours = roads.site_hours(site_coordinates)
+
+    i = roads.positions['Bhaktapur']
+    assert km[i, 0] == pytest.approx(30)
+    assert hours[i, 0] == pytest.approx(roads.travel_hours('Bhaktapur', 'Kathmandu'))
+    access_km = km[i, 1]
+    assert 0 < access_km < 2
+    assert hours[i, 1] == pytest.approx(access_km / 30, rel=1e-5)
+    assert np.isinf(hours[roads.positions['Kaski'], 0])
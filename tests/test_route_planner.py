@@ -0,0 +1,73 @@
+import pytest
+
+from route_planner import plan_routes
+
+ORDERS = [
+    {'id': 1, 'district': 'Lalitpur', 'load': 300},
+    {'id': 2, 'district': 'Bhaktapur', 'load': 300},
+    {'id': 3, 'district': 'Kaski', 'load': 500},
+    {'id': 4, 'district': 'Jhapa', 'load': 200},
+]
+
+
+def test_routes_respect_capacity_and_serve_every_order():
+    routes, unrouted = plan_routes(ORDERS, ['Kathmandu', 'Morang'], capacity=600)
+
+    assert unrouted == []
+    served = sorted(order for route in routes for stop in route.stops for order in stop['orders'])
+    assert served == [1, 2, 3, 4]
+    assert all(route.load <= 600 for route in routes)
+    # Jhapa is far closer to the Morang depot
+    assert [route.depot for route in routes if any(s['district'] == 'Jhapa' for s in route.stops)] == ['Morang']
+
+
+def test_oversized_and_unknown_orders_are_unrouted():
+    orders = [{'id': 1, 'district': 'Lalitpur', 'load': 700}, {'id': 2, 'district': 'Atlantis', 'load': 1}]
+    routes, unrouted = plan_routes(orders, ['Kathmandu'], capacity=600)
+    assert routes == []
+    assert [order['id'] for order in unrouted] == [1, 2]
+
+
+@pytest.fixture
+def admin_client(app_module, database):
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+        session['user_type'] = 'admin'
+    return client
+
+
+def test_route_api_plans_posted_orders(admin_client):
+    response = admin_client.post('/api/logistics/routes', json={
+        'capacity': 600, 'depots': ['Kathmandu'], 'orders': ORDERS[:2]
+    })
+    assert response.status_code == 200
+    assert response.get_json()['unrouted'] == []
+
+
+def test_route_api_treats_a_missing_load_as_empty(admin_client):
+    response = admin_client.post('/api/logistics/routes', json={
+        'depots': ['Kathmandu'], 'orders': [{'id': 1, 'district': 'Lalitpur'}]
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['unrouted'] == []
+    assert [order for route in body['routes'] for stop in route['stops'] for order in stop['orders']] == [1]
+
+
+@pytest.mark.parametrize('payload, message', [
+    ({'capacity': 'lots'}, 'capacity'),
+    ({'capacity': 0}, 'capacity'),
+    ({'vehicles': 1.5}, 'vehicles'),
+    ({'depots': ['Atlantis']}, 'Unknown depot'),
+    ({'orders': [{'id': 1, 'load': 5}]}, 'district'),
+    ({'orders': [{'id': 1, 'district': 'Atlantis', 'load': 5}]}, 'unknown district'),
+    ({'orders': [{'id': 1, 'district': 'Lalitpur', 'load': 'heavy'}]}, 'load'),
+    ({'orders': [{'district': 'Lalitpur', 'load': 5}]}, 'id'),
+    ({'orders': 'all'}, 'orders'),
+])
+def test_route_api_rejects_bad_payloads(admin_client, payload, message):
+    payload.setdefault('depots', ['Kathmandu'])
+    response = admin_client.post('/api/logistics/routes', json=payload)
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
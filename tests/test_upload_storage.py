@@ -0,0 +1,80 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+
+import pytest
+
+from upload_storage import UploadStorage, UploadTooLarge
+
+
+def test_identical_bytes_are_stored_once(tmp_path):
+    storage = UploadStorage(str(tmp_path))
+    first = storage.save_bytes(b'leaf', 'JPG')
+    second = storage.save_bytes(b'leaf', 'jpg')
+    assert storage.wait(first.name)
+    assert first.created and not second.created
+    assert first.name == second.name
+    assert first.name.startswith(f'{first.digest[:2]}/{first.digest[2:4]}/')
+    assert storage.stats()['deduplicated'] == 1
+
+
+def test_save_stream_rejects_large_uploads_and_leaves_nothing_behind(tmp_path):
+    storage = UploadStorage(str(tmp_path), max_bytes=4)
+    with pytest.raises(UploadTooLarge):
+        storage.save_stream(io.BytesIO(b'too large'), 'png')
+    assert os.listdir(tmp_path) == []
+
+
+def test_save_stream_places_bytes_still_being_written_in_the_background(tmp_path):
+    storage = UploadStorage(str(tmp_path))
+    release = threading.Event()
+    storage._pool.submit(release.wait)
+    storage._pool.submit(release.wait)  # both writer threads busy
+
+    pending = storage.save_bytes(b'leaf', 'jpg')
+    assert not os.path.exists(pending.path)
+    streamed = storage.save_stream(io.BytesIO(b'leaf'), 'jpg')
+    assert not streamed.created
+    assert os.path.exists(streamed.path)
+
+    release.set()
+    assert storage.wait(pending.name)
+
+
+def test_failed_background_write_is_logged_and_reported(tmp_path, caplog):
+    root = tmp_path / 'uploads'
+    storage = UploadStorage(str(root))
+    digest = hashlib.sha256(b'leaf').hexdigest()
+    # A file where the shard directory should be makes the write fail
+    root.mkdir()
+    (root / digest[:2]).write_bytes(b'')
+
+    with caplog.at_level(logging.ERROR, logger='upload_storage'):
+        stored = storage.save_bytes(b'leaf', 'jpg')
+        assert storage.wait(stored.name, timeout=5) is False
+    assert 'Could not write upload' in caplog.text
+    assert storage.stats()['write_failures'] == 1
+    assert storage.stats()['pending_writes'] == 0
+
+
+def test_failing_hook_does_not_stop_the_others(tmp_path):
+    storage = UploadStorage(str(tmp_path))
+    seen = []
+
+    @storage.on_stored
+    def broken(storage, name):
+        raise RuntimeError('boom')
+
+    storage.on_stored(lambda storage, name: seen.append(name))
+    stored = storage.save_stream(io.BytesIO(b'leaf'), 'jpg')
+    storage._pool.shutdown(wait=True)
+    assert seen == [stored.name]
+    assert storage.stats()['hook_failures'] == 1
+
+
+def test_missing_stored_upload_is_a_404(app_module):
+    name = f"ab/cd/{'ab' * 32}.jpg"
+    response = app_module.app.test_client().get(f'/static/uploads/{name}')
+    assert response.status_code == 404
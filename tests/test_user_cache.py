@@ -0,0 +1,40 @@
+from sqlalchemy import text
+
+
+def add_user(app_module, database):
+    app_module.user_cache.invalidate()
+    user = app_module.User(username='asha', email='asha@example.com', password_hash='x', user_type='farmer')
+    database.session.add(user)
+    database.session.commit()
+    return user.id
+
+
+def test_commit_drops_the_cached_user(app_module, database):
+    with app_module.app.app_context():
+        user_id = add_user(app_module, database)
+        assert app_module.cached_user(user_id).location is None
+
+        user = database.session.get(app_module.User, user_id)
+        user.location = 'Jhapa'
+        database.session.commit()
+        database.session.remove()
+
+        assert app_module.cached_user(user_id).location == 'Jhapa'
+
+
+def test_changes_from_other_processes_show_after_the_ttl(app_module, database, monkeypatch):
+    user_cache = app_module.user_cache
+    with app_module.app.app_context():
+        user_id = add_user(app_module, database)
+        app_module.cached_user(user_id)
+        database.session.remove()
+
+        # Another worker's write: no after_commit in this process
+        with database.engine.begin() as connection:
+            connection.execute(text("UPDATE user SET location = 'Kaski' WHERE id = :id"), {'id': user_id})
+        assert app_module.cached_user(user_id).location is None
+        database.session.remove()
+
+        monkeypatch.setattr(user_cache, 'ttl', 0)
+        user_cache.set(user_id, user_cache.get(user_id), tags=(f'user:{user_id}',))
+        assert app_module.cached_user(user_id).location == 'Kaski'
@@ -0,0 +1,66 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from warehouse_prediction import assign_optimal_warehouses, predict_significant_warehouses
+
+FIXED_WAREHOUSE = pd.read_csv('fixed_warehouse.csv')
+# Inventory districts: known ones (Rolpa appears twice in fixed_warehouse.csv)
+# and one with no coordinates, which both paths drop
+DISTRICTS = ['Jhapa', 'Sunsari', 'Kathmandu', 'Kaski', 'Rolpa', 'Jumla', 'Achham', 'Chitwan', 'Atlantis']
+
+
+class IdentityScaler:
+    def transform(self, data):
+        return np.asarray(data)
+
+
+class NearestModel:
+    """Stands in for the pickled classifier: the closest warehouse wins."""
+
+    def predict(self, distances):
+        return np.argmin(distances, axis=1)
+
+
+class Artifacts:
+    model = NearestModel()
+    scaler = IdentityScaler()
+    warehouses = FIXED_WAREHOUSE.drop_duplicates('District').reset_index(drop=True)
+    fixed_warehouse = FIXED_WAREHOUSE
+
+
+def row_by_row(inventory, artifacts):
+    # The /warehouses prediction before it was streamed: one model row per inventory row
+    merged = pd.merge(inventory, artifacts.fixed_warehouse[['District', 'Latitude', 'Longitude']],
+                      on='District', how='left')
+    clean = merged.dropna(subset=['Latitude', 'Longitude']).copy()
+    clean['Optimal Warehouse'] = assign_optimal_warehouses(
+        clean, artifacts.model, artifacts.scaler, artifacts.warehouses
+    )
+    counts = clean['Optimal Warehouse'].value_counts()
+    return counts[counts >= counts.quantile(0.75)].index.tolist()
+
+
+@pytest.fixture(scope='module')
+def inventory():
+    rng = np.random.default_rng(7)
+    weights = rng.random(len(DISTRICTS))
+    districts = rng.choice(DISTRICTS, size=500, p=weights / weights.sum())
+    return pd.DataFrame({'District': districts, 'Sales in NPR': rng.integers(1, 10_000, size=500)})
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 64, 10_000])
+def test_streamed_counts_match_row_by_row_prediction(inventory, chunksize):
+    expected = row_by_row(inventory, Artifacts)
+    streamed = predict_significant_warehouses(
+        io.StringIO(inventory.to_csv(index=False)), Artifacts, chunksize=chunksize
+    )
+    assert streamed == expected
+    assert expected
+
+
+def test_no_known_districts_means_no_warehouses():
+    csv = io.StringIO('District,Sales in NPR\nAtlantis,5\n')
+    assert predict_significant_warehouses(csv, Artifacts, chunksize=1) == []
@@ -0,0 +1,202 @@
+# upload_storage.py
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024
+# Stored files and their derivatives (e.g. ab/cd/<sha256>-w320.webp)
+STORED_NAME = re.compile(r'^(?:[0-9a-f]{2}/)+[0-9a-f]{64}(?:-\w+)?\.\w+$')
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class StoredUpload:
+    def __init__(self, name, path, digest, size, created):
+        self.name = name  # relative to the storage root, e.g. 'ab/cd/abcd....jpg'
+        self.path = path
+        self.digest = digest
+        self.size = size
+        self.created = created  # False when an identical file was already stored
+
+
+class UploadStorage:
+    """
+    Content-addressed upload store. A file is kept at ab/cd/<sha256>.<ext>
+    under the root, so identical uploads share one copy, names never
+    collide and no directory grows past a few hundred entries.
+
+    Writing bytes that are already in memory, and the hooks registered with
+    on_stored (e.g. resized variants), run on a small thread pool; wait() lets
+    a request for a file still being written block until it is on disk.
+    A background write that fails is logged and counted; nothing is left
+    at the path, so the file is missing (404) until the same bytes are
+    uploaded again.
+    """
+
+    def __init__(self, root, max_bytes=16 * 1024 * 1024, workers=2, shard_depth=2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.shard_depth = shard_depth
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix='upload-write')
+        self._lock = threading.Lock()
+        self._pending = {}  # name -> Event set once its write is on disk
+        self._hooks = []
+        self.stored = 0
+        self.deduplicated = 0
+        self.write_failures = 0
+        self.hook_failures = 0
+
+    def name_for(self, digest, extension):
+        shards = [digest[2 * i:2 * i + 2] for i in range(self.shard_depth)]
+        return '/'.join(shards + [f'{digest}.{extension.lower()}'])
+
+    def path(self, name):
+        return os.path.join(self.root, *name.split('/'))
+
+    @staticmethod
+    def is_stored_name(name):
+        """Whether a name is content-addressed, i.e. its bytes can never change."""
+        return STORED_NAME.match(name) is not None
+
+    def on_stored(self, hook):
+        """Run hook(storage, name) in the background after each new file is written."""
+        self._hooks.append(hook)
+        return hook
+
+    def read(self, stream):
+        """The whole upload as bytes; raises UploadTooLarge past max_bytes."""
+        chunks = []
+        size = 0
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise UploadTooLarge(f'Upload is larger than {self.max_bytes // (1024 * 1024)} MB')
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def save_bytes(self, data, extension, digest=None):
+        """Store bytes already in memory; the write itself happens in the background."""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        name = self.name_for(digest, extension)
+        path = self.path(name)
+        with self._lock:
+            if name in self._pending or os.path.exists(path):
+                self.deduplicated += 1
+                return StoredUpload(name, path, digest, len(data), created=False)
+            self._pending[name] = threading.Event()
+            self.stored += 1
+        self._pool.submit(self._write, name, data)
+        return StoredUpload(name, path, digest, len(data), created=True)
+
+    def save_stream(self, stream, extension):
+        """
+        Stream an upload to disk in chunks, hashing as it goes, without
+        holding it in memory. Raises UploadTooLarge past max_bytes.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise UploadTooLarge(f'Upload is larger than {self.max_bytes // (1024 * 1024)} MB')
+                    digest.update(chunk)
+                    out.write(chunk)
+            name = self.name_for(digest.hexdigest(), extension)
+            created = self._place(temp_path, name)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        if created and self._hooks:
+            self._pool.submit(self._run_hooks, name)
+        return StoredUpload(name, self.path(name), digest.hexdigest(), size, created)
+
+    def _place(self, temp_path, name):
+        path = self.path(name)
+        with self._lock:
+            if os.path.exists(path):
+                self.deduplicated += 1
+                return False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # The same bytes may still be on their way to disk from save_bytes;
+            # place this copy now rather than hand back a path that is not there yet
+            os.replace(temp_path, path)
+            if name in self._pending:
+                self.deduplicated += 1
+                return False
+            self.stored += 1
+        return True
+
+    def _write(self, name, data):
+        path = self.path(name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write beside the target and rename, so a reader never sees half a file
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+            try:
+                with os.fdopen(fd, 'wb') as out:
+                    out.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except Exception:
+            # Runs on the pool, where an exception would vanish with its future
+            logger.exception('Could not write upload %s', name)
+            with self._lock:
+                self.write_failures += 1
+            return
+        finally:
+            with self._lock:
+                self._pending.pop(name).set()
+        self._run_hooks(name)
+
+    def _run_hooks(self, name):
+        for hook in self._hooks:
+            try:
+                hook(self, name)
+            except Exception:
+                logger.exception('on_stored hook %r failed for %s', hook, name)
+                with self._lock:
+                    self.hook_failures += 1
+
+    def wait(self, name, timeout=None):
+        """
+        Block until a pending write of `name` has finished; returns whether
+        the file is on disk (False after a failed write or a timeout).
+        """
+        with self._lock:
+            written = self._pending.get(name)
+        if written is not None:
+            written.wait(timeout)
+        return os.path.exists(self.path(name))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'stored': self.stored,
+                'deduplicated': self.deduplicated,
+                'write_failures': self.write_failures,
+                'hook_failures': self.hook_failures,
+                'pending_writes': len(self._pending),
+                'max_bytes': self.max_bytes,
+            }
+
@@ -0,0 +1,106 @@
+# warehouse_artifacts.py
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+
+class WarehouseArtifacts:
+    """One loaded, read-only set of warehouse prediction resources."""
+
+    def __init__(self, model, scaler, warehouses, fixed_warehouse, version, load_seconds):
+        self.model = model
+        self.scaler = scaler
+        self.warehouses = warehouses
+        self.fixed_warehouse = fixed_warehouse
+        self.version = version
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+
+
+class WarehouseArtifactManager:
+    """
+    Keeps warehouse_model.pkl and fixed_warehouse.csv in memory. When either
+    file changes on disk a complete new WarehouseArtifacts is built and
+    swapped in, so a request always sees one consistent model/scaler/CSV set.
+    """
+
+    def __init__(self, model_path='warehouse_model.pkl', coordinates_path='fixed_warehouse.csv',
+                 check_interval=2.0):
+        self.model_path = model_path
+        self.coordinates_path = coordinates_path
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._artifacts = None
+        self._stamp = None
+        self._checked_at = float('-inf')
+        self.reloads = 0
+
+    def _file_stamp(self):
+        return tuple(
+            (os.stat(path).st_size, os.stat(path).st_mtime_ns)
+            for path in (self.model_path, self.coordinates_path)
+        )
+
+    def _load(self):
+        started = time.perf_counter()
+        digest = hashlib.sha1()
+
+        with open(self.model_path, 'rb') as f:
+            raw_model = f.read()
+        digest.update(raw_model)
+        model_data = pickle.loads(raw_model)
+
+        with open(self.coordinates_path, 'rb') as f:
+            digest.update(f.read())
+        fixed_warehouse = pd.read_csv(self.coordinates_path)
+
+        return WarehouseArtifacts(
+            model=model_data['model'],
+            scaler=model_data['scaler'],
+            warehouses=model_data['warehouses'],
+            fixed_warehouse=fixed_warehouse,
+            version=digest.hexdigest()[:12],
+            load_seconds=time.perf_counter() - started
+        )
+
+    def current(self):
+        now = time.monotonic()
+        if self._artifacts is not None and now - self._checked_at < self.check_interval:
+            return self._artifacts
+
+        with self._lock:
+            if self._artifacts is not None and now - self._checked_at < self.check_interval:
+                return self._artifacts
+            self._checked_at = now
+
+            stamp = self._file_stamp()
+            if stamp != self._stamp:
+                try:
+                    artifacts = self._load()
+                except Exception as e:
+                    # A half-written file keeps the previous artifacts in service
+                    if self._artifacts is None:
+                        raise
+                    print(f"Error reloading warehouse artifacts: {e}")
+                else:
+                    self._artifacts = artifacts
+                    self._stamp = stamp
+                    self.reloads += 1
+            return self._artifacts
+
+    def stats(self):
+        artifacts = self._artifacts
+        if artifacts is None:
+            return {'loaded': False}
+        return {
+            'loaded': True,
+            'version': artifacts.version,
+            'loaded_at': artifacts.loaded_at,
+            'load_seconds': round(artifacts.load_seconds, 4),
+            'reloads': self.reloads,
+        }
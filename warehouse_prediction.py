@@ -0,0 +1,66 @@
+# warehouse_prediction.py
+import warnings
+
+import pandas as pd
+
+from geo import warehouse_distance_matrix
+
+
+def assign_optimal_warehouses(clean_data, model, scaler, warehouses):
+    """Return the optimal warehouse district for every row of clean_data."""
+    distances = warehouse_distance_matrix(clean_data, warehouses)
+
+    with warnings.catch_warnings():
+        # The scaler was fitted on a DataFrame whose columns repeat 'Rolpa';
+        # a plain array skips the feature-name check that newer sklearn rejects
+        warnings.filterwarnings('ignore', message='X does not have valid feature names')
+        scaled_data = scaler.transform(distances)
+
+    return warehouses['District'].to_numpy()[model.predict(scaled_data)]
+
+
+def significant_warehouses(warehouse_counts):
+    # Warehouses serving at least the 75th percentile of assigned rows
+    threshold = warehouse_counts.quantile(0.75)
+    return warehouse_counts[warehouse_counts >= threshold].index.tolist()
+
+
+def count_districts(csv_source, chunksize=100_000):
+    """Row counts per District, read in chunks so memory stays bounded."""
+    counts = pd.Series(dtype='int64')
+    for chunk in pd.read_csv(csv_source, usecols=['District'], chunksize=chunksize):
+        counts = counts.add(chunk['District'].value_counts(), fill_value=0)
+    return counts.astype('int64')
+
+
+def predict_significant_warehouses(csv_source, artifacts, chunksize=100_000):
+    """
+    Streaming version of the /warehouses prediction for large inventory files.
+
+    A row's optimal warehouse depends only on its district's coordinates, so
+    each chunk is reduced to per-district row counts and the model is run once
+    per distinct district. Weighting by those counts gives the same
+    Optimal Warehouse counts, and therefore the same 75th-percentile result,
+    as predicting every row.
+    """
+    district_counts = count_districts(csv_source, chunksize).rename('Rows')
+    district_counts.index.name = 'District'
+
+    merged_data = pd.merge(
+        district_counts.reset_index(),
+        artifacts.fixed_warehouse[['District', 'Latitude', 'Longitude']],
+        on='District',
+        how='left'
+    )
+    clean_data = merged_data.dropna(subset=['Latitude', 'Longitude']).copy()
+    if clean_data.empty:
+        return []
+
+    clean_data['Optimal Warehouse'] = assign_optimal_warehouses(
+        clean_data, artifacts.model, artifacts.scaler, artifacts.warehouses
+    )
+    warehouse_counts = (
+        clean_data.groupby('Optimal Warehouse')['Rows'].sum()
+        .sort_values(ascending=False, kind='stable')
+    )
+    return significant_warehouses(warehouse_counts)